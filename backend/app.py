@@ -1,26 +1,46 @@
-from datetime import datetime, timedelta, timezone
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
 import os
-import random
 import time
 import json
-import re
 import sqlite3
-from contextlib import contextmanager
-import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
-from threading import Lock, Thread
-from typing import Optional
+from threading import Event, Lock, Thread, local
+from typing import Any, Callable, Optional
 
-from fastapi import BackgroundTasks, FastAPI, HTTPException
+from fastapi import BackgroundTasks, FastAPI, Header, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 
+from bb_bugs import metrics
+from bb_bugs.judge import worker as judge_worker
+from bb_bugs.store import db as db_store
+from bb_bugs.store import profile as sql_profile
+from bb_bugs.store.schema import ensure_tables
+
 DB_PATH = Path("data/bbs.sqlite")
-RUNNING_JOBS: dict[str, subprocess.Popen[str]] = {}
-RUNNING_JOBS_LOCK = Lock()
-MAX_JUDGE_INFLIGHT = int(os.getenv("BB_JUDGE_MAX_INFLIGHT", "8"))
-QUEUE_POLL_S = float(os.getenv("BB_JUDGE_QUEUE_POLL_S", "1.0"))
-STUCK_JOB_S = float(os.getenv("BB_JUDGE_STUCK_S", "600"))
+DB_BUSY_TIMEOUT_MS = int(os.getenv("BB_DB_BUSY_TIMEOUT_MS", "5000"))
+DB_READ_WORKERS = max(1, int(os.getenv("BB_DB_READ_WORKERS", "8")))
+# Run the judge dispatcher inside the API process. Turn this off when the API
+# runs with several uvicorn workers and jobs are run by bb-bugs-judge-worker.
+JUDGE_EMBEDDED_WORKER = os.getenv("BB_JUDGE_EMBEDDED_WORKER", "1").lower() not in ("0", "false")
+JOB_EVENTS_BACKFILL = 1000
+SSE_HEARTBEAT_S = float(os.getenv("BB_SSE_HEARTBEAT_S", "15"))
+# JOB_EVENTS re-reads the journal this often, once per process, for
+# transitions written by other processes (judge workers, other API workers);
+# local ones arrive at once.
+SSE_POLL_S = float(os.getenv("BB_SSE_POLL_S", "1.0"))
+QUEUE_TOTAL_TTL_S = float(os.getenv("BB_QUEUE_TOTAL_TTL_S", "30"))
+RESPONSE_CACHE_SIZE = int(os.getenv("BB_RESPONSE_CACHE_SIZE", "512"))
+# Higher runs first. POST /judge/{id} is interactive and /judge/bulk is
+# bulk unless the caller passes an explicit priority.
+PRIORITY_INTERACTIVE = 10
+PRIORITY_BULK = 0
 ALLOWED_MODELS = {
     "auto",
     "pro",
@@ -33,16 +53,6 @@ ALLOWED_MODELS = {
     "gemini-2.5-flash-lite",
 }
 
-app = FastAPI()
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"] ,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
-
 class DecisionIn(BaseModel):
     thread_id: str
     status: str
@@ -54,915 +64,1188 @@ class BulkStatusIn(BaseModel):
     thread_ids: list[str]
 
 
+class ThreadBulkIn(BaseModel):
+    thread_ids: list[str]
+    max_posts: int = 11
+
+
+class BulkJudgeIn(BaseModel):
+    thread_ids: Optional[list[str]] = None
+    status: Optional[str] = None
+    status_guess: Optional[str] = None
+    confidence: Optional[str] = None
+    q: Optional[str] = None
+    has_llm: Optional[bool] = None
+    dry_run: bool = False
+    model: Optional[str] = None
+    force: bool = False
+    priority: int = PRIORITY_BULK
+
+
 def get_conn() -> sqlite3.Connection:
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+    conn = db_store.connect_db(db_store.DbConfig(path=DB_PATH), check_same_thread=False)
+    conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
     return conn
 
 
-@contextmanager
-def get_conn_ctx() -> sqlite3.Connection:
+class DbExecutor:
+    """Run blocking sqlite3 work for async endpoints on dedicated threads.
+
+    Each worker thread keeps one connection for its lifetime, and work is
+    submitted as ``fn(conn, *args)``. The pool is bounded, so excess
+    requests wait here as cheap coroutines instead of tying up threads.
+    Read-only executors set PRAGMA query_only on their connections.
+    """
+
+    def __init__(self, name: str, workers: int, *, read_only: bool) -> None:
+        self.name = name
+        self.workers = workers
+        self.read_only = read_only
+        self._lock = Lock()
+        self._pool: ThreadPoolExecutor | None = None
+        self._local = local()
+        self._conns: list[sqlite3.Connection] = []
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = get_conn()
+            if self.read_only:
+                conn.execute("PRAGMA query_only = ON")
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def _call(self, fn: Callable[..., Any], args: tuple) -> Any:
+        conn = self._connection()
+        start = time.perf_counter()
+        try:
+            return fn(conn, *args)
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            SQL_SECONDS.observe(time.perf_counter() - start, executor=self.name)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix=self.name)
+            pool = self._pool
+        return await asyncio.get_running_loop().run_in_executor(pool, self._call, fn, args)
+
+    def close(self) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=True)
+        with self._lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            conn.close()
+        self._local = local()
+
+
+# API writes are serialized on one connection; judge jobs use their own
+# connections (see bb_bugs.judge.worker).
+DB_READ = DbExecutor("db-read", DB_READ_WORKERS, read_only=True)
+DB_WRITE = DbExecutor("db-write", 1, read_only=False)
+
+
+class JobEventHub:
+    """Fan new llm_job_events rows out to the SSE streams of this process.
+
+    Writers call publish() after committing a job change; it reads the new
+    rows once (on the writer's connection) and hands them to every
+    subscriber's asyncio queue. Transitions committed by other processes
+    are picked up by one poller thread per process (start_polling), so
+    streams never poll SQLite themselves, however many are open.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._last_seq: int | None = None
+        self._subscribers: dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self._stop = Event()
+        self._poller: Thread | None = None
+
+    def start_polling(self, connect: Callable[[], sqlite3.Connection], interval_s: float) -> None:
+        self._stop.clear()
+        self._poller = Thread(target=self._poll, args=(connect, interval_s), daemon=True)
+        self._poller.start()
+
+    def stop_polling(self) -> None:
+        self._stop.set()
+        if self._poller is not None:
+            self._poller.join()
+            self._poller = None
+
+    def _poll(self, connect: Callable[[], sqlite3.Connection], interval_s: float) -> None:
+        conn = connect()
+        conn.execute("PRAGMA query_only = ON")
+        try:
+            while not self._stop.wait(interval_s):
+                try:
+                    # A no-op without subscribers.
+                    self.publish(conn)
+                except sqlite3.Error:
+                    pass  # busy or locked; the next tick catches up
+        finally:
+            conn.close()
+
+    def subscribe(self, cursor: int) -> asyncio.Queue:
+        events: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            if not self._subscribers:
+                self._last_seq = cursor
+            self._subscribers[events] = asyncio.get_running_loop()
+        return events
+
+    def unsubscribe(self, events: asyncio.Queue) -> None:
+        with self._lock:
+            self._subscribers.pop(events, None)
+
+    def publish(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            if not self._subscribers:
+                return
+            rows = conn.execute(
+                """
+                SELECT seq, thread_id, status, model, error, created_at
+                FROM llm_job_events
+                WHERE seq > ?
+                ORDER BY seq
+                """,
+                (self._last_seq or 0,),
+            ).fetchall()
+            if not rows:
+                return
+            self._last_seq = rows[-1]["seq"]
+            items = [dict(row) for row in rows]
+            for events, loop in list(self._subscribers.items()):
+                try:
+                    loop.call_soon_threadsafe(events.put_nowait, items)
+                except RuntimeError:
+                    # The subscriber's event loop is gone.
+                    self._subscribers.pop(events, None)
+
+
+JOB_EVENTS = JobEventHub()
+judge_worker.JOB_LISTENERS.append(JOB_EVENTS.publish)
+
+
+class TotalsCache:
+    """/queue totals and facet counts per filter set, kept for ttl_s seconds.
+
+    Writes made through this API (decisions, judgments) invalidate the
+    cache. Callers also put the global content version in the key, so
+    outside writers such as the crawler invalidate it too.
+    """
+
+    def __init__(self, ttl_s: float) -> None:
+        self.ttl_s = ttl_s
+        self._lock = Lock()
+        self._totals: dict[tuple, tuple[float, Any]] = {}
+
+    def get(self, key: tuple) -> Any:
+        with self._lock:
+            entry = self._totals.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl_s:
+            return None
+        return entry[1]
+
+    def put(self, key: tuple, value: Any) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._totals = {k: e for k, e in self._totals.items() if now - e[0] <= self.ttl_s}
+            self._totals[key] = (now, value)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._totals.clear()
+
+
+QUEUE_TOTALS = TotalsCache(QUEUE_TOTAL_TTL_S)
+
+
+class ResponseCache:
+    """LRU of rendered JSON bodies, each stored with the ETag it was built for.
+
+    Concurrent misses for the same key and ETag are coalesced: one caller
+    renders while the others wait for its result.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._lock = Lock()
+        self._entries: OrderedDict[str, tuple[str, bytes]] = OrderedDict()
+        self._pending: dict[tuple[str, str], Event] = {}
+
+    def get_or_render(self, key: str, etag: str, render: Callable[[], bytes]) -> bytes:
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == etag:
+                    self._entries.move_to_end(key)
+                    return entry[1]
+                pending = self._pending.get((key, etag))
+                owner = pending is None
+                if owner:
+                    pending = self._pending[(key, etag)] = Event()
+            if not owner:
+                # Re-check the cache once the renderer is done; if it failed,
+                # one of the waiters takes over.
+                pending.wait()
+                continue
+            try:
+                body = render()
+                with self._lock:
+                    self._entries[key] = (etag, body)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.size:
+                        self._entries.popitem(last=False)
+                return body
+            finally:
+                with self._lock:
+                    self._pending.pop((key, etag), None)
+                pending.set()
+
+
+RESPONSE_CACHE = ResponseCache(RESPONSE_CACHE_SIZE)
+
+HTTP_SECONDS = metrics.REGISTRY.histogram(
+    "bb_http_request_seconds",
+    "API latency until the response starts, by route template.",
+    ("method", "route", "status"),
+)
+SQL_SECONDS = metrics.REGISTRY.histogram(
+    "bb_sqlite_seconds", "Time API work spends on the DB executors.", ("executor",)
+)
+JOBS_BY_STATUS = metrics.REGISTRY.gauge("bb_judge_jobs", "Judge jobs by status.", ("status",))
+JOBS_INFLIGHT = metrics.REGISTRY.gauge(
+    "bb_judge_inflight", "Judge jobs running or starting, by model.", ("model",)
+)
+
+
+def _bootstrap_db() -> None:
     conn = get_conn()
     try:
-        yield conn
+        conn.execute("PRAGMA journal_mode = WAL")
+        ensure_tables(conn)
     finally:
         conn.close()
 
 
-def ensure_tables(conn: sqlite3.Connection) -> None:
-    conn.executescript(
-        """
-        CREATE TABLE IF NOT EXISTS triage_decisions (
-            thread_id TEXT PRIMARY KEY,
-            status TEXT NOT NULL,
-            duplicate_of TEXT,
-            notes TEXT,
-            updated_at TEXT NOT NULL
-        );
-
-        CREATE TABLE IF NOT EXISTS llm_judgments (
-            thread_id TEXT PRIMARY KEY,
-            summary TEXT,
-            status_guess TEXT,
-            confidence TEXT,
-            evidence TEXT,
-            duplicates TEXT,
-            model TEXT,
-            created_at TEXT
-        );
-
-        CREATE TABLE IF NOT EXISTS llm_jobs (
-            thread_id TEXT PRIMARY KEY,
-            status TEXT NOT NULL,
-            dry_run INTEGER DEFAULT 0,
-            model TEXT,
-            error TEXT,
-            started_at TEXT,
-            finished_at TEXT,
-            updated_at TEXT NOT NULL
-        );
-
-        CREATE TABLE IF NOT EXISTS llm_job_metrics (
-            thread_id TEXT PRIMARY KEY,
-            timings_json TEXT,
-            created_at TEXT,
-            updated_at TEXT
-        );
-
-        CREATE TABLE IF NOT EXISTS llm_state (
-            key TEXT PRIMARY KEY,
-            value TEXT,
-            updated_at TEXT
-        );
-        """
-    )
-    cols = conn.execute("PRAGMA table_info(llm_jobs)").fetchall()
-    col_names = {c[1] for c in cols} if cols else set()
-    if "dry_run" not in col_names:
-        conn.execute("ALTER TABLE llm_jobs ADD COLUMN dry_run INTEGER DEFAULT 0")
-    if "model" not in col_names:
-        conn.execute("ALTER TABLE llm_jobs ADD COLUMN model TEXT")
-    conn.commit()
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    _bootstrap_db()
+    if JUDGE_EMBEDDED_WORKER:
+        judge_worker.start()
+    JOB_EVENTS.start_polling(get_conn, SSE_POLL_S)
+    yield
+    JOB_EVENTS.stop_polling()
+    DB_READ.close()
+    DB_WRITE.close()
+    judge_worker.DB_POOL.close_all()
 
 
-def _set_job_status(
-    conn: sqlite3.Connection,
-    thread_id: str,
-    status: str,
-    *,
-    dry_run: bool | None = None,
-    model: str | None = None,
-    error: str | None = None,
-    started_at: str | None = None,
-    finished_at: str | None = None,
-) -> None:
-    conn.execute(
-        """
-        INSERT INTO llm_jobs (thread_id, status, dry_run, model, error, started_at, finished_at, updated_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ON CONFLICT(thread_id) DO UPDATE SET
-          status=excluded.status,
-          dry_run=COALESCE(excluded.dry_run, llm_jobs.dry_run),
-          model=COALESCE(excluded.model, llm_jobs.model),
-          error=excluded.error,
-          started_at=COALESCE(excluded.started_at, llm_jobs.started_at),
-          finished_at=excluded.finished_at,
-          updated_at=excluded.updated_at
-        """,
-        (
-            thread_id,
-            status,
-            1 if dry_run else (0 if dry_run is False else None),
-            model,
-            error,
-            started_at,
-            finished_at,
-            datetime.utcnow().isoformat(),
-        ),
-    )
-    conn.commit()
+class RequestMetricsMiddleware:
+    """Record bb_http_request_seconds for every HTTP request.
 
+    Plain ASGI rather than BaseHTTPMiddleware so streaming responses pass
+    through untouched; latency is measured up to the response start, which
+    keeps long-lived SSE streams from skewing the histogram.
+    """
 
-def _count_inflight(conn: sqlite3.Connection) -> int:
-    row = conn.execute(
-        "SELECT COUNT(*) AS cnt FROM llm_jobs WHERE status IN ('running', 'starting')"
-    ).fetchone()
-    return int(row["cnt"]) if row else 0
-
-
-def _summarize_llm_error(detail: str) -> str:
-    text = (detail or "").lower()
-    if "terminalquotaerror" in text or "exhausted your capacity" in text or "quota" in text:
-        return "LLM quota exhausted; try later"
-    if "timed out" in text or "timeout" in text:
-        return "LLM timed out; try later"
-    if "unexpected eof" in text and "bash" in text:
-        return "LLM prompt shell error"
-    return detail[:500]
-
-
-def _is_quota_error(detail: str) -> bool:
-    text = (detail or "").lower()
-    return "quota" in text or "exhausted your capacity" in text or "terminalquotaerror" in text
-
-
-def _parse_quota_reset(detail: str) -> str | None:
-    match = re.search(r"reset after\s+((\d+h)?(\d+m)?(\d+s)?)", detail, re.IGNORECASE)
-    if not match:
-        return None
-    token = match.group(1)
-    hours = re.search(r"(\d+)h", token)
-    minutes = re.search(r"(\d+)m", token)
-    seconds = re.search(r"(\d+)s", token)
-    total = 0
-    if hours:
-        total += int(hours.group(1)) * 3600
-    if minutes:
-        total += int(minutes.group(1)) * 60
-    if seconds:
-        total += int(seconds.group(1))
-    if total <= 0:
-        return None
-    reset_at = datetime.now(timezone.utc) + timedelta(seconds=total)
-    return reset_at.replace(microsecond=0).isoformat().replace("+00:00", "Z")
-
-
-def _parse_quota_reset_from_report(detail: str) -> str | None:
-    match = re.search(r"Full report available at:\\s*(/\\S+\\.json)", detail)
-    path = Path(match.group(1)) if match else None
-    if path is None or not path.exists():
-        try:
-            candidates = list(Path("/tmp").glob("gemini-client-error-*.json"))
-            if not candidates:
-                return None
-            path = max(candidates, key=lambda p: p.stat().st_mtime)
-            if (datetime.now(timezone.utc).timestamp() - path.stat().st_mtime) > 180:
-                return None
-        except Exception:
-            return None
-    try:
-        payload = json.loads(path.read_text())
-    except Exception:
-        return None
-    message = None
-    if isinstance(payload, dict):
-        if isinstance(payload.get("message"), str):
-            message = payload.get("message")
-        elif isinstance(payload.get("message"), dict) and isinstance(payload["message"].get("message"), str):
-            message = payload["message"]["message"]
-        elif isinstance(payload.get("error"), dict) and isinstance(payload["error"].get("message"), str):
-            message = payload["error"]["message"]
-        elif isinstance(payload.get("error"), str):
-            message = payload.get("error")
-    if not message:
-        return None
-    return _parse_quota_reset(message)
-
-
-def _set_state(conn: sqlite3.Connection, key: str, value: str | None) -> None:
-    conn.execute(
-        """
-        INSERT INTO llm_state (key, value, updated_at)
-        VALUES (?, ?, ?)
-        ON CONFLICT(key) DO UPDATE SET value=excluded.value, updated_at=excluded.updated_at
-        """,
-        (key, value, datetime.utcnow().isoformat()),
-    )
-    conn.commit()
+    def __init__(self, app) -> None:
+        self.app = app
 
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+
+        async def send_timed(message) -> None:
+            if message["type"] == "http.response.start":
+                # The router stores the matched route in the shared scope;
+                # label by its template so thread ids don't explode the series.
+                route = getattr(scope.get("route"), "path", "unmatched")
+                HTTP_SECONDS.observe(
+                    time.perf_counter() - start,
+                    method=scope["method"],
+                    route=route,
+                    status=message["status"],
+                )
+            await send(message)
 
-def _set_quota_state(conn: sqlite3.Connection, model: str, message: str, reset_at: str | None) -> None:
-    now = datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
-    _set_state(conn, f"quota_exhausted_at:{model}", now)
-    _set_state(conn, f"quota_exhausted_message:{model}", message)
-    if reset_at:
-        _set_state(conn, f"quota_reset_at:{model}", reset_at)
+        await self.app(scope, receive, send_timed)
 
 
-def _clear_quota_state(conn: sqlite3.Connection, model: str) -> None:
-    conn.execute(
-        "DELETE FROM llm_state WHERE key IN (?, ?, ?)",
-        (f"quota_exhausted_at:{model}", f"quota_exhausted_message:{model}", f"quota_reset_at:{model}"),
-    )
-    conn.commit()
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"] ,
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=["ETag"],
+)
+app.add_middleware(RequestMetricsMiddleware)
 
 
-def _claim_next_job(conn: sqlite3.Connection) -> tuple[str, bool, str | None] | None:
+def _content_version(conn: sqlite3.Connection, scope: str) -> int:
     row = conn.execute(
-        """
-        SELECT thread_id, dry_run, model
-        FROM llm_jobs
-        WHERE status = 'queued'
-        ORDER BY updated_at ASC
-        LIMIT 1
-        """
+        "SELECT version FROM content_versions WHERE scope = ?", (scope,)
     ).fetchone()
-    if not row:
-        return None
-    cur = conn.execute(
-        """
-        UPDATE llm_jobs
-        SET status = 'starting', updated_at = ?
-        WHERE thread_id = ? AND status = 'queued'
-        """,
-        (datetime.utcnow().isoformat(), row["thread_id"]),
-    )
-    conn.commit()
-    if cur.rowcount == 0:
-        return None
-    return (row["thread_id"], bool(row["dry_run"]), row["model"])
+    return row["version"] if row else 0
 
 
-def _dispatch_loop() -> None:
-    while True:
-        conn = None
-        try:
-            conn = get_conn()
-            ensure_tables(conn)
-            _cleanup_orphaned_jobs(conn)
-            inflight = _count_inflight(conn)
-            if inflight >= MAX_JUDGE_INFLIGHT:
-                time.sleep(QUEUE_POLL_S)
-                continue
-            claim = _claim_next_job(conn)
-            if not claim:
-                time.sleep(QUEUE_POLL_S)
-                continue
-            thread_id, dry_run, model = claim
-            worker = Thread(
-                target=_run_judge_job,
-                args=(thread_id,),
-                kwargs={"dry_run": dry_run, "model": model},
-                daemon=True,
-            )
-            worker.start()
-        except Exception:
-            time.sleep(QUEUE_POLL_S)
-        finally:
-            if conn is not None:
-                conn.close()
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
 
 
-def _cleanup_orphaned_jobs(conn: sqlite3.Connection) -> None:
-    rows = conn.execute(
-        "SELECT thread_id, status, started_at, updated_at FROM llm_jobs WHERE status IN ('running', 'starting')"
-    ).fetchall()
-    if not rows:
-        return
-    now = datetime.utcnow()
-    with RUNNING_JOBS_LOCK:
-        active = set(RUNNING_JOBS.keys())
-    for row in rows:
-        thread_id = row["thread_id"]
-        if thread_id in active:
-            continue
-        if row["status"] == "starting":
-            updated_at = row["updated_at"]
-            if not updated_at:
-                continue
-            try:
-                updated = datetime.fromisoformat(updated_at)
-            except ValueError:
-                continue
-            if (now - updated).total_seconds() >= STUCK_JOB_S:
-                _set_job_status(conn, thread_id, "queued")
-            continue
-        started_at = row["started_at"]
-        if not started_at:
-            continue
-        try:
-            started = datetime.fromisoformat(started_at)
-        except ValueError:
-            continue
-        if (now - started).total_seconds() >= STUCK_JOB_S:
-            _set_job_status(
-                conn,
-                thread_id,
-                "error",
-                error="LLM job orphaned; no active process",
-                finished_at=datetime.utcnow().isoformat(),
-            )
+def _cached_json(request: Request, key: str, etag: str, render: Callable[[], Any]) -> Response:
+    """304 if the client already has ``etag``, else the body from RESPONSE_CACHE."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    body = RESPONSE_CACHE.get_or_render(key, etag, lambda: json.dumps(render(), ensure_ascii=False).encode("utf-8"))
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def _queue_filter(
+    status: str,
+    *,
+    status_guess: Optional[str] = None,
+    confidence: Optional[str] = None,
+    q: Optional[str] = None,
+    has_llm: Optional[bool] = None,
+    thread_ids: Optional[list[str]] = None,
+) -> tuple[str, list]:
+    """FROM ... WHERE over triage_queue (aliased tq), plus its parameters.
+
+    Only the filters actually given become clauses, so SQLite can pick the
+    matching composite index.
+    """
+    clauses: list[str] = []
+    params: list = []
+    if status == "unreviewed":
+        clauses.append("tq.reviewed = 0")
+    elif status == "reviewed":
+        clauses.append("tq.reviewed = 1")
+    if has_llm is not None:
+        clauses.append("tq.has_llm = ?")
+        params.append(1 if has_llm else 0)
+    if status_guess is not None:
+        clauses.append("tq.status_guess = ?")
+        params.append(status_guess)
+    if confidence is not None:
+        clauses.append("tq.confidence = ?")
+        params.append(confidence)
+    if q:
+        if q.isdigit():
+            clauses.append("(tq.title LIKE ? OR tq.thread_id = ?)")
+            params.extend([f"%{q}%", q])
+        else:
+            clauses.append("tq.title LIKE ?")
+            params.append(f"%{q}%")
+    if thread_ids is not None:
+        clauses.append("tq.thread_id IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(thread_ids))
+    return f"FROM triage_queue tq WHERE {' AND '.join(clauses) or '1'}", params
+
+
+def _queue_facets(
+    conn: sqlite3.Connection,
+    status: str,
+    *,
+    status_guess: Optional[str],
+    confidence: Optional[str],
+    q: Optional[str],
+    has_llm: Optional[bool],
+) -> dict:
+    """Counts per status_guess and per confidence, each ignoring its own filter."""
+    facets = {}
+    for column, filters in (
+        ("status_guess", {"confidence": confidence}),
+        ("confidence", {"status_guess": status_guess}),
+    ):
+        from_where, params = _queue_filter(status, q=q, has_llm=has_llm, **filters)
+        rows = conn.execute(
+            f"""
+            SELECT tq.{column} AS value, COUNT(*) AS cnt
+            {from_where} AND tq.{column} IS NOT NULL
+            GROUP BY tq.{column}
+            """,
+            params,
+        ).fetchall()
+        facets[column] = {row["value"]: row["cnt"] for row in rows}
+    return facets
 
 
 @app.get("/queue")
-def get_queue(
+async def get_queue(
+    request: Request,
     status: str = "unreviewed",
     limit: int = 50,
     offset: int = 0,
+    cursor: Optional[int] = None,
     status_guess: Optional[str] = None,
     confidence: Optional[str] = None,
     q: Optional[str] = None,
     has_llm: Optional[bool] = None,
 ):
-    with get_conn_ctx() as conn:
-        ensure_tables(conn)
-        q_like = f"%{q}%" if q else None
-        q_is_id = q.isdigit() if q else False
-        count_sql_base = """
-            SELECT COUNT(*) FROM threads t
-            LEFT JOIN triage_decisions d ON d.thread_id = t.thread_id
-            LEFT JOIN llm_judgments lj ON lj.thread_id = t.thread_id
-        """
-        llm_clause = ""
-        if has_llm is True:
-            llm_clause = " AND lj.thread_id IS NOT NULL"
-        elif has_llm is False:
-            llm_clause = " AND lj.thread_id IS NULL"
-
-        if status == "unreviewed":
-            sql = """
-                SELECT t.thread_id, t.title, t.url, d.status AS decision_status,
-                       lj.status_guess, lj.confidence
-                FROM threads t
-                LEFT JOIN triage_decisions d ON d.thread_id = t.thread_id
-                LEFT JOIN llm_judgments lj ON lj.thread_id = t.thread_id
-                WHERE d.thread_id IS NULL
-                  AND (? IS NULL OR t.title LIKE ? OR (? = 1 AND t.thread_id = ?))
-                  AND (? IS NULL OR lj.status_guess = ?)
-                  AND (? IS NULL OR lj.confidence = ?)
-            """ + llm_clause + """
-                ORDER BY CAST(t.thread_id AS INTEGER) DESC
-                LIMIT ? OFFSET ?
-            """
-            count_sql = count_sql_base + """
-                WHERE d.thread_id IS NULL
-                  AND (? IS NULL OR t.title LIKE ? OR (? = 1 AND t.thread_id = ?))
-                  AND (? IS NULL OR lj.status_guess = ?)
-                  AND (? IS NULL OR lj.confidence = ?)
-            """ + llm_clause
-            rows = conn.execute(
-                sql,
-                (
-                    q,
-                    q_like,
-                    1 if q_is_id else 0,
-                    q,
-                    status_guess,
-                    status_guess,
-                    confidence,
-                    confidence,
-                    limit,
-                    offset,
-                ),
-            ).fetchall()
-            total = conn.execute(
-                count_sql,
-                (q, q_like, 1 if q_is_id else 0, q, status_guess, status_guess, confidence, confidence),
-            ).fetchone()[0]
-        elif status == "reviewed":
-            sql = """
-                SELECT t.thread_id, t.title, t.url, d.status AS decision_status,
-                       d.duplicate_of, d.notes, lj.status_guess, lj.confidence
-                FROM threads t
-                JOIN triage_decisions d ON d.thread_id = t.thread_id
-                LEFT JOIN llm_judgments lj ON lj.thread_id = t.thread_id
-                WHERE d.status IS NOT NULL
-                  AND (? IS NULL OR t.title LIKE ? OR (? = 1 AND t.thread_id = ?))
-                  AND (? IS NULL OR lj.status_guess = ?)
-                  AND (? IS NULL OR lj.confidence = ?)
-            """ + llm_clause + """
-                ORDER BY CAST(t.thread_id AS INTEGER) DESC
-                LIMIT ? OFFSET ?
-            """
-            count_sql = """
-                SELECT COUNT(*) FROM threads t
-                JOIN triage_decisions d ON d.thread_id = t.thread_id
-                LEFT JOIN llm_judgments lj ON lj.thread_id = t.thread_id
-                WHERE d.status IS NOT NULL
-                  AND (? IS NULL OR t.title LIKE ? OR (? = 1 AND t.thread_id = ?))
-                  AND (? IS NULL OR lj.status_guess = ?)
-                  AND (? IS NULL OR lj.confidence = ?)
-            """ + llm_clause
-            rows = conn.execute(
-                sql,
-                (
-                    q,
-                    q_like,
-                    1 if q_is_id else 0,
-                    q,
-                    status_guess,
-                    status_guess,
-                    confidence,
-                    confidence,
-                    limit,
-                    offset,
-                ),
-            ).fetchall()
-            total = conn.execute(
-                count_sql,
-                (q, q_like, 1 if q_is_id else 0, q, status_guess, status_guess, confidence, confidence),
-            ).fetchone()[0]
-        else:
-            sql = """
-                SELECT t.thread_id, t.title, t.url, d.status AS decision_status,
-                       lj.status_guess, lj.confidence
-                FROM threads t
-                LEFT JOIN triage_decisions d ON d.thread_id = t.thread_id
-                LEFT JOIN llm_judgments lj ON lj.thread_id = t.thread_id
-                WHERE (? IS NULL OR t.title LIKE ? OR (? = 1 AND t.thread_id = ?))
-                  AND (? IS NULL OR lj.status_guess = ?)
-                  AND (? IS NULL OR lj.confidence = ?)
-            """ + llm_clause + """
-                ORDER BY CAST(t.thread_id AS INTEGER) DESC
-                LIMIT ? OFFSET ?
-            """
-            count_sql = """
-                SELECT COUNT(*) FROM threads t
-                LEFT JOIN llm_judgments lj ON lj.thread_id = t.thread_id
-                WHERE (? IS NULL OR t.title LIKE ? OR (? = 1 AND t.thread_id = ?))
-                  AND (? IS NULL OR lj.status_guess = ?)
-                  AND (? IS NULL OR lj.confidence = ?)
-            """ + llm_clause
-            rows = conn.execute(
-                sql,
-                (
-                    q,
-                    q_like,
-                    1 if q_is_id else 0,
-                    q,
-                    status_guess,
-                    status_guess,
-                    confidence,
-                    confidence,
-                    limit,
-                    offset,
-                ),
-            ).fetchall()
-            total = conn.execute(
-                count_sql,
-                (q, q_like, 1 if q_is_id else 0, q, status_guess, status_guess, confidence, confidence),
-            ).fetchone()[0]
-        return {"items": [dict(r) for r in rows], "total": total}
+    """Page through the queue, newest thread first.
+
+    Pass the previous page's ``next_cursor`` as ``cursor`` to seek straight
+    past it on the sort_id index; ``offset`` still works but deep offsets
+    scan every skipped row. Responses carry the global content version as
+    their ETag.
+    """
+    key = repr(("queue", status, limit, offset, cursor, status_guess, confidence, q, has_llm))
+
+    def respond(conn: sqlite3.Connection) -> Response:
+        version = _content_version(conn, "global")
+        return _cached_json(
+            request,
+            key,
+            f'"g{version}"',
+            lambda: _render_queue(
+                conn,
+                version,
+                status=status,
+                limit=limit,
+                offset=offset,
+                cursor=cursor,
+                status_guess=status_guess,
+                confidence=confidence,
+                q=q,
+                has_llm=has_llm,
+            ),
+        )
+
+    return await DB_READ.run(respond)
+
+
+def _render_queue(
+    conn: sqlite3.Connection,
+    version: int,
+    *,
+    status: str,
+    limit: int,
+    offset: int,
+    cursor: Optional[int],
+    status_guess: Optional[str],
+    confidence: Optional[str],
+    q: Optional[str],
+    has_llm: Optional[bool],
+) -> dict:
+    from_where, params = _queue_filter(
+        status, status_guess=status_guess, confidence=confidence, q=q, has_llm=has_llm
+    )
+    if status == "reviewed":
+        columns = """tq.thread_id, tq.title, tq.url, tq.decision_status,
+                   tq.duplicate_of, tq.notes, tq.status_guess, tq.confidence"""
+    else:
+        columns = """tq.thread_id, tq.title, tq.url, tq.decision_status,
+                   tq.status_guess, tq.confidence"""
+    page_sql = from_where
+    page_params = list(params)
+    if cursor is not None:
+        page_sql += " AND tq.sort_id < ?"
+        page_params.append(cursor)
+        offset = 0
+    rows = conn.execute(
+        f"""
+        SELECT {columns}, tq.sort_id
+        {page_sql}
+        ORDER BY tq.sort_id DESC
+        LIMIT ? OFFSET ?
+        """,
+        (*page_params, limit, offset),
+    ).fetchall()
+    totals_key = (version, status, status_guess, confidence, q, has_llm)
+    cached = QUEUE_TOTALS.get(totals_key)
+    if cached is None:
+        total = conn.execute(f"SELECT COUNT(*) {from_where}", params).fetchone()[0]
+        facets = _queue_facets(
+            conn, status, status_guess=status_guess, confidence=confidence, q=q, has_llm=has_llm
+        )
+        cached = (total, facets)
+        QUEUE_TOTALS.put(totals_key, cached)
+    total, facets = cached
+    items = []
+    for row in rows:
+        item = dict(row)
+        item.pop("sort_id")
+        items.append(item)
+    next_cursor = rows[-1]["sort_id"] if len(rows) == limit else None
+    return {"items": items, "total": total, "facets": facets, "next_cursor": next_cursor}
 
 
 @app.get("/thread/{thread_id}")
-def get_thread(thread_id: str, max_posts: int = 11):
-    with get_conn_ctx() as conn:
-        ensure_tables(conn)
-        thread = conn.execute(
-            "SELECT thread_id, title, url FROM threads WHERE thread_id = ?",
-            (thread_id,),
-        ).fetchone()
-        if not thread:
+async def get_thread(thread_id: str, request: Request, max_posts: int = 11):
+    def respond(conn: sqlite3.Connection) -> Response:
+        # Before the ETag check: an unknown id has version 0 too, and must
+        # not answer 304 to a client that sends that tag.
+        if conn.execute("SELECT 1 FROM threads WHERE thread_id = ?", (thread_id,)).fetchone() is None:
             raise HTTPException(status_code=404, detail="Thread not found")
+        version = _content_version(conn, f"thread:{thread_id}")
+        return _cached_json(
+            request,
+            f"thread:{thread_id}:{max_posts}",
+            _thread_etag(version, max_posts),
+            lambda: _render_thread(conn, thread_id, max_posts),
+        )
 
-        posts = conn.execute(
-            """
-            SELECT post_id, author, posted_at, body_text
-            FROM posts
-            WHERE thread_id = ?
-            ORDER BY post_id
-            LIMIT ?
-            """,
-            (thread_id, max_posts),
-        ).fetchall()
+    return await DB_READ.run(respond)
+
+
+def _thread_etag(version: int, max_posts: int) -> str:
+    # The body depends on max_posts as well as the content version.
+    return f'"t{version}-{max_posts}"'
+
+
+def _render_thread(conn: sqlite3.Connection, thread_id: str, max_posts: int) -> dict:
+    detail = _render_threads(conn, [thread_id], max_posts).get(thread_id)
+    if detail is None:
+        raise HTTPException(status_code=404, detail="Thread not found")
+    return detail
 
-        decision = conn.execute(
-            "SELECT * FROM triage_decisions WHERE thread_id = ?", (thread_id,)
-        ).fetchone()
 
-        judgment = conn.execute(
-            "SELECT * FROM llm_judgments WHERE thread_id = ?", (thread_id,)
-        ).fetchone()
+@app.post("/thread/bulk")
+async def get_threads_bulk(payload: ThreadBulkIn):
+    """Thread details for many ids in one round-trip (the UI prefetches with it).
 
+    Items follow the order of ``thread_ids``; unknown ids are listed in
+    ``missing``. Each item carries the ``etag`` GET /thread/{id} would send
+    for it, so a client can revalidate a prefetched item with If-None-Match.
+    """
+    thread_ids = list(dict.fromkeys(payload.thread_ids))
+    if not thread_ids:
+        return {"items": [], "missing": []}
+    if len(thread_ids) > 50:
+        raise HTTPException(status_code=413, detail="Too many thread_ids")
+
+    def respond(conn: sqlite3.Connection) -> dict:
+        # Versions before content, as in get_thread: a write in between makes
+        # the tag older than the body (one extra 200 later), never newer.
+        versions = {
+            row["scope"].removeprefix("thread:"): row["version"]
+            for row in conn.execute(
+                "SELECT scope, version FROM content_versions "
+                "WHERE scope IN (SELECT 'thread:' || value FROM json_each(?))",
+                (json.dumps(thread_ids),),
+            )
+        }
+        details = _render_threads(conn, thread_ids, payload.max_posts)
         return {
+            "items": [
+                {**details[tid], "etag": _thread_etag(versions.get(tid, 0), payload.max_posts)}
+                for tid in thread_ids
+                if tid in details
+            ],
+            "missing": [tid for tid in thread_ids if tid not in details],
+        }
+
+    return await DB_READ.run(respond)
+
+
+def _render_threads(conn: sqlite3.Connection, thread_ids: list[str], max_posts: int) -> dict[str, dict]:
+    """Thread, posts, decision and judgment per id, with one query per table."""
+    ids_json = json.dumps(thread_ids)
+
+    def by_thread(table: str, columns: str = "*") -> dict[str, sqlite3.Row]:
+        rows = conn.execute(
+            f"SELECT {columns} FROM {table} WHERE thread_id IN (SELECT value FROM json_each(?))",
+            (ids_json,),
+        ).fetchall()
+        return {row["thread_id"]: row for row in rows}
+
+    threads = by_thread("threads", "thread_id, title, url")
+    if not threads:
+        return {}
+    posts = db_store.list_posts_for_threads(conn, list(threads), max_posts)
+    decisions = by_thread("triage_decisions")
+    judgments = by_thread("llm_judgments")
+
+    details = {}
+    for tid, thread in threads.items():
+        decision = decisions.get(tid)
+        judgment = judgments.get(tid)
+        details[tid] = {
             "thread": dict(thread),
-            "posts": [dict(p) for p in posts],
+            "posts": [
+                {key: post[key] for key in post.keys() if key != "thread_id"} for post in posts[tid]
+            ],
             "decision": dict(decision) if decision else None,
             "judgment": dict(judgment) if judgment else None,
         }
+    return details
 
 
 @app.post("/decision")
-def upsert_decision(payload: DecisionIn):
-    with get_conn_ctx() as conn:
-        ensure_tables(conn)
-        conn.execute(
-            """
-            INSERT INTO triage_decisions (thread_id, status, duplicate_of, notes, updated_at)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(thread_id) DO UPDATE SET
-              status=excluded.status,
-              duplicate_of=excluded.duplicate_of,
-              notes=excluded.notes,
-              updated_at=excluded.updated_at
-            """,
-            (
-                payload.thread_id,
-                payload.status,
-                payload.duplicate_of,
-                payload.notes,
-                datetime.utcnow().isoformat(),
-            ),
-        )
-        conn.commit()
-        return {"ok": True}
+async def upsert_decision(payload: DecisionIn):
+    return await DB_WRITE.run(_upsert_decision, payload)
 
 
-def _run_judge_job(thread_id: str, *, dry_run: bool = False, model: str | None = None) -> None:
-    conn = get_conn()
-    ensure_tables(conn)
-    try:
-        job = conn.execute(
-            "SELECT status FROM llm_jobs WHERE thread_id = ?", (thread_id,)
-        ).fetchone()
-        if job and job["status"] == "cancelled":
-            return
-        t_run_start = time.monotonic()
-        model = model or "auto"
-        _set_job_status(conn, thread_id, "running", started_at=datetime.utcnow().isoformat())
-        judge_mode = os.getenv("BB_JUDGE_MODE", "").lower()
-        if judge_mode == "mock":
-            base_sleep = float(os.getenv("BB_JUDGE_SLEEP_S", "2.0"))
-            jitter = float(os.getenv("BB_JUDGE_SLEEP_JITTER_S", "0"))
-            if jitter > 0:
-                base_sleep += random.random() * jitter
-            time.sleep(max(0.0, base_sleep))
-            if not dry_run:
-                payload = {
-                    "thread_id": thread_id,
-                    "summary": f"Mock summary for {thread_id}.",
-                    "status_guess": "open",
-                    "confidence": "low",
-                    "evidence": [],
-                    "duplicate_candidates": [],
-                }
-                conn.execute(
-                    """
-                    INSERT INTO llm_judgments (thread_id, summary, status_guess, confidence, evidence, duplicates, model, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(thread_id) DO UPDATE SET
-                      summary=excluded.summary,
-                      status_guess=excluded.status_guess,
-                      confidence=excluded.confidence,
-                      evidence=excluded.evidence,
-                      duplicates=excluded.duplicates,
-                      model=excluded.model,
-                      created_at=excluded.created_at
-                    """,
-                    (
-                        payload.get("thread_id"),
-                        payload.get("summary"),
-                        payload.get("status_guess"),
-                        payload.get("confidence"),
-                        json.dumps(payload.get("evidence", [])),
-                        json.dumps(payload.get("duplicate_candidates", [])),
-                        model,
-                        datetime.utcnow().isoformat(),
-                    ),
-                )
-                conn.commit()
-            _set_job_status(conn, thread_id, "done", finished_at=datetime.utcnow().isoformat())
-            return
+def _upsert_decision(conn: sqlite3.Connection, payload: DecisionIn) -> dict:
+    conn.execute(
+        """
+        INSERT INTO triage_decisions (thread_id, status, duplicate_of, notes, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(thread_id) DO UPDATE SET
+          status=excluded.status,
+          duplicate_of=excluded.duplicate_of,
+          notes=excluded.notes,
+          updated_at=excluded.updated_at
+        """,
+        (
+            payload.thread_id,
+            payload.status,
+            payload.duplicate_of,
+            payload.notes,
+            datetime.utcnow().isoformat(),
+        ),
+    )
+    conn.commit()
+    QUEUE_TOTALS.invalidate()
+    return {"ok": True}
+
+
+@app.post("/judge/bulk", status_code=202)
+async def judge_bulk(payload: BulkJudgeIn):
+    """Queue every thread matching an id list and/or the /queue filters.
+
+    Jobs already queued or running are left alone, threads without posts
+    are marked skipped, and (unless force or dry_run) threads whose stored
+    judgment still matches their content are not touched at all; the rest
+    are queued with one INSERT ... SELECT.
+    """
+    if payload.model and payload.model not in ALLOWED_MODELS:
+        raise HTTPException(status_code=400, detail="Unsupported model")
+    model = payload.model or "auto"
+    unchanged: list[str] = []
+    if not payload.force and not payload.dry_run:
+        # Hashing means loading every judged thread; do it on the read pool.
+        unchanged = await DB_READ.run(_unchanged_judgments, payload, model)
+    return await DB_WRITE.run(_judge_bulk, payload, model, unchanged)
+
+
+def _bulk_filter(payload: BulkJudgeIn) -> tuple[str, list]:
+    status = payload.status or ("all" if payload.thread_ids is not None else "unreviewed")
+    return _queue_filter(
+        status,
+        status_guess=payload.status_guess,
+        confidence=payload.confidence,
+        q=payload.q,
+        has_llm=payload.has_llm,
+        thread_ids=payload.thread_ids,
+    )
 
-        script = Path("scripts/llm_judge.py")
-        if not script.exists():
-            _set_job_status(conn, thread_id, "error", error="llm_judge.py not found")
-            return
-        cmd = [
-            "bash",
-            "-lc",
-            f"scripts/uv_run.sh python {script} --thread-id {thread_id} --max-posts 11 --json-only",
-        ]
-        t_popen = time.monotonic()
-        env = os.environ.copy()
-        env["GEMINI_MODEL"] = model
-        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env)
-        with RUNNING_JOBS_LOCK:
-            RUNNING_JOBS[thread_id] = proc
-        stdout, stderr = proc.communicate()
-        t_comm_done = time.monotonic()
-        with RUNNING_JOBS_LOCK:
-            RUNNING_JOBS.pop(thread_id, None)
-        current = conn.execute(
-            "SELECT status FROM llm_jobs WHERE thread_id = ?", (thread_id,)
-        ).fetchone()
-        if current and current["status"] == "cancelled":
-            _set_job_status(conn, thread_id, "cancelled", finished_at=datetime.utcnow().isoformat())
-            return
-        if proc.returncode != 0:
-            detail = (stderr.strip() or stdout.strip() or "LLM failed")[:2000]
-            if _is_quota_error(detail):
-                reset_at = _parse_quota_reset(detail) or _parse_quota_reset_from_report(detail)
-                _set_quota_state(conn, model, _summarize_llm_error(detail), reset_at)
-            _set_job_status(
-                conn,
-                thread_id,
-                "error",
-                error=_summarize_llm_error(detail),
-                finished_at=datetime.utcnow().isoformat(),
-            )
-            return
 
-        text = stdout.strip()
-        try:
-            payload = json.loads(text)
-        except Exception:
-            match = re.search(r"\{.*\}", text, re.DOTALL)
-            if not match:
-                detail = f"No JSON returned. Output: {text[:1000]}"
-                if _is_quota_error(detail):
-                    reset_at = _parse_quota_reset(detail) or _parse_quota_reset_from_report(detail)
-                    _set_quota_state(conn, model, _summarize_llm_error(detail), reset_at)
-                _set_job_status(
-                    conn,
-                    thread_id,
-                    "error",
-                    error=_summarize_llm_error(detail),
-                    finished_at=datetime.utcnow().isoformat(),
-                )
-                return
-            payload = json.loads(match.group(0))
+_BULK_IS_ACTIVE = """EXISTS (
+    SELECT 1 FROM llm_jobs j
+    WHERE j.thread_id = tq.thread_id AND j.status IN ('queued', 'starting', 'running')
+)"""
 
-        timing = payload.get("timings") if isinstance(payload, dict) else None
-        timings = {
-            "process_s": round(t_comm_done - t_run_start, 6),
-            "spawn_s": round(t_popen - t_run_start, 6),
-        }
-        if isinstance(timing, dict):
-            for k, v in timing.items():
-                timings[k] = v
-        conn.execute(
-            """
-            INSERT INTO llm_job_metrics (thread_id, timings_json, created_at, updated_at)
-            VALUES (?, ?, ?, ?)
-            ON CONFLICT(thread_id) DO UPDATE SET
-              timings_json=excluded.timings_json,
-              updated_at=excluded.updated_at
-            """,
-            (
-                thread_id,
-                json.dumps(timings),
-                datetime.utcnow().isoformat(),
-                datetime.utcnow().isoformat(),
-            ),
+
+def _unchanged_judgments(conn: sqlite3.Connection, payload: BulkJudgeIn, model: str) -> list[str]:
+    """Matched threads whose stored judgment would be reused as is."""
+    from_where, params = _bulk_filter(payload)
+    rows = conn.execute(
+        f"""
+        SELECT tq.thread_id
+        {from_where}
+          AND EXISTS (
+            SELECT 1 FROM llm_judgments lj
+            WHERE lj.thread_id = tq.thread_id AND lj.content_hash IS NOT NULL
+          )
+          AND NOT {_BULK_IS_ACTIVE}
+        """,
+        params,
+    ).fetchall()
+    return [
+        row["thread_id"]
+        for row in rows
+        if judge_worker.judgment_cache_hit(conn, row["thread_id"], model)
+    ]
+
+
+def _judge_bulk(
+    conn: sqlite3.Connection, payload: BulkJudgeIn, model: str, unchanged: list[str]
+) -> dict:
+    from_where, params = _bulk_filter(payload)
+    has_posts = "EXISTS (SELECT 1 FROM posts p WHERE p.thread_id = tq.thread_id)"
+    is_active = _BULK_IS_ACTIVE
+    conn.execute("BEGIN IMMEDIATE")
+    counts = conn.execute(
+        f"""
+        SELECT COUNT(*) AS matched,
+               COALESCE(SUM(NOT {has_posts} AND NOT {is_active}), 0) AS no_posts,
+               COALESCE(SUM({is_active}), 0) AS active
+        {from_where}
+        """,
+        params,
+    ).fetchone()
+    now = datetime.utcnow().isoformat()
+    # Same bookkeeping as POST /judge/{id} for threads with nothing to judge.
+    conn.execute(
+        f"""
+        INSERT INTO llm_jobs (thread_id, status, dry_run, model, error, finished_at, updated_at)
+        SELECT tq.thread_id, 'skipped', ?, ?, 'no posts for thread', ?, ?
+        {from_where}
+          AND NOT {has_posts}
+          AND NOT {is_active}
+        ON CONFLICT(thread_id) DO UPDATE SET
+          status=excluded.status,
+          dry_run=excluded.dry_run,
+          model=excluded.model,
+          error=excluded.error,
+          finished_at=excluded.finished_at,
+          updated_at=excluded.updated_at
+        """,
+        (1 if payload.dry_run else 0, model, now, now, *params),
+    )
+    rows = conn.execute(
+        f"""
+        INSERT INTO llm_jobs (
+          thread_id, status, dry_run, model, force, priority, error, started_at, finished_at, updated_at
         )
-        conn.commit()
+        SELECT tq.thread_id, 'queued', ?, ?, ?, ?, NULL, NULL, NULL, ?
+        {from_where}
+          AND {has_posts}
+          AND NOT {is_active}
+          AND tq.thread_id NOT IN (SELECT value FROM json_each(?))
+        ON CONFLICT(thread_id) DO UPDATE SET
+          status=excluded.status,
+          dry_run=excluded.dry_run,
+          model=excluded.model,
+          force=excluded.force,
+          priority=excluded.priority,
+          attempts=0,
+          next_attempt_at=NULL,
+          error=NULL,
+          finished_at=NULL,
+          updated_at=excluded.updated_at
+        RETURNING thread_id
+        """,
+        (
+            1 if payload.dry_run else 0,
+            model,
+            1 if payload.force else 0,
+            payload.priority,
+            now,
+            *params,
+            json.dumps(unchanged),
+        ),
+    ).fetchall()
+    conn.commit()
+    JOB_EVENTS.publish(conn)
+    if rows:
+        judge_worker.wake()
+    return {
+        "matched": counts["matched"],
+        "queued": len(rows),
+        "skipped_no_posts": counts["no_posts"],
+        "already_active": counts["active"],
+        "unchanged": len(unchanged),
+        "thread_ids": [row["thread_id"] for row in rows],
+        "max_inflight": judge_worker.MAX_JUDGE_INFLIGHT,
+        "model": model,
+    }
+
 
-        if not dry_run:
-            if not payload.get("thread_id"):
-                payload["thread_id"] = thread_id
-            if payload.get("thread_id") != thread_id:
-                payload["thread_id"] = thread_id
+@app.post("/judge/{thread_id}", status_code=202)
+async def judge_thread(
+    thread_id: str,
+    background_tasks: BackgroundTasks,
+    dry_run: bool = False,
+    model: str | None = None,
+    force: bool = False,
+    priority: int = PRIORITY_INTERACTIVE,
+):
+    if model and model not in ALLOWED_MODELS:
+        raise HTTPException(status_code=400, detail="Unsupported model")
+    model = model or "auto"
+    cached = False
+    if not force and not dry_run:
+        # Loading and hashing the thread only reads; keep it off the single
+        # writer thread so a big thread does not stall every other write.
+        cached = await DB_READ.run(judge_worker.judgment_cache_hit, thread_id, model)
+    return await DB_WRITE.run(_judge_thread, thread_id, dry_run, model, force, priority, cached)
+
+
+def _judge_thread(
+    conn: sqlite3.Connection,
+    thread_id: str,
+    dry_run: bool,
+    model: str,
+    force: bool,
+    priority: int,
+    cached: bool,
+) -> dict:
+    has_posts = conn.execute(
+        "SELECT COUNT(*) AS cnt FROM posts WHERE thread_id = ?",
+        (thread_id,),
+    ).fetchone()
+    if has_posts and int(has_posts["cnt"]) == 0:
+        judge_worker.set_job_status(
+            conn,
+            thread_id,
+            "skipped",
+            dry_run=dry_run,
+            model=model,
+            error="no posts for thread",
+            finished_at=datetime.utcnow().isoformat(),
+        )
+        return {"thread_id": thread_id, "status": "skipped", "reason": "no_posts"}
+    job = conn.execute(
+        "SELECT status, model FROM llm_jobs WHERE thread_id = ?", (thread_id,)
+    ).fetchone()
+    # 'starting' is a job a worker has claimed; re-queueing it here would
+    # clear the worker's lease mid-flight.
+    if job and job["status"] in ("queued", "starting", "running"):
+        if job["status"] == "queued":
+            # A click on a thread already in a bulk backlog (or waiting out a
+            # retry backoff) moves it up and makes it due now.
             conn.execute(
                 """
-                INSERT INTO llm_judgments (thread_id, summary, status_guess, confidence, evidence, duplicates, model, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(thread_id) DO UPDATE SET
-                  summary=excluded.summary,
-                  status_guess=excluded.status_guess,
-                  confidence=excluded.confidence,
-                  evidence=excluded.evidence,
-                  duplicates=excluded.duplicates,
-                  model=excluded.model,
-                  created_at=excluded.created_at
+                UPDATE llm_jobs SET priority = max(priority, ?), next_attempt_at = NULL
+                WHERE thread_id = ? AND status = 'queued'
                 """,
-                (
-                    thread_id,
-                    payload.get("summary"),
-                    payload.get("status_guess"),
-                    payload.get("confidence"),
-                    json.dumps(payload.get("evidence", [])),
-                    json.dumps(payload.get("duplicate_candidates", [])),
-                    model,
-                    datetime.utcnow().isoformat(),
-                ),
+                (priority, thread_id),
             )
             conn.commit()
-        _set_job_status(conn, thread_id, "done", finished_at=datetime.utcnow().isoformat())
-        _clear_quota_state(conn, model)
-    except Exception as exc:
-        if _is_quota_error(str(exc)):
-            _set_quota_state(
-                conn,
-                model or "auto",
-                _summarize_llm_error(str(exc)),
-                _parse_quota_reset(str(exc)) or _parse_quota_reset_from_report(str(exc)),
-            )
-        _set_job_status(
+        return {
+            "thread_id": thread_id,
+            "status": job["status"],
+            "max_inflight": judge_worker.MAX_JUDGE_INFLIGHT,
+            "model": job["model"] or model,
+        }
+    if cached:
+        judge_worker.set_job_status(
             conn,
             thread_id,
-            "error",
-            error=_summarize_llm_error(f"LLM job crashed: {exc}"),
+            "done",
+            dry_run=False,
+            model=model,
             finished_at=datetime.utcnow().isoformat(),
         )
-    finally:
-        conn.close()
+        return {"thread_id": thread_id, "status": "done", "cached": True, "model": model}
+    judge_worker.set_job_status(
+        conn,
+        thread_id,
+        "queued",
+        dry_run=dry_run,
+        model=model,
+        force=force,
+        priority=priority,
+        attempts=0,
+    )
+    judge_worker.wake()
+    # Jobs beyond the workers' combined capacity just wait in the queue;
+    # only a model nothing can run right now is worth reporting.
+    reason = None
+    if judge_worker.quota_routes(judge_worker.quota_blocks(conn)).get(model, model) is None:
+        reason = "quota"
+    return {
+        "thread_id": thread_id,
+        "status": "queued",
+        "queued_reason": reason,
+        "max_inflight": judge_worker.MAX_JUDGE_INFLIGHT,
+        "model": model,
+    }
 
 
-@app.post("/judge/{thread_id}", status_code=202)
-def judge_thread(thread_id: str, background_tasks: BackgroundTasks, dry_run: bool = False, model: str | None = None):
-    with get_conn_ctx() as conn:
-        ensure_tables(conn)
-        if model and model not in ALLOWED_MODELS:
-            raise HTTPException(status_code=400, detail="Unsupported model")
-        model = model or "auto"
-        has_posts = conn.execute(
-            "SELECT COUNT(*) AS cnt FROM posts WHERE thread_id = ?",
-            (thread_id,),
-        ).fetchone()
-        if has_posts and int(has_posts["cnt"]) == 0:
-            _set_job_status(
-                conn,
-                thread_id,
-                "skipped",
-                dry_run=dry_run,
-                model=model,
-                error="no posts for thread",
-                finished_at=datetime.utcnow().isoformat(),
-            )
-            return {"thread_id": thread_id, "status": "skipped", "reason": "no_posts"}
-        job = conn.execute(
-            "SELECT status FROM llm_jobs WHERE thread_id = ?", (thread_id,)
-        ).fetchone()
-        if job and job["status"] in ("queued", "running"):
-            return {
-                "thread_id": thread_id,
-                "status": job["status"],
-                "max_inflight": MAX_JUDGE_INFLIGHT,
-                "model": job["model"] if "model" in job.keys() else model,
-            }
-        inflight = _count_inflight(conn)
-        _set_job_status(conn, thread_id, "queued", dry_run=dry_run, model=model)
-        reason = "capacity" if inflight >= MAX_JUDGE_INFLIGHT else None
-        return {
-            "thread_id": thread_id,
-            "status": "queued",
-            "queued_reason": reason,
-            "max_inflight": MAX_JUDGE_INFLIGHT,
-            "model": model,
-        }
+@app.get("/judge/status/{thread_id}")
+async def judge_status(thread_id: str):
+    return await DB_READ.run(_judge_status, thread_id)
 
 
-@app.get("/judge/status/{thread_id}")
-def judge_status(thread_id: str):
-    with get_conn_ctx() as conn:
-        ensure_tables(conn)
-        job = conn.execute(
-            "SELECT status, error, started_at, finished_at, updated_at FROM llm_jobs WHERE thread_id = ?",
-            (thread_id,),
-        ).fetchone()
-        if job:
-            return dict(job)
-        judgment = conn.execute(
-            "SELECT thread_id FROM llm_judgments WHERE thread_id = ?",
-            (thread_id,),
-        ).fetchone()
-        if judgment:
-            return {"status": "done"}
-        return {"status": "idle"}
+def _judge_status(conn: sqlite3.Connection, thread_id: str) -> dict:
+    job = conn.execute(
+        "SELECT status, error, started_at, finished_at, updated_at FROM llm_jobs WHERE thread_id = ?",
+        (thread_id,),
+    ).fetchone()
+    if job:
+        return dict(job)
+    judgment = conn.execute(
+        "SELECT thread_id FROM llm_judgments WHERE thread_id = ?",
+        (thread_id,),
+    ).fetchone()
+    if judgment:
+        return {"status": "done"}
+    return {"status": "idle"}
 
 
 @app.post("/judge/status/bulk")
-def judge_status_bulk(payload: BulkStatusIn):
+async def judge_status_bulk(payload: BulkStatusIn):
     thread_ids = payload.thread_ids
     if not thread_ids:
         return {"items": []}
     if len(thread_ids) > 200:
         raise HTTPException(status_code=413, detail="Too many thread_ids")
-    with get_conn_ctx() as conn:
-        ensure_tables(conn)
-        placeholders = ",".join(["?"] * len(thread_ids))
-        rows = conn.execute(
-            f"""
-            SELECT thread_id, status, error, started_at, finished_at, updated_at
-            FROM llm_jobs
-            WHERE thread_id IN ({placeholders})
-            """,
-            thread_ids,
+    return await DB_READ.run(_judge_status_bulk, thread_ids)
+
+
+def _judge_status_bulk(conn: sqlite3.Connection, thread_ids: list[str]) -> dict:
+    placeholders = ",".join(["?"] * len(thread_ids))
+    rows = conn.execute(
+        f"""
+        SELECT thread_id, status, error, started_at, finished_at, updated_at
+        FROM llm_jobs
+        WHERE thread_id IN ({placeholders})
+        """,
+        thread_ids,
+    ).fetchall()
+    job_map = {row["thread_id"]: dict(row) for row in rows}
+    missing = [tid for tid in thread_ids if tid not in job_map]
+    done_set: set[str] = set()
+    if missing:
+        placeholders = ",".join(["?"] * len(missing))
+        done_rows = conn.execute(
+            f"SELECT thread_id FROM llm_judgments WHERE thread_id IN ({placeholders})",
+            missing,
         ).fetchall()
-        job_map = {row["thread_id"]: dict(row) for row in rows}
-        missing = [tid for tid in thread_ids if tid not in job_map]
-        done_set: set[str] = set()
-        if missing:
-            placeholders = ",".join(["?"] * len(missing))
-            done_rows = conn.execute(
-                f"SELECT thread_id FROM llm_judgments WHERE thread_id IN ({placeholders})",
-                missing,
-            ).fetchall()
-            done_set = {row["thread_id"] for row in done_rows}
-        items = []
-        for tid in thread_ids:
-            if tid in job_map:
-                item = job_map[tid]
-                item["thread_id"] = tid
-                items.append(item)
-            elif tid in done_set:
-                items.append({"thread_id": tid, "status": "done"})
-            else:
-                items.append({"thread_id": tid, "status": "idle"})
-        return {"items": items}
+        done_set = {row["thread_id"] for row in done_rows}
+    items = []
+    for tid in thread_ids:
+        if tid in job_map:
+            item = job_map[tid]
+            item["thread_id"] = tid
+            items.append(item)
+        elif tid in done_set:
+            items.append({"thread_id": tid, "status": "done"})
+        else:
+            items.append({"thread_id": tid, "status": "idle"})
+    return {"items": items}
 
 
 @app.get("/judge/metrics/{thread_id}")
-def judge_metrics(thread_id: str):
-    with get_conn_ctx() as conn:
-        ensure_tables(conn)
-        row = conn.execute(
-            "SELECT timings_json FROM llm_job_metrics WHERE thread_id = ?",
-            (thread_id,),
-        ).fetchone()
-        if not row:
-            return {}
-        try:
-            return json.loads(row["timings_json"] or "{}")
-        except Exception:
-            return {}
+async def judge_metrics(thread_id: str):
+    return await DB_READ.run(_judge_metrics, thread_id)
+
+
+def _judge_metrics(conn: sqlite3.Connection, thread_id: str) -> dict:
+    row = conn.execute(
+        "SELECT timings_json FROM llm_job_metrics WHERE thread_id = ?",
+        (thread_id,),
+    ).fetchone()
+    if not row:
+        return {}
+    try:
+        return json.loads(row["timings_json"] or "{}")
+    except Exception:
+        return {}
 
 
 @app.get("/judge/active")
-def judge_active():
-    with get_conn_ctx() as conn:
-        ensure_tables(conn)
-        rows = conn.execute(
-            """
-            SELECT thread_id, status, error, started_at, updated_at
-            FROM llm_jobs
-            WHERE status IN ('queued', 'running')
-            ORDER BY updated_at DESC
-            """
-        ).fetchall()
-        return {"items": [dict(r) for r in rows]}
+async def judge_active():
+    return await DB_READ.run(_judge_active)
+
+
+def _judge_active(conn: sqlite3.Connection) -> dict:
+    rows = conn.execute(
+        """
+        SELECT thread_id, status, error, started_at, updated_at
+        FROM llm_jobs
+        WHERE status IN ('queued', 'starting', 'running')
+        ORDER BY updated_at DESC
+        """
+    ).fetchall()
+    return {"items": [dict(r) for r in rows]}
+
+
+def _job_events_cursor(conn: sqlite3.Connection, cursor: int | None) -> tuple[int, bool]:
+    """Resolve where a new /judge/events stream starts.
+
+    Returns (seq, reset); ``reset`` is true when the client's cursor predates
+    the retained journal or is too far behind to replay, so it must re-read
+    job state instead.
+    """
+    bounds = conn.execute(
+        "SELECT COALESCE(MIN(seq), 0) AS lo, COALESCE(MAX(seq), 0) AS hi FROM llm_job_events"
+    ).fetchone()
+    if cursor is None:
+        return bounds["hi"], False
+    if cursor > bounds["hi"] or cursor < bounds["lo"] - 1 or bounds["hi"] - cursor > JOB_EVENTS_BACKFILL:
+        return bounds["hi"], True
+    return cursor, False
+
+
+def _job_events_after(conn: sqlite3.Connection, seq: int) -> list[dict]:
+    rows = conn.execute(
+        """
+        SELECT seq, thread_id, status, model, error, created_at
+        FROM llm_job_events
+        WHERE seq > ?
+        ORDER BY seq
+        """,
+        (seq,),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def _sse_message(event: str, data: dict, event_id: int | None = None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+@app.get("/judge/events")
+async def judge_events(
+    request: Request,
+    since: int | None = None,
+    last_event_id: str | None = Header(default=None),
+):
+    """Stream job transitions as Server-Sent Events.
+
+    Each ``job`` event carries its journal seq as the SSE id, so browsers
+    resume via Last-Event-ID; other clients can pass ``since``. Without a
+    cursor the stream starts at the current end of the journal. A ``reset``
+    event means events were missed and job state should be re-fetched.
+    """
+    cursor = since
+    if last_event_id and last_event_id.isdigit():
+        cursor = int(last_event_id)
+    start, reset = await DB_READ.run(_job_events_cursor, cursor)
+    events = JOB_EVENTS.subscribe(start)
+
+    async def stream():
+        last_seq = start
+        try:
+            yield "retry: 2000\n\n"
+            if reset:
+                yield _sse_message("reset", {"seq": start}, start)
+            # Replay after subscribing so nothing published meanwhile is lost;
+            # duplicates are skipped by seq below.
+            pending = await DB_READ.run(_job_events_after, start)
+            while True:
+                for item in pending:
+                    if item["seq"] <= last_seq:
+                        continue
+                    last_seq = item["seq"]
+                    yield _sse_message("job", item, last_seq)
+                try:
+                    pending = await asyncio.wait_for(events.get(), timeout=SSE_HEARTBEAT_S)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    pending = []
+                    yield ": ping\n\n"
+        finally:
+            JOB_EVENTS.unsubscribe(events)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @app.get("/judge/state")
-def judge_state(model: str | None = None):
-    with get_conn_ctx() as conn:
-        ensure_tables(conn)
-        if model:
-            rows = conn.execute(
-                "SELECT key, value FROM llm_state WHERE key IN (?, ?, ?)",
-                (
-                    f"quota_exhausted_at:{model}",
-                    f"quota_exhausted_message:{model}",
-                    f"quota_reset_at:{model}",
-                ),
-            ).fetchall()
-        else:
-            rows = conn.execute("SELECT key, value FROM llm_state").fetchall()
-        return {"state": {row["key"]: row["value"] for row in rows} if rows else {}}
+async def judge_state(model: str | None = None):
+    return await DB_READ.run(_judge_state, model)
+
+
+def _judge_state(conn: sqlite3.Connection, model: str | None) -> dict:
+    if model:
+        rows = conn.execute(
+            "SELECT key, value FROM llm_state WHERE key IN (?, ?, ?)",
+            (
+                f"quota_exhausted_at:{model}",
+                f"quota_exhausted_message:{model}",
+                f"quota_reset_at:{model}",
+            ),
+        ).fetchall()
+    else:
+        rows = conn.execute("SELECT key, value FROM llm_state").fetchall()
+    return {"state": {row["key"]: row["value"] for row in rows} if rows else {}}
 
 
 @app.post("/judge/cancel/{thread_id}")
-def cancel_judge(thread_id: str):
-    with get_conn_ctx() as conn:
-        ensure_tables(conn)
-        job = conn.execute(
-            "SELECT status FROM llm_jobs WHERE thread_id = ?", (thread_id,)
-        ).fetchone()
-        if not job:
-            return {"status": "idle"}
-        if job["status"] in ("done", "error", "cancelled"):
-            return {"status": job["status"]}
-        _set_job_status(conn, thread_id, "cancelled", finished_at=datetime.utcnow().isoformat())
-        with RUNNING_JOBS_LOCK:
-            proc = RUNNING_JOBS.get(thread_id)
-        if proc:
-            proc.terminate()
-            try:
-                proc.wait(timeout=2)
-            except subprocess.TimeoutExpired:
-                proc.kill()
-        return {"status": "cancelled"}
+async def cancel_judge(thread_id: str):
+    status = await DB_WRITE.run(_cancel_job, thread_id)
+    if status != "cancelled":
+        return {"status": status}
+    # Stop it here if this process runs the job; a standalone worker sees the
+    # status on its next heartbeat. Waiting for the LLM process to exit must
+    # not hold up the writer thread.
+    await run_in_threadpool(judge_worker.terminate_running_job, thread_id)
+    judge_worker.wake()
+    return {"status": "cancelled"}
+
+
+def _cancel_job(conn: sqlite3.Connection, thread_id: str) -> str:
+    job = conn.execute(
+        "SELECT status FROM llm_jobs WHERE thread_id = ?", (thread_id,)
+    ).fetchone()
+    if not job:
+        return "idle"
+    if job["status"] in ("done", "error", "dead", "cancelled", "skipped"):
+        return job["status"]
+    judge_worker.set_job_status(conn, thread_id, "cancelled", finished_at=datetime.utcnow().isoformat())
+    return "cancelled"
 
 
 @app.get("/search")
-def search_threads(q: str, limit: int = 20):
-    with get_conn_ctx() as conn:
-        ensure_tables(conn)
-        q_like = f"%{q}%"
-        rows = conn.execute(
-            """
-            SELECT t.thread_id, t.title
-            FROM threads t
-            WHERE t.title LIKE ?
-            ORDER BY CAST(t.thread_id AS INTEGER) DESC
-            LIMIT ?
-            """,
-            (q_like, limit),
-        ).fetchall()
-        return [dict(r) for r in rows]
+async def search_threads(q: str, limit: int = 20):
+    return await DB_READ.run(_search_threads, q, limit)
+
+
+def _search_threads(conn: sqlite3.Connection, q: str, limit: int) -> list[dict]:
+    q_like = f"%{q}%"
+    rows = conn.execute(
+        """
+        SELECT t.thread_id, t.title
+        FROM threads t
+        WHERE t.title LIKE ?
+        ORDER BY CAST(t.thread_id AS INTEGER) DESC
+        LIMIT ?
+        """,
+        (q_like, limit),
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+@app.get("/metrics")
+async def get_metrics():
+    await DB_READ.run(_collect_job_gauges)
+    return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+def _collect_job_gauges(conn: sqlite3.Connection) -> None:
+    # Both counts are covered by idx_llm_jobs_claim.
+    by_status = {(status,): 0 for status in ("queued", "starting", "running")}
+    for row in conn.execute("SELECT status, COUNT(*) AS n FROM llm_jobs GROUP BY status"):
+        by_status[(row["status"],)] = row["n"]
+    JOBS_BY_STATUS.replace(by_status)
+    rows = conn.execute(
+        """
+        SELECT COALESCE(model, 'auto') AS model, COUNT(*) AS n
+        FROM llm_jobs
+        WHERE status IN ('running', 'starting')
+        GROUP BY model
+        """
+    ).fetchall()
+    JOBS_INFLIGHT.replace({(row["model"],): row["n"] for row in rows})
+
+
+@app.get("/debug/sql")
+async def debug_sql():
+    """Per-statement timings and the slow-query log (needs BB_SQL_PROFILE=1)."""
+    return sql_profile.PROFILER.snapshot()
 
 
-_dispatcher = Thread(target=_dispatch_loop, daemon=True)
-_dispatcher.start()
+@app.delete("/debug/sql")
+async def reset_debug_sql():
+    sql_profile.PROFILER.reset()
+    return {"ok": True}
@@ -21,6 +21,9 @@ import { CheckCircle2, Info, Loader2, Play, RotateCw, X, XCircle } from "lucide-
 import { toast } from "sonner";
 
 const API_BASE = `http://${window.location.hostname}:8000`;
+// Queue entries after the selected one whose details are fetched ahead of time.
+const PREFETCH_AHEAD = 5;
+const DETAIL_CACHE_SIZE = 200;
 const STATUS_OPTIONS = [
   "open",
   "resolved",
@@ -87,16 +90,24 @@ type ThreadDetail = {
     evidence?: string | null;
     duplicates?: string | null;
   } | null;
+  // Validator from GET /thread/{id} (ETag header) or /thread/bulk; sent back as If-None-Match.
+  etag?: string;
 };
 
 type SearchResult = { thread_id: string; title: string };
 
+type JobUpdate = { thread_id: string; status: string; error?: string | null };
+
 const readAutoRun = () => sessionStorage.getItem("autoRun") === "true";
 
 function App() {
   const [queue, setQueue] = useState<QueueItem[]>([]);
   const [queueTotal, setQueueTotal] = useState<number>(0);
-  const [queueOffset, setQueueOffset] = useState<number>(0);
+  const [queueFacets, setQueueFacets] = useState<{
+    status_guess?: Record<string, number>;
+    confidence?: Record<string, number>;
+  }>({});
+  const [queueCursor, setQueueCursor] = useState<number | null>(null);
   const [selectedId, setSelectedId] = useState<string | null>(() => localStorage.getItem("selectedId"));
   const [detail, setDetail] = useState<ThreadDetail | null>(null);
   const [status, setStatus] = useState<string>("open");
@@ -118,19 +129,20 @@ function App() {
   const [saveMsg, setSaveMsg] = useState<string>("" );
   const judgingControllers = useRef<Map<string, AbortController>>(new Map());
   const selectedIdRef = useRef<string | null>(null);
-  const bulkPollTimer = useRef<number | null>(null);
+  const detailCacheRef = useRef<Map<string, ThreadDetail>>(new Map());
+  const prefetchingRef = useRef<Set<string>>(new Set());
+  const formThreadRef = useRef<string | null>(null);
   const bulkPollInFlight = useRef<boolean>(false);
+  const jobEventsHandlerRef = useRef<(items: JobUpdate[]) => Promise<void>>(async () => {});
   const queueRefreshTimer = useRef<number | null>(null);
   const quotaFetchAtRef = useRef<number>(0);
   const [llmJobs, setLlmJobs] = useState<Record<string, { status: string; error?: string | null }>>({});
   const llmJobsRef = useRef<Record<string, { status: string; error?: string | null }>>({});
   const [llmMaxInflight, setLlmMaxInflight] = useState<number | null>(null);
-  const [llmCapacityHint, setLlmCapacityHint] = useState<boolean>(false);
   const [llmModel, setLlmModel] = useState<string>(() => localStorage.getItem("llmModel") || "auto");
   const [bulkInfo, setBulkInfo] = useState<{ label: string; total: number; queued: number; running: boolean } | null>(
     null,
   );
-  const bulkAbortRef = useRef<boolean>(false);
   const [autoRun, setAutoRun] = useState<boolean>(() => readAutoRun());
   const [autoRunNote, setAutoRunNote] = useState<string>("");
   const queueRef = useRef<QueueItem[]>([]);
@@ -154,12 +166,14 @@ function App() {
   ) => {
     const filters = snapshot ?? queueFiltersRef.current;
     const limit = 50;
-    const offset = reset ? 0 : queueOffset + limit;
     const params = new URLSearchParams({
       status: filters.queueScope,
       limit: String(limit),
-      offset: String(offset),
     });
+    if (!reset) {
+      if (queueCursor === null) return;
+      params.set("cursor", String(queueCursor));
+    }
     if (filters.queueHasLlm === "yes" && filters.queueStatusGuess !== "all") {
       params.set("status_guess", filters.queueStatusGuess);
     }
@@ -175,9 +189,10 @@ function App() {
       .then((data) => {
         const items = data.items ?? [];
         setQueueTotal(data.total ?? items.length);
+        setQueueFacets(data.facets ?? {});
         if (reset) {
           setQueue(items);
-          setQueueOffset(0);
+          setQueueCursor(data.next_cursor ?? null);
           if (items.length) {
             const stored = localStorage.getItem("selectedId");
             const nextId =
@@ -190,7 +205,7 @@ function App() {
           }
         } else {
           setQueue((prev) => [...prev, ...items]);
-          setQueueOffset(offset);
+          setQueueCursor(data.next_cursor ?? null);
         }
       });
   };
@@ -232,25 +247,59 @@ function App() {
     loadQueue(true);
   }, [queueScope, queueHasLlm, queueStatusGuess, queueConfidence, debouncedQueueQuery]);
 
+  const cacheDetail = (data: ThreadDetail) => {
+    const cache = detailCacheRef.current;
+    cache.delete(data.thread.thread_id);
+    cache.set(data.thread.thread_id, data);
+    while (cache.size > DETAIL_CACHE_SIZE) {
+      cache.delete(cache.keys().next().value as string);
+    }
+  };
+
+  // GET /thread/{id}; null on a 304 for `etag` (the cached copy is current) or an error.
+  const fetchDetail = async (id: string, etag?: string): Promise<ThreadDetail | null> => {
+    const r = await fetch(`${API_BASE}/thread/${id}`, etag ? { headers: { "If-None-Match": etag } } : undefined);
+    if (!r.ok) return null;
+    const data = await r.json();
+    return data?.thread ? { ...data, etag: r.headers.get("ETag") ?? undefined } : null;
+  };
+
+  const showDetail = (data: ThreadDetail) => {
+    setDetail(data);
+    // The form is reset per thread, not per payload: newer data for the
+    // thread on screen must not wipe an edit in progress.
+    if (formThreadRef.current === data.thread.thread_id) return;
+    formThreadRef.current = data.thread.thread_id;
+    const d = data.decision;
+    if (d?.status) {
+      setStatus(d.status);
+    } else if (data.judgment?.status_guess) {
+      setStatus(data.judgment.status_guess);
+    } else {
+      setStatus("open");
+    }
+    setDuplicateOf(d?.duplicate_of ?? "");
+    setNotes(d?.notes ?? "");
+  };
+
   useEffect(() => {
     if (!selectedId) return;
     selectedIdRef.current = selectedId;
-    setLoading(true);
-    fetch(`${API_BASE}/thread/${selectedId}`)
-      .then((r) => r.json())
-      .then((data: ThreadDetail) => {
-        setDetail(data);
-        const d = data.decision;
-        if (d?.status) {
-          setStatus(d.status);
-        } else if (data.judgment?.status_guess) {
-          setStatus(data.judgment.status_guess);
-        } else {
-          setStatus("open");
-        }
-        setDuplicateOf(d?.duplicate_of ?? "");
-        setNotes(d?.notes ?? "");
+    // A prefetched detail is shown at once and revalidated in the background
+    // with its ETag: a 304 when nothing changed, a full body only if it did.
+    const cached = detailCacheRef.current.get(selectedId);
+    if (cached) {
+      showDetail(cached);
+    } else {
+      setLoading(true);
+    }
+    fetchDetail(selectedId, cached?.etag)
+      .then((data) => {
+        if (!data) return;
+        cacheDetail(data);
+        if (selectedIdRef.current === selectedId) showDetail(data);
       })
+      .catch(() => {})
       .finally(() => setLoading(false));
   }, [selectedId]);
 
@@ -317,6 +366,28 @@ function App() {
   const queueIndex = useMemo(() => {
     return queue.findIndex((q) => q.thread_id === selectedId);
   }, [queue, selectedId]);
+
+  useEffect(() => {
+    if (queueIndex < 0) return;
+    const ids = queue
+      .slice(queueIndex + 1, queueIndex + 1 + PREFETCH_AHEAD)
+      .map((item) => item.thread_id)
+      .filter((id) => !detailCacheRef.current.has(id) && !prefetchingRef.current.has(id));
+    if (!ids.length) return;
+    ids.forEach((id) => prefetchingRef.current.add(id));
+    fetch(`${API_BASE}/thread/bulk`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ thread_ids: ids }),
+    })
+      .then((r) => (r.ok ? r.json() : { items: [] }))
+      .then((data: { items: ThreadDetail[] }) => {
+        data.items.forEach(cacheDetail);
+      })
+      .catch(() => {})
+      .finally(() => ids.forEach((id) => prefetchingRef.current.delete(id)));
+  }, [queue, queueIndex]);
+
   const modelLabel = useMemo(() => {
     return MODEL_OPTIONS.find((model) => model.value === llmModel)?.label ?? llmModel;
   }, [llmModel]);
@@ -411,6 +482,7 @@ function App() {
       }),
     });
     if (res.ok) {
+      detailCacheRef.current.delete(selectedId);
       setDetail((prev) =>
         prev
           ? {
@@ -454,6 +526,43 @@ function App() {
     }, 600);
   };
 
+  const applyJobUpdates = async (items: JobUpdate[]) => {
+    let shouldRefreshSelected = false;
+    let anyDone = false;
+    setLlmJobs((prev) => {
+      const next = { ...prev };
+      for (const item of items) {
+        if (!item.thread_id) continue;
+        // The event stream carries every client's jobs; only pick up new ones while active.
+        if (!(item.thread_id in next) && !["queued", "running", "starting"].includes(item.status)) continue;
+        next[item.thread_id] = { status: item.status, error: item.error ?? null };
+        if (item.status === "done") {
+          anyDone = true;
+          detailCacheRef.current.delete(item.thread_id);
+          if (item.thread_id === selectedIdRef.current) {
+            shouldRefreshSelected = true;
+          }
+        }
+      }
+      return next;
+    });
+    if (anyDone) {
+      scheduleQueueRefresh();
+      fetchQuotaState();
+    }
+    if (shouldRefreshSelected && selectedIdRef.current) {
+      const refreshed = await fetchDetail(selectedIdRef.current);
+      if (refreshed) {
+        cacheDetail(refreshed);
+        setDetail(refreshed);
+        if (refreshed.judgment?.status_guess) {
+          setStatus(refreshed.judgment.status_guess);
+        }
+      }
+    }
+  };
+  jobEventsHandlerRef.current = applyJobUpdates;
+
   const pollAllStatus = async () => {
     if (bulkPollInFlight.current) return;
     const activeIds = Object.entries(llmJobsRef.current)
@@ -469,34 +578,7 @@ function App() {
       });
       if (!res.ok) return;
       const payload = await res.json().catch(() => ({}));
-      const items: Array<{ thread_id: string; status: string; error?: string | null }> = payload.items ?? [];
-      let shouldRefreshSelected = false;
-      let anyDone = false;
-      setLlmJobs((prev) => {
-        const next = { ...prev };
-        for (const item of items) {
-          if (!item.thread_id) continue;
-          next[item.thread_id] = { status: item.status, error: item.error ?? null };
-          if (item.status === "done") {
-            anyDone = true;
-            if (item.thread_id === selectedIdRef.current) {
-              shouldRefreshSelected = true;
-            }
-          }
-        }
-        return next;
-      });
-      if (anyDone) {
-        scheduleQueueRefresh();
-        fetchQuotaState();
-      }
-      if (shouldRefreshSelected && selectedIdRef.current) {
-        const refreshed = await fetch(`${API_BASE}/thread/${selectedIdRef.current}`).then((r) => r.json());
-        setDetail(refreshed);
-        if (refreshed?.judgment?.status_guess) {
-          setStatus(refreshed.judgment.status_guess);
-        }
-      }
+      await jobEventsHandlerRef.current(payload.items ?? []);
     } finally {
       bulkPollInFlight.current = false;
     }
@@ -526,10 +608,10 @@ function App() {
       if (payload?.max_inflight && typeof payload.max_inflight === "number") {
         setLlmMaxInflight(payload.max_inflight);
       }
-      if (payload?.queued_reason === "capacity") {
-        setLlmCapacityHint(true);
-      }
-      setLlmJobs((prev) => ({ ...prev, [id]: { status: nextStatus } }));
+      // A pushed job event may already have moved this job past "queued".
+      setLlmJobs((prev) =>
+        prev[id]?.status && prev[id].status !== "queued" ? prev : { ...prev, [id]: { status: nextStatus } },
+      );
     } catch (err: unknown) {
       if (err instanceof DOMException && err.name === "AbortError") {
         setLlmJobs((prev) => ({ ...prev, [id]: { status: "cancelled" } }));
@@ -540,26 +622,51 @@ function App() {
   };
 
   const runJudgeBatch = async (ids: string[], label: string) => {
-    if (!ids.length) return;
-    bulkAbortRef.current = false;
-    setBulkInfo({ label, total: ids.length, queued: 0, running: true });
-    let queued = 0;
-    for (const id of ids) {
-      if (bulkAbortRef.current) break;
-      await runJudge(id, llmModel);
-      queued += 1;
-      setBulkInfo((prev) => (prev ? { ...prev, queued, running: true } : prev));
+    const targets = ids.filter((id) => !["queued", "running", "starting"].includes(llmJobsRef.current[id]?.status || ""));
+    if (!targets.length) return;
+    setBulkInfo({ label, total: targets.length, queued: 0, running: true });
+    setLlmJobs((prev) => {
+      const next = { ...prev };
+      for (const id of targets) next[id] = { status: "queued" };
+      return next;
+    });
+    try {
+      const res = await fetch(`${API_BASE}/judge/bulk`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ thread_ids: targets, model: llmModel }),
+      });
+      const payload = await res.json().catch(() => null);
+      if (!res.ok) {
+        const msg = payload?.detail || `LLM failed (${res.status})`;
+        setLlmJobs((prev) => {
+          const next = { ...prev };
+          for (const id of targets) next[id] = { status: "error", error: msg };
+          return next;
+        });
+        return;
+      }
+      if (payload?.max_inflight && typeof payload.max_inflight === "number") {
+        setLlmMaxInflight(payload.max_inflight);
+      }
+      // Threads the server did not queue (no posts, or already active elsewhere)
+      // would otherwise sit in "queued"; read their real status once.
+      if ((payload?.queued ?? 0) < targets.length) {
+        void pollAllStatus();
+      }
+      setBulkInfo((prev) => (prev ? { ...prev, queued: payload?.queued ?? 0 } : prev));
+    } catch {
+      setLlmJobs((prev) => {
+        const next = { ...prev };
+        for (const id of targets) next[id] = { status: "error", error: "Request failed" };
+        return next;
+      });
+    } finally {
+      setBulkInfo((prev) => (prev ? { ...prev, running: false } : prev));
     }
-    setBulkInfo((prev) => (prev ? { ...prev, queued, running: false } : prev));
-  };
-
-  const cancelBatch = () => {
-    bulkAbortRef.current = true;
-    setBulkInfo((prev) => (prev ? { ...prev, running: false } : prev));
   };
 
   const cancelAllRuns = () => {
-    bulkAbortRef.current = true;
     setAutoRun(false);
     const targets = Object.entries(llmJobsRef.current)
       .filter(([, job]) => ["queued", "running", "starting"].includes(job.status))
@@ -630,7 +737,7 @@ function App() {
     setLlmJobs((prev) => {
       const next: Record<string, { status: string; error?: string | null }> = {};
       for (const [id, job] of Object.entries(prev)) {
-        if (["done", "error", "cancelled", "idle", "skipped"].includes(job.status)) continue;
+        if (["done", "error", "dead", "cancelled", "idle", "skipped"].includes(job.status)) continue;
         next[id] = job;
       }
       return next;
@@ -638,30 +745,19 @@ function App() {
   };
 
   useEffect(() => {
-    const active = (jobCounts.queued || 0) + (jobCounts.running || 0) + (jobCounts.starting || 0);
-    if (active === 0 && llmCapacityHint) {
-      setLlmCapacityHint(false);
-    }
-  }, [jobCounts.queued, jobCounts.running, jobCounts.starting, llmCapacityHint]);
-
-  useEffect(() => {
-    const active = (jobCounts.queued || 0) + (jobCounts.running || 0) + (jobCounts.starting || 0);
-    if (bulkPollTimer.current) {
-      window.clearInterval(bulkPollTimer.current);
-      bulkPollTimer.current = null;
-    }
-    if (active === 0) return;
-    const nextInterval = active > 20 ? 4000 : active > 10 ? 3000 : 2000;
-    bulkPollTimer.current = window.setInterval(() => {
+    // Job transitions are pushed by the server; the browser resumes from
+    // Last-Event-ID after a reconnect. A bulk status read is only needed to
+    // resync when the server says events were missed.
+    const source = new EventSource(`${API_BASE}/judge/events`);
+    source.addEventListener("job", (event) => {
+      const item = JSON.parse((event as MessageEvent).data) as JobUpdate;
+      void jobEventsHandlerRef.current([item]);
+    });
+    source.addEventListener("reset", () => {
       void pollAllStatus();
-    }, nextInterval);
-    return () => {
-      if (bulkPollTimer.current) {
-        window.clearInterval(bulkPollTimer.current);
-        bulkPollTimer.current = null;
-      }
-    };
-  }, [jobCounts.queued, jobCounts.running, jobCounts.starting]);
+    });
+    return () => source.close();
+  }, []);
 
   useEffect(() => {
     if (!autoRun) return;
@@ -749,12 +845,6 @@ function App() {
                       </DropdownMenuRadioItem>
                     ))}
                   </DropdownMenuRadioGroup>
-                  {bulkInfo?.running && (
-                    <>
-                      <DropdownMenuSeparator />
-                      <DropdownMenuItem onClick={cancelBatch}>Stop scheduling</DropdownMenuItem>
-                    </>
-                  )}
                 </DropdownMenuContent>
               </DropdownMenu>
             </div>
@@ -825,7 +915,7 @@ function App() {
                         <SelectItem value="all">All</SelectItem>
                         {STATUS_OPTIONS.map((s) => (
                           <SelectItem key={s} value={s}>
-                            {s}
+                            {s} ({queueFacets.status_guess?.[s] ?? 0})
                           </SelectItem>
                         ))}
                       </SelectContent>
@@ -838,7 +928,7 @@ function App() {
                         <SelectItem value="all">All</SelectItem>
                         {CONFIDENCE_OPTIONS.map((c) => (
                           <SelectItem key={c} value={c}>
-                            {c}
+                            {c} ({queueFacets.confidence?.[c] ?? 0})
                           </SelectItem>
                         ))}
                       </SelectContent>
@@ -917,7 +1007,7 @@ function App() {
                 </div>
               </button>
             ))}
-            {queue.length < queueTotal && (
+            {queueCursor !== null && (
               <Button variant="secondary" className="w-full" onClick={() => loadQueue(false)}>
                 Load more
               </Button>
@@ -1214,11 +1304,6 @@ function App() {
             {jobCounts.done || 0} done · {jobCounts.error || 0} failed · {jobCounts.cancelled || 0} cancelled ·{" "}
             {jobCounts.skipped || 0} skipped
           </div>
-          {llmCapacityHint && (
-            <div className="mt-1 text-[11px] text-muted-foreground">
-              Queued due to concurrency cap{llmMaxInflight ? ` (max ${llmMaxInflight} in-flight)` : ""}.
-            </div>
-          )}
           <div className="mt-2 max-h-48 space-y-1 overflow-auto text-xs">
             {jobEntries.map(([threadId, job]) => (
               <button
@@ -1226,7 +1311,7 @@ function App() {
                 type="button"
                 onClick={() => setSelectedId(threadId)}
                 className="flex w-full items-center justify-between rounded border border-border/60 px-2 py-1 text-left transition hover:border-muted-foreground"
-                title={job.status === "error" && job.error ? job.error : undefined}
+                title={job.error ? job.error : undefined}
               >
                 <span>#{threadId}</span>
                 <span
@@ -1239,7 +1324,7 @@ function App() {
                       ? "text-amber-500"
                       : job.status === "done"
                       ? "text-emerald-500"
-                      : job.status === "error"
+                      : job.status === "error" || job.status === "dead"
                       ? "text-red-500"
                       : job.status === "skipped"
                       ? "text-muted-foreground"
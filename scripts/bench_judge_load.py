@@ -1,13 +1,18 @@
 #!/usr/bin/env python
 import argparse
+import asyncio
 import json
+import os
+import random
 import statistics
 import subprocess
 import sys
+import threading
 import time
 from datetime import datetime
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlencode, urlparse
 
 import requests
 
@@ -58,6 +63,7 @@ class RunResult:
     jobs: List[JobMetrics]
     wall_time_s: float
     proc_samples: List[ProcSample] = field(default_factory=list)
+    status_requests: int = 0
 
 
 def request_json(
@@ -67,11 +73,12 @@ def request_json(
     timeout_s: float,
     retries: int,
     params: Optional[Dict[str, str]] = None,
+    body: Optional[Dict[str, object]] = None,
 ) -> Dict[str, object]:
     attempt = 0
     while True:
         try:
-            resp = requests.request(method, url, params=params, timeout=timeout_s)
+            resp = requests.request(method, url, params=params, json=body, timeout=timeout_s)
             resp.raise_for_status()
             data = resp.json()
             if isinstance(data, dict):
@@ -102,9 +109,9 @@ def post_judge(
     dry_run: bool,
     timeout_s: float,
     retries: int,
-) -> None:
+) -> Dict[str, object]:
     params = {"dry_run": "1"} if dry_run else None
-    request_json(
+    return request_json(
         "POST",
         f"{base_url}/judge/{thread_id}",
         params=params,
@@ -113,6 +120,23 @@ def post_judge(
     )
 
 
+def post_judge_bulk(
+    base_url: str,
+    thread_ids: List[str],
+    *,
+    dry_run: bool,
+    timeout_s: float,
+    retries: int,
+) -> Dict[str, object]:
+    return request_json(
+        "POST",
+        f"{base_url}/judge/bulk",
+        body={"thread_ids": thread_ids, "dry_run": dry_run},
+        timeout_s=timeout_s,
+        retries=retries,
+    )
+
+
 def get_status(
     base_url: str,
     thread_id: str,
@@ -129,6 +153,34 @@ def get_status(
     return data  # type: ignore[return-value]
 
 
+def open_event_stream(base_url: str, *, timeout_s: float) -> requests.Response:
+    # The server subscribes before it sends the response headers, so once this
+    # returns no job transition can be missed.
+    resp = requests.get(f"{base_url}/judge/events", stream=True, timeout=(timeout_s, timeout_s))
+    resp.raise_for_status()
+    return resp
+
+
+def iter_sse(resp: requests.Response) -> Iterator[Tuple[str, Dict[str, object]]]:
+    event, data = "message", []
+    for line in resp.iter_lines(decode_unicode=True):
+        if line is None:
+            continue
+        if not line:
+            if data:
+                yield event, json.loads("\n".join(data))
+            event, data = "message", []
+            continue
+        if line.startswith(":"):
+            continue
+        name, _, value = line.partition(":")
+        value = value[1:] if value.startswith(" ") else value
+        if name == "event":
+            event = value
+        elif name == "data":
+            data.append(value)
+
+
 def get_metrics(
     base_url: str,
     thread_id: str,
@@ -197,6 +249,21 @@ def count_procs(pattern: str) -> int:
         return 0
 
 
+def observe_status(job: JobMetrics, status: str, base_url: str, *, timeout_s: float, retries: int) -> bool:
+    """Record a status for ``job``; return True once it is finished."""
+    job.status = status
+    if status == "running" and job.first_running_ts is None:
+        job.first_running_ts = time.time()
+    if status not in ("done", "error", "dead", "cancelled", "skipped"):
+        return False
+    job.done_ts = time.time()
+    try:
+        job.timings = get_metrics(base_url, job.thread_id, timeout_s=timeout_s, retries=retries)
+    except Exception:
+        job.timings = {}
+    return True
+
+
 def run_level(
     base_url: str,
     thread_ids: List[str],
@@ -207,22 +274,36 @@ def run_level(
     timeout_s: float,
     retries: int,
     max_poll_errors: int,
+    status_mode: str = "events",
+    enqueue: str = "bulk",
 ) -> RunResult:
     jobs = [JobMetrics(thread_id=t, start_ts=time.time()) for t in thread_ids]
-    for job in jobs:
-        post_judge(base_url, job.thread_id, dry_run=dry_run, timeout_s=timeout_s, retries=retries)
+    stream = open_event_stream(base_url, timeout_s=timeout_s) if status_mode == "events" else None
+    status_requests = 1 if stream is not None else 0
+    remaining = {job.thread_id: job for job in jobs}
+    unqueued: List[str] = []
+    if enqueue == "bulk":
+        queued_ids = post_judge_bulk(
+            base_url, thread_ids, dry_run=dry_run, timeout_s=timeout_s, retries=retries
+        ).get("thread_ids", [])
+        queued_set = set(queued_ids)  # type: ignore[arg-type]
+        unqueued = [t for t in thread_ids if t not in queued_set]
+    else:
+        for job in jobs:
+            queued = post_judge(base_url, job.thread_id, dry_run=dry_run, timeout_s=timeout_s, retries=retries)
+            # Skipped and cached jobs finish in the response without a transition.
+            st = str(queued.get("status", "queued"))
+            if observe_status(job, st, base_url, timeout_s=timeout_s, retries=retries):
+                remaining.pop(job.thread_id, None)
     start = time.time()
     last_metrics = 0.0
     samples: List[ProcSample] = []
-
-    remaining = {job.thread_id: job for job in jobs}
     poll_errors = 0
-    while remaining:
-        now = time.time()
-        if pid is not None and (now - last_metrics) >= metrics_interval:
-            samples.append(get_proc_sample(pid))
-            last_metrics = now
-        for thread_id in list(remaining.keys()):
+
+    def poll_remaining(only: Optional[List[str]] = None) -> None:
+        nonlocal poll_errors, status_requests
+        for thread_id in only if only is not None else list(remaining.keys()):
+            status_requests += 1
             try:
                 status = get_status(
                     base_url,
@@ -238,46 +319,497 @@ def run_level(
                         "Increase --request-timeout or check backend."
                     )
                 continue
-            st = status.get("status", "unknown")
-            job = remaining[thread_id]
-            job.status = st
-            if st == "running" and job.first_running_ts is None:
-                job.first_running_ts = time.time()
-            if st in ("done", "error", "cancelled"):
-                job.done_ts = time.time()
-                try:
-                    job.timings = get_metrics(
-                        base_url,
-                        thread_id,
-                        timeout_s=timeout_s,
-                        retries=retries,
-                    )
-                except Exception:
-                    job.timings = {}
+            st = str(status.get("status", "unknown"))
+            if observe_status(remaining[thread_id], st, base_url, timeout_s=timeout_s, retries=retries):
                 remaining.pop(thread_id, None)
+
+    if unqueued:
+        # Not queued by the bulk call (no posts, or already active): read
+        # their current state once instead of waiting for a transition.
+        poll_remaining(unqueued)
+    if stream is not None:
+        try:
+            events = iter_sse(stream) if remaining else iter(())
+            for event, data in events:
+                now = time.time()
+                if pid is not None and (now - last_metrics) >= metrics_interval:
+                    samples.append(get_proc_sample(pid))
+                    last_metrics = now
+                if event == "reset":
+                    poll_remaining()
+                elif event == "job":
+                    job = remaining.get(str(data.get("thread_id")))
+                    st = str(data.get("status", "unknown"))
+                    if job and observe_status(job, st, base_url, timeout_s=timeout_s, retries=retries):
+                        remaining.pop(job.thread_id, None)
+                if not remaining:
+                    break
+        finally:
+            stream.close()
+    while remaining:
+        now = time.time()
+        if pid is not None and (now - last_metrics) >= metrics_interval:
+            samples.append(get_proc_sample(pid))
+            last_metrics = now
+        poll_remaining()
         if remaining:
             time.sleep(poll_interval)
     wall = time.time() - start
     if pid is not None:
         samples.append(get_proc_sample(pid))
-    return RunResult(concurrency=len(thread_ids), jobs=jobs, wall_time_s=wall, proc_samples=samples)
+    return RunResult(
+        concurrency=len(thread_ids),
+        jobs=jobs,
+        wall_time_s=wall,
+        proc_samples=samples,
+        status_requests=status_requests,
+    )
+
+
+ENDPOINT_CASES = (
+    "GET /queue",
+    "GET /thread/{id}",
+    "GET /judge/status/{id}",
+    "POST /judge/status/bulk",
+    "GET /judge/active",
+    "GET /judge/metrics/{id}",
+)
+
+
+def bench_endpoints(
+    base_url: str,
+    thread_ids: List[str],
+    *,
+    samples: int,
+    timeout_s: float,
+    clients: int = 1,
+) -> List[Dict[str, float]]:
+    """Time each endpoint case; ``clients`` threads split the samples between them."""
+    bulk_ids = thread_ids[:50]
+    rows: List[Dict[str, float]] = []
+    for case in ENDPOINT_CASES:
+        latencies: List[float] = []
+        errors = 0
+        lock = threading.Lock()
+
+        def worker(first: int) -> None:
+            nonlocal errors
+            session = requests.Session()
+            for i in range(first, samples, clients):
+                latency = request_case(session, case, i)
+                with lock:
+                    if latency is None:
+                        errors += 1
+                    else:
+                        latencies.append(latency)
+
+        def request_case(session: requests.Session, case: str, i: int) -> Optional[float]:
+            tid = thread_ids[i % len(thread_ids)]
+            t0 = time.perf_counter()
+            try:
+                if case == "GET /queue":
+                    resp = session.get(f"{base_url}/queue", params={"limit": "50"}, timeout=timeout_s)
+                elif case == "GET /thread/{id}":
+                    resp = session.get(f"{base_url}/thread/{tid}", timeout=timeout_s)
+                elif case == "GET /judge/status/{id}":
+                    resp = session.get(f"{base_url}/judge/status/{tid}", timeout=timeout_s)
+                elif case == "POST /judge/status/bulk":
+                    resp = session.post(
+                        f"{base_url}/judge/status/bulk",
+                        json={"thread_ids": bulk_ids},
+                        timeout=timeout_s,
+                    )
+                elif case == "GET /judge/active":
+                    resp = session.get(f"{base_url}/judge/active", timeout=timeout_s)
+                else:
+                    resp = session.get(f"{base_url}/judge/metrics/{tid}", timeout=timeout_s)
+                resp.raise_for_status()
+            except Exception:
+                return None
+            return (time.perf_counter() - t0) * 1000.0
+
+        workers = [threading.Thread(target=worker, args=(n,)) for n in range(clients)]
+        started = time.perf_counter()
+        for t in workers:
+            t.start()
+        for t in workers:
+            t.join()
+        elapsed = time.perf_counter() - started
+        rows.append(
+            {
+                "endpoint": case,
+                "clients": clients,
+                "samples": len(latencies),
+                "errors": errors,
+                "rps": len(latencies) / elapsed if elapsed > 0 else 0.0,
+                "mean_ms": statistics.mean(latencies) if latencies else 0.0,
+                "p50_ms": pct(latencies, 50),
+                "p95_ms": pct(latencies, 95),
+                "p99_ms": pct(latencies, 99),
+            }
+        )
+    return rows
+
+
+def format_endpoint_table(
+    rows: List[Dict[str, float]], baseline: Optional[List[Dict[str, float]]] = None
+) -> List[str]:
+    base_map = {(row["endpoint"], row.get("clients", 1)): row for row in (baseline or [])}
+    lines = []
+    for row in rows:
+        clients = row.get("clients", 1)
+        line = (
+            f"{row['endpoint']:<26} c={clients:<3} rps={row.get('rps', 0.0):7.1f} "
+            f"p50={row['p50_ms']:.2f}ms "
+            f"p95={row['p95_ms']:.2f}ms p99={row['p99_ms']:.2f}ms errors={row['errors']}"
+        )
+        before = base_map.get((row["endpoint"], clients))
+        if before and before.get("p50_ms") and row["p50_ms"]:
+            speedup = before["p50_ms"] / row["p50_ms"]
+            line += (
+                f" | before p50={before['p50_ms']:.2f}ms p95={before['p95_ms']:.2f}ms "
+                f"({speedup:.1f}x)"
+            )
+        lines.append(line)
+    return lines
+
+
+OPEN_LOOP_OPS = ("queue", "thread", "enqueue", "status")
+
+
+@dataclass
+class OpenLoopSample:
+    op: str
+    # Measured from the scheduled arrival, so time spent waiting for a free
+    # connection counts too (no coordinated omission).
+    latency_ms: float
+    status: int = 0  # 0: connection error or timeout
+
+    @property
+    def ok(self) -> bool:
+        return 200 <= self.status < 400
+
+
+class AsyncHttpPool:
+    """Minimal keep-alive HTTP/1.1 client on asyncio streams.
+
+    Open-loop runs need thousands of requests per second from one process;
+    blocking requests calls would make the load generator the bottleneck.
+    """
+
+    def __init__(self, base_url: str, *, connections: int, timeout_s: float) -> None:
+        parsed = urlparse(base_url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        self.ssl = parsed.scheme == "https"
+        self.prefix = parsed.path.rstrip("/")
+        self.timeout_s = timeout_s
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(connections)
+
+    async def request(self, method: str, path: str, body: Optional[Dict[str, object]] = None) -> int:
+        payload = b"" if body is None else json.dumps(body).encode("utf-8")
+        async with self._slots:
+            # A reused connection may have been closed by the server's
+            # keep-alive timeout; retry those once on a fresh one.
+            for reuse in (bool(self._idle), False):
+                conn = self._idle.pop() if reuse else None
+                try:
+                    if conn is None:
+                        conn = await asyncio.wait_for(
+                            asyncio.open_connection(self.host, self.port, ssl=self.ssl or None),
+                            self.timeout_s,
+                        )
+                    status, keep_alive = await asyncio.wait_for(
+                        self._roundtrip(conn, method, path, payload, body is not None), self.timeout_s
+                    )
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    if conn is not None:
+                        conn[1].close()
+                    if reuse:
+                        continue
+                    raise
+                except BaseException:
+                    if conn is not None:
+                        conn[1].close()
+                    raise
+                if keep_alive:
+                    self._idle.append(conn)
+                else:
+                    conn[1].close()
+                return status
+        raise ConnectionError("connection closed")
+
+    async def _roundtrip(
+        self,
+        conn: Tuple[asyncio.StreamReader, asyncio.StreamWriter],
+        method: str,
+        path: str,
+        payload: bytes,
+        is_json: bool,
+    ) -> Tuple[int, bool]:
+        reader, writer = conn
+        head = f"{method} {self.prefix}{path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(payload)}\r\n"
+        if is_json:
+            head += "Content-Type: application/json\r\n"
+        writer.write(head.encode("latin-1") + b"\r\n" + payload)
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("connection closed")
+        status = int(status_line.split()[1])
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if status in (204, 304) or status < 200:
+            pass
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif "content-length" in headers:
+            await reader.readexactly(int(headers["content-length"]))
+        else:
+            await reader.read()
+            return status, False
+        return status, headers.get("connection", "").lower() != "close"
+
+    def close(self) -> None:
+        for _, writer in self._idle:
+            writer.close()
+        self._idle.clear()
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """``queue=4,thread=4,status=1.5,enqueue=0.5`` -> relative weights per op."""
+    weights: Dict[str, float] = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if not name:
+            continue
+        if name not in OPEN_LOOP_OPS:
+            raise ValueError(f"Unknown op {name!r} in --mix; expected {', '.join(OPEN_LOOP_OPS)}")
+        weights[name] = float(weight) if weight.strip() else 1.0
+    if not weights or sum(weights.values()) <= 0:
+        raise ValueError("--mix needs at least one op with a positive weight")
+    return weights
+
+
+def arrival_offsets(rate: float, duration_s: float, arrival: str, rng: random.Random) -> Iterator[float]:
+    """Seconds from the start of a run at which requests are due."""
+    t = 0.0
+    while True:
+        t += rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+        if t >= duration_s:
+            return
+        yield t
+
+
+def open_loop_request(
+    op: str, thread_id: str, *, dry_run: bool
+) -> Tuple[str, str, Optional[Dict[str, object]]]:
+    if op == "queue":
+        return "GET", "/queue?" + urlencode({"status": "unreviewed", "limit": "50"}), None
+    if op == "thread":
+        return "GET", f"/thread/{thread_id}", None
+    if op == "enqueue":
+        query = "?dry_run=1" if dry_run else ""
+        return "POST", f"/judge/{thread_id}{query}", None
+    return "GET", f"/judge/status/{thread_id}", None
+
+
+def process_cpu_seconds(pid: Optional[int]) -> Optional[float]:
+    """User+system CPU time of ``pid`` from /proc (Linux only)."""
+    if pid is None:
+        return None
+    try:
+        with open(f"/proc/{pid}/stat", encoding="utf-8") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    # utime and stime are fields 14 and 15; fields[0] here is field 3.
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def run_open_loop_level(
+    pool: AsyncHttpPool,
+    thread_ids: List[str],
+    *,
+    rate: float,
+    duration_s: float,
+    arrival: str,
+    mix: Dict[str, float],
+    max_inflight: int,
+    dry_run: bool,
+    rng: random.Random,
+) -> Tuple[List[OpenLoopSample], int, float]:
+    """Offer ``rate`` req/s for ``duration_s`` regardless of how fast the server answers.
+
+    Returns the samples, the number of dropped arrivals (``max_inflight``
+    requests already outstanding, or still unanswered after the drain) and
+    the elapsed time including the drain.
+    """
+    loop = asyncio.get_running_loop()
+    ops = list(mix)
+    weights = [mix[op] for op in ops]
+    samples: List[OpenLoopSample] = []
+    inflight: set = set()
+    dropped = 0
+
+    async def fire(op: str, due: float) -> None:
+        method, path, body = open_loop_request(op, rng.choice(thread_ids), dry_run=dry_run)
+        try:
+            status = await pool.request(method, path, body)
+        except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            status = 0
+        samples.append(OpenLoopSample(op, (loop.time() - due) * 1000.0, status))
+
+    start = loop.time()
+    for offset in arrival_offsets(rate, duration_s, arrival, rng):
+        delay = start + offset - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(inflight) >= max_inflight:
+            dropped += 1
+            continue
+        task = asyncio.create_task(fire(rng.choices(ops, weights)[0], start + offset))
+        inflight.add(task)
+        task.add_done_callback(inflight.discard)
+    if inflight:
+        _, pending = await asyncio.wait(set(inflight), timeout=pool.timeout_s)
+        for task in pending:
+            task.cancel()
+        dropped += len(pending)
+    return samples, dropped, loop.time() - start
+
+
+def summarize_open_loop(
+    rate: float,
+    duration_s: float,
+    elapsed_s: float,
+    samples: List[OpenLoopSample],
+    dropped: int,
+    *,
+    ops: List[str],
+    slo_ms: float,
+    cpu_s: Optional[float],
+) -> Dict[str, float]:
+    ok = [s.latency_ms for s in samples if s.ok]
+    attempts = len(samples) + dropped
+    within = sum(1 for s in samples if s.ok and s.latency_ms <= slo_ms)
+    row: Dict[str, float] = {
+        "offered_rps": rate,
+        "duration_s": duration_s,
+        "requests": attempts,
+        "ok": len(ok),
+        "errors": len(samples) - len(ok),
+        "dropped": dropped,
+        "achieved_rps": len(ok) / duration_s,
+        "p50_ms": pct(ok, 50),
+        "p90_ms": pct(ok, 90),
+        "p99_ms": pct(ok, 99),
+        "p999_ms": pct(ok, 99.9),
+        "max_ms": max(ok) if ok else 0.0,
+        "slo_ms": slo_ms,
+        # Errors and drops count as misses.
+        "slo_pct": 100.0 * within / attempts if attempts else 0.0,
+        "server_cpu_pct": 100.0 * cpu_s / elapsed_s if cpu_s is not None and elapsed_s > 0 else 0.0,
+    }
+    for op in ops:
+        op_ok = [s.latency_ms for s in samples if s.op == op and s.ok]
+        row[f"{op}_requests"] = sum(1 for s in samples if s.op == op)
+        row[f"{op}_p50_ms"] = pct(op_ok, 50)
+        row[f"{op}_p99_ms"] = pct(op_ok, 99)
+    return row
+
+
+async def run_open_loop(
+    base_url: str,
+    thread_ids: List[str],
+    rates: List[float],
+    *,
+    duration_s: float,
+    arrival: str,
+    mix: Dict[str, float],
+    slo_ms: float,
+    connections: int,
+    max_inflight: int,
+    timeout_s: float,
+    dry_run: bool,
+    pid: Optional[int],
+    seed: Optional[int],
+    log,
+) -> List[Dict[str, float]]:
+    rng = random.Random(seed)
+    pool = AsyncHttpPool(base_url, connections=connections, timeout_s=timeout_s)
+    rows: List[Dict[str, float]] = []
+    try:
+        for rate in rates:
+            log(f"[{datetime.now().strftime('%H:%M:%S')}] Offering {rate:g} req/s ({arrival}) for {duration_s:g}s...")
+            cpu_before = process_cpu_seconds(pid)
+            samples, dropped, elapsed = await run_open_loop_level(
+                pool,
+                thread_ids,
+                rate=rate,
+                duration_s=duration_s,
+                arrival=arrival,
+                mix=mix,
+                max_inflight=max_inflight,
+                dry_run=dry_run,
+                rng=rng,
+            )
+            cpu_after = process_cpu_seconds(pid)
+            cpu_s = cpu_after - cpu_before if cpu_before is not None and cpu_after is not None else None
+            row = summarize_open_loop(
+                rate, duration_s, elapsed, samples, dropped, ops=list(mix), slo_ms=slo_ms, cpu_s=cpu_s
+            )
+            rows.append(row)
+            log(format_open_loop_row(row))
+    finally:
+        pool.close()
+    return rows
+
+
+def format_open_loop_row(row: Dict[str, float]) -> str:
+    return (
+        f"offered={row['offered_rps']:>7.1f}/s achieved={row['achieved_rps']:>7.1f}/s "
+        f"p50={row['p50_ms']:.1f}ms p90={row['p90_ms']:.1f}ms p99={row['p99_ms']:.1f}ms "
+        f"p99.9={row['p999_ms']:.1f}ms slo({row['slo_ms']:g}ms)={row['slo_pct']:.1f}% "
+        f"errors={row['errors']} dropped={row['dropped']} cpu={row['server_cpu_pct']:.0f}%"
+    )
+
+
+def find_saturation(rows: List[Dict[str, float]], slo_target: float) -> Optional[Dict[str, float]]:
+    """First rate the server no longer keeps up with or where the SLO is missed."""
+    for row in rows:
+        if row["achieved_rps"] < 0.95 * row["offered_rps"] or row["slo_pct"] < slo_target:
+            return row
+    return None
+
+
+def pct(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    idx = int(round((p / 100.0) * (len(values) - 1)))
+    return values[idx]
 
 
 def summarize_result(result: RunResult) -> Dict[str, float]:
     totals = [j.total_time() for j in result.jobs if j.total_time() is not None]
     run_times = [j.run_time() for j in result.jobs if j.run_time() is not None]
     queue_times = [j.queue_time() for j in result.jobs if j.queue_time() is not None]
-    errors = sum(1 for j in result.jobs if j.status == "error")
+    errors = sum(1 for j in result.jobs if j.status in ("error", "dead"))
     cancels = sum(1 for j in result.jobs if j.status == "cancelled")
     done = sum(1 for j in result.jobs if j.status == "done")
 
-    def pct(values: List[float], p: float) -> float:
-        if not values:
-            return 0.0
-        values = sorted(values)
-        idx = int(round((p / 100.0) * (len(values) - 1)))
-        return values[idx]
-
     cpu_vals = [s.cpu for s in result.proc_samples if s.cpu is not None]
     mem_vals = [s.mem for s in result.proc_samples if s.mem is not None]
     rss_vals = [s.rss_mb for s in result.proc_samples if s.rss_mb is not None]
@@ -291,6 +823,9 @@ def summarize_result(result: RunResult) -> Dict[str, float]:
     total_s = [j.timings.get("total_s") for j in result.jobs if j.timings.get("total_s") is not None]
     process_s = [j.timings.get("process_s") for j in result.jobs if j.timings.get("process_s") is not None]
     spawn_s = [j.timings.get("spawn_s") for j in result.jobs if j.timings.get("spawn_s") is not None]
+    job_cpu_s = [j.timings.get("cpu_s") for j in result.jobs if j.timings.get("cpu_s") is not None]
+    job_rss_mb = [j.timings.get("max_rss_mb") for j in result.jobs if j.timings.get("max_rss_mb") is not None]
+    prompt_tokens = [j.timings.get("prompt_tokens") for j in result.jobs if j.timings.get("prompt_tokens") is not None]
 
     return {
         "concurrency": result.concurrency,
@@ -299,6 +834,7 @@ def summarize_result(result: RunResult) -> Dict[str, float]:
         "errors": errors,
         "cancelled": cancels,
         "wall_time_s": result.wall_time_s,
+        "status_requests": result.status_requests,
         "throughput_jps": (len(result.jobs) / result.wall_time_s) if result.wall_time_s > 0 else 0.0,
         "mean_s": statistics.mean(totals) if totals else 0.0,
         "p50_s": pct(totals, 50),
@@ -313,6 +849,9 @@ def summarize_result(result: RunResult) -> Dict[str, float]:
         "mean_llm_total_s": statistics.mean(total_s) if total_s else 0.0,
         "mean_process_s": statistics.mean(process_s) if process_s else 0.0,
         "mean_spawn_s": statistics.mean(spawn_s) if spawn_s else 0.0,
+        "mean_job_cpu_s": statistics.mean(job_cpu_s) if job_cpu_s else 0.0,
+        "max_job_rss_mb": max(job_rss_mb) if job_rss_mb else 0.0,
+        "mean_prompt_tokens": statistics.mean(prompt_tokens) if prompt_tokens else 0.0,
         "avg_cpu": statistics.mean(cpu_vals) if cpu_vals else 0.0,
         "max_cpu": max(cpu_vals) if cpu_vals else 0.0,
         "avg_mem": statistics.mean(mem_vals) if mem_vals else 0.0,
@@ -395,7 +934,18 @@ def write_jobs_jsonl(results: List[RunResult], path: str) -> None:
                     "run_s": job.run_time(),
                     "total_s": job.total_time(),
                 }
-                for key in ("load_s", "prompt_s", "llm_s", "parse_s", "total_s", "process_s", "spawn_s"):
+                for key in (
+                    "load_s",
+                    "prompt_s",
+                    "llm_s",
+                    "parse_s",
+                    "total_s",
+                    "process_s",
+                    "spawn_s",
+                    "cpu_s",
+                    "max_rss_mb",
+                    "prompt_tokens",
+                ):
                     if job.timings.get(key) is not None:
                         payload[f"llm_{key}"] = job.timings.get(key)
                 f.write(json.dumps(payload) + "\n")
@@ -406,6 +956,18 @@ def main() -> int:
     parser.add_argument("--base-url", default="http://127.0.0.1:8000")
     parser.add_argument("--concurrency", default="1,2,4,8,16")
     parser.add_argument("--poll-interval", type=float, default=0.5)
+    parser.add_argument(
+        "--enqueue",
+        choices=["bulk", "single"],
+        default="bulk",
+        help="queue each level with one POST /judge/bulk or one POST /judge/{id} per job",
+    )
+    parser.add_argument(
+        "--status-mode",
+        choices=["events", "poll"],
+        default="events",
+        help="follow jobs via the /judge/events stream or by polling /judge/status/{id}",
+    )
     parser.add_argument("--metrics-interval", type=float, default=1.0)
     parser.add_argument("--request-timeout", type=float, default=90.0)
     parser.add_argument("--request-retries", type=int, default=2)
@@ -415,6 +977,51 @@ def main() -> int:
     parser.add_argument("--threads", type=int, default=64)
     parser.add_argument("--out", default="bench_results")
     parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument(
+        "--endpoint-samples",
+        type=int,
+        default=0,
+        help="measure per-endpoint latency with this many requests each (0=skip)",
+    )
+    parser.add_argument(
+        "--endpoint-baseline",
+        default=None,
+        help="earlier <out>_endpoints.json to print before/after latency against",
+    )
+    parser.add_argument(
+        "--endpoint-clients",
+        default="1",
+        help="comma-separated concurrent client counts for the endpoint benchmark, e.g. 1,8,32",
+    )
+    parser.add_argument("--endpoints-only", action="store_true")
+    parser.add_argument(
+        "--rates",
+        default=None,
+        help="open-loop mode: comma-separated offered request rates (req/s), e.g. 50,100,200; "
+        "run the backend with BB_JUDGE_MODE=mock to measure the API rather than the LLM",
+    )
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds to sustain each open-loop rate")
+    parser.add_argument("--arrival", choices=["poisson", "constant"], default="poisson")
+    parser.add_argument(
+        "--mix",
+        default="queue=4,thread=4,status=1.5,enqueue=0.5",
+        help="open-loop workload weights over queue, thread, status and enqueue requests",
+    )
+    parser.add_argument("--slo-ms", type=float, default=250.0, help="latency objective for open-loop runs")
+    parser.add_argument(
+        "--slo-target",
+        type=float,
+        default=99.0,
+        help="percent of requests that must meet --slo-ms for a rate to count as sustained",
+    )
+    parser.add_argument("--connections", type=int, default=256, help="open-loop keep-alive connection cap")
+    parser.add_argument(
+        "--max-inflight",
+        type=int,
+        default=4096,
+        help="open-loop arrivals beyond this many outstanding requests are dropped (and counted)",
+    )
+    parser.add_argument("--seed", type=int, default=None)
     args = parser.parse_args()
     console = Console() if Console else None
 
@@ -428,6 +1035,82 @@ def main() -> int:
     if pid is None:
         log("Warning: server PID not found; CPU/mem metrics will be empty.")
 
+    if args.endpoint_samples > 0 or args.endpoints_only:
+        sample_ids = fetch_thread_ids(
+            args.base_url, args.threads, timeout_s=args.request_timeout, retries=args.request_retries
+        )
+        if not sample_ids:
+            log("No thread_ids returned by /queue; cannot benchmark endpoints.")
+            return 1
+        endpoint_rows = []
+        for clients in [int(x) for x in args.endpoint_clients.split(",") if x.strip()]:
+            endpoint_rows.extend(
+                bench_endpoints(
+                    args.base_url,
+                    sample_ids,
+                    samples=args.endpoint_samples or 200,
+                    timeout_s=args.request_timeout,
+                    clients=clients,
+                )
+            )
+        baseline = None
+        if args.endpoint_baseline:
+            with open(args.endpoint_baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        with open(f"{args.out}_endpoints.json", "w", encoding="utf-8") as f:
+            json.dump(endpoint_rows, f, indent=2)
+        log("\nEndpoint latency:")
+        for line in format_endpoint_table(endpoint_rows, baseline):
+            log(line)
+        log(f"Wrote: {args.out}_endpoints.json")
+        if args.endpoints_only:
+            return 0
+
+    if args.rates:
+        try:
+            mix = parse_mix(args.mix)
+        except ValueError as exc:
+            log(str(exc))
+            return 1
+        sample_ids = fetch_thread_ids(
+            args.base_url, args.threads, timeout_s=args.request_timeout, retries=args.request_retries
+        )
+        if not sample_ids:
+            log("No thread_ids returned by /queue; cannot run the open-loop benchmark.")
+            return 1
+        rows = asyncio.run(
+            run_open_loop(
+                args.base_url,
+                sample_ids,
+                [float(x) for x in args.rates.split(",") if x.strip()],
+                duration_s=args.duration,
+                arrival=args.arrival,
+                mix=mix,
+                slo_ms=args.slo_ms,
+                connections=args.connections,
+                max_inflight=args.max_inflight,
+                timeout_s=args.request_timeout,
+                dry_run=args.dry_run,
+                pid=pid,
+                seed=args.seed,
+                log=log,
+            )
+        )
+        write_csv(rows, f"{args.out}_open_loop.csv")
+        with open(f"{args.out}_open_loop.json", "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+        saturation = find_saturation(rows, args.slo_target)
+        if saturation is None:
+            log(f"\nNo saturation up to {rows[-1]['offered_rps']:g} req/s (SLO {args.slo_ms:g}ms @ {args.slo_target:g}%).")
+        else:
+            log(
+                f"\nSaturation at {saturation['offered_rps']:g} req/s offered: "
+                f"achieved {saturation['achieved_rps']:.1f}/s, "
+                f"{saturation['slo_pct']:.1f}% within {args.slo_ms:g}ms (target {args.slo_target:g}%)."
+            )
+        log(f"Wrote: {args.out}_open_loop.csv, {args.out}_open_loop.json")
+        return 0
+
     levels = [int(x.strip()) for x in args.concurrency.split(",") if x.strip()]
     needed = sum(levels)
     thread_ids = fetch_thread_ids(
@@ -459,6 +1142,8 @@ def main() -> int:
             timeout_s=args.request_timeout,
             retries=args.request_retries,
             max_poll_errors=args.max_poll_errors,
+            status_mode=args.status_mode,
+            enqueue=args.enqueue,
         )
         results.append(result)
         summary = summarize_result(result)
@@ -485,7 +1170,9 @@ def main() -> int:
             f"c={row['concurrency']:>2} jobs={row['jobs']} "
             f"wall={row['wall_time_s']:.2f}s tp={row['throughput_jps']:.2f}/s "
             f"p50={row['p50_s']:.2f}s p95={row['p95_s']:.2f}s "
-            f"avg_cpu={row['avg_cpu']:.1f}% avg_rss={row['avg_rss_mb']:.1f}MB"
+            f"status_reqs={row['status_requests']} "
+            f"avg_cpu={row['avg_cpu']:.1f}% avg_rss={row['avg_rss_mb']:.1f}MB "
+            f"job_cpu={row['mean_job_cpu_s']:.2f}s job_rss_max={row['max_job_rss_mb']:.1f}MB"
         )
     log(
         f"\nWrote: {args.out}.csv, {args.out}.json, {args.out}.txt, "
@@ -0,0 +1,192 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+from urllib.parse import urlencode
+
+# Profile every statement so each case can report queries per request, and
+# keep the judge dispatcher out of a read-only benchmark. Both are read at
+# import time.
+os.environ.setdefault("BB_SQL_PROFILE", "1")
+os.environ.setdefault("BB_JUDGE_EMBEDDED_WORKER", "0")
+
+# backend/ is not a package on the path when running from scripts/.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from backend import app as backend_app  # noqa: E402
+from bb_bugs.store import profile as sql_profile  # noqa: E402
+
+SEARCH_TERMS = ["training", "arena", "error", "transfer", "crash", "page", "wrong", "draft", "salary"]
+
+
+async def asgi_request(app, method: str, target: str, body: object = None) -> tuple[int, bytes]:
+    """Run one request through the ASGI app (middleware included) without a socket."""
+    path, _, query = target.partition("?")
+    payload = b"" if body is None else json.dumps(body).encode("utf-8")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("utf-8"),
+        "query_string": query.encode("utf-8"),
+        "root_path": "",
+        "headers": [
+            (b"host", b"bench"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode("ascii")),
+        ],
+        "client": ("127.0.0.1", 0),
+        "server": ("bench", 80),
+    }
+    request_sent = False
+
+    async def receive() -> dict:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    status = 0
+    chunks: list[bytes] = []
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+
+def build_cases(thread_ids: list[str], rng: random.Random) -> dict[str, Callable[[], tuple]]:
+    """Case name -> function returning (method, target, body) for one request."""
+
+    def sample(k: int) -> list[str]:
+        return rng.sample(thread_ids, min(k, len(thread_ids)))
+
+    return {
+        "GET /queue": lambda: ("GET", "/queue?" + urlencode({"status": "unreviewed", "limit": 50}), None),
+        "GET /queue deep offset": lambda: (
+            "GET",
+            "/queue?" + urlencode({"status": "all", "limit": 50, "offset": rng.randint(0, len(thread_ids) // 2)}),
+            None,
+        ),
+        "GET /queue q=": lambda: (
+            "GET",
+            "/queue?" + urlencode({"status": "all", "limit": 50, "q": rng.choice(SEARCH_TERMS)}),
+            None,
+        ),
+        "GET /queue has_llm": lambda: (
+            "GET",
+            "/queue?" + urlencode({"status": "unreviewed", "limit": 50, "has_llm": "true", "status_guess": "open"}),
+            None,
+        ),
+        "GET /thread/{id}": lambda: ("GET", f"/thread/{rng.choice(thread_ids)}", None),
+        "POST /thread/bulk": lambda: ("POST", "/thread/bulk", {"thread_ids": sample(10)}),
+        "GET /search": lambda: ("GET", "/search?" + urlencode({"q": rng.choice(SEARCH_TERMS)}), None),
+        "POST /judge/status/bulk": lambda: ("POST", "/judge/status/bulk", {"thread_ids": sample(50)}),
+    }
+
+
+def pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[int(round((p / 100.0) * (len(values) - 1)))]
+
+
+async def bench_case(app, make_request, *, samples: int, warmup: int, warm: bool) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    for i in range(warmup + samples):
+        if not warm:
+            backend_app.QUEUE_TOTALS.invalidate()
+        if i == warmup:
+            sql_profile.PROFILER.reset()
+        method, target, body = make_request()
+        t0 = time.perf_counter()
+        status, _ = await asgi_request(app, method, target, body)
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        if i < warmup:
+            continue
+        if status >= 400:
+            errors += 1
+        latencies.append(elapsed_ms)
+    statements = sql_profile.PROFILER.snapshot()["statements"]
+    n = len(latencies) or 1
+    return {
+        "samples": len(latencies),
+        "errors": errors,
+        "mean_ms": statistics.mean(latencies) if latencies else 0.0,
+        "p50_ms": pct(latencies, 50),
+        "p95_ms": pct(latencies, 95),
+        "p99_ms": pct(latencies, 99),
+        "queries_per_req": sum(s["calls"] for s in statements) / n,
+        "sql_ms_per_req": sum(s["total_ms"] for s in statements) / n,
+    }
+
+
+async def run(args: argparse.Namespace) -> list[dict]:
+    app = backend_app.app
+    rows = []
+    async with app.router.lifespan_context(app):
+        conn = backend_app.get_conn()
+        try:
+            thread_ids = [row[0] for row in conn.execute("SELECT thread_id FROM threads")]
+        finally:
+            conn.close()
+        if not thread_ids:
+            raise SystemExit(f"No threads in {args.db}; fill it with scripts/gen_corpus.py first")
+        print(f"{args.db}: {len(thread_ids)} threads, cache={'warm' if args.warm else 'off'}")
+        cases = build_cases(thread_ids, random.Random(args.seed))
+        selected = [c for c in cases if not args.only or any(o.lower() in c.lower() for o in args.only)]
+        for name in selected:
+            row = {"case": name}
+            row.update(await bench_case(app, cases[name], samples=args.samples, warmup=args.warmup, warm=args.warm))
+            rows.append(row)
+            print(
+                f"{name:<24} p50={row['p50_ms']:7.2f}ms p95={row['p95_ms']:7.2f}ms p99={row['p99_ms']:7.2f}ms "
+                f"queries/req={row['queries_per_req']:5.1f} sql/req={row['sql_ms_per_req']:6.2f}ms "
+                f"errors={row['errors']}"
+            )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the read API in-process (no HTTP server) against a database."
+    )
+    parser.add_argument("--db", type=Path, default=Path("data/bbs.sqlite"))
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--warm", action="store_true", help="keep the response and /queue totals caches on")
+    parser.add_argument("--only", nargs="*", default=None, help="run cases whose name contains one of these")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", type=Path, default=None, help="write the results as JSON")
+    args = parser.parse_args()
+    if not args.db.exists():
+        raise SystemExit(f"{args.db} does not exist")
+    backend_app.DB_PATH = args.db
+    if not args.warm:
+        # Measure the SQL behind each response rather than the app caches.
+        backend_app.RESPONSE_CACHE.size = 0
+
+    rows = asyncio.run(run(args))
+    if args.out:
+        args.out.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+        print(f"Wrote: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
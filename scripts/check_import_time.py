@@ -0,0 +1,84 @@
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+
+# module -> (cumulative import budget in ms, modules it must not pull in).
+# The fetch CLI's heavy dependencies belong to the subcommands, and the judge
+# modules are imported by every one-shot scripts/llm_judge.py run.
+BUDGETS = {
+    "bb_bugs.cli": (25.0, ("requests", "urllib3", "bs4", "lxml", "rich", "dotenv", "bb_bugs.jobs")),
+    "bb_bugs.judge.prompt": (60.0, ("requests", "bs4", "rich")),
+    "bb_bugs.judge.providers": (50.0, ("requests", "bs4", "rich", "urllib.request", "http.client")),
+}
+
+
+def measure(module: str) -> tuple[float, list[tuple[str, float]]]:
+    """Import ``module`` in a fresh interpreter under -X importtime.
+
+    Returns its cumulative import time in ms and (module, self ms) for
+    everything imported on its behalf, leaving out interpreter start-up.
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in (str(SRC), env.get("PYTHONPATH")) if p)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr}")
+    # Children are printed before their parent, indented under it, so the
+    # target's subtree is everything since the previous top-level line.
+    subtree: list[tuple[str, float]] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "| imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        name = name[1:]  # the column separator's space; the rest is nesting
+        subtree.append((name.strip(), int(self_us) / 1000.0))
+        if name.startswith(" "):
+            continue
+        if name == module:
+            return int(cumulative_us) / 1000.0, subtree
+        subtree = []
+    raise SystemExit(f"no import time reported for {module}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Check that CLI and judge modules import within their time budget "
+        "and without their heavy dependencies."
+    )
+    parser.add_argument("modules", nargs="*", default=list(BUDGETS), help="modules to check")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module; the best run counts")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every budget (slow CI machines)")
+    parser.add_argument("--top", type=int, default=5, help="slowest imports to list per module")
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules:
+        budget_ms, forbidden = BUDGETS.get(module, (float("inf"), ()))
+        budget_ms *= args.scale
+        runs = [measure(module) for _ in range(max(1, args.runs))]
+        best_ms, imported = min(runs, key=lambda run: run[0])
+        names = {name for name, _ in imported}
+        pulled_in = [f for f in forbidden if any(n == f or n.startswith(f + ".") for n in names)]
+        ok = best_ms <= budget_ms and not pulled_in
+        print(f"{'ok' if ok else 'FAIL':<4} {module:<28} {best_ms:7.1f} ms (budget {budget_ms:.0f} ms)")
+        for name, self_ms in sorted(imported, key=lambda item: item[1], reverse=True)[: args.top]:
+            print(f"       {self_ms:7.2f} ms  {name}")
+        if pulled_in:
+            print(f"       imports {', '.join(pulled_in)}")
+        if not ok:
+            failures.append(module)
+    if failures:
+        raise SystemExit(f"import-time budget exceeded: {', '.join(failures)}")
+
+
+if __name__ == "__main__":
+    main()
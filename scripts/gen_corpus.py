@@ -0,0 +1,279 @@
+import argparse
+import json
+import math
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from bb_bugs.store import db as db_store
+from bb_bugs.store.schema import ensure_tables
+
+AREAS = [
+    "training", "arena", "league", "transfer list", "economy", "match viewer", "scouting",
+    "draft", "forum", "national team", "cup", "player page", "box score", "roster", "finances",
+    "game engine", "mobile site", "inbox", "bookmarks", "friendly", "playoffs", "schedule",
+]
+PROBLEMS = [
+    "error", "not loading", "wrong total", "missing", "crash", "shows twice", "stuck",
+    "broken link", "wrong date", "blank page", "timeout", "bad sort order", "incorrect stats",
+    "cannot save", "display glitch", "wrong salary", "negative value", "duplicate entry",
+]
+FILLER = [
+    "after the update", "since yesterday", "on chrome", "on my phone", "every time",
+    "sometimes", "for my team", "in the last game", "when I click it", "again",
+]
+WORDS = (
+    "the a my team player game page shows wrong value after update when I open it again "
+    "since yesterday still error please check this thanks same problem here also seeing "
+    "it on mobile and desktop refresh does not help cleared cache already screenshot attached "
+    "season week match minutes points rebounds salary bid offer arena seats tickets price "
+    "training report shows skill drop pop injury coach scout draft pick national team cup"
+).split()
+STATUSES = {
+    "open": 0.35,
+    "resolved": 0.25,
+    "duplicate": 0.15,
+    "not_a_bug": 0.15,
+    "feature_request": 0.05,
+    "unclear": 0.05,
+}
+CONFIDENCES = {"low": 0.3, "medium": 0.45, "high": 0.25}
+MODELS = {"flash": 0.6, "pro": 0.25, "flash-lite": 0.15}
+STAFF = ["BB-Charles", "BB-Marin", "BB-Ivan", "BB-Forum", "BB-Mike"]
+
+
+def pick(rng: random.Random, weights: dict[str, float]) -> str:
+    return rng.choices(list(weights), list(weights.values()))[0]
+
+
+def sentence(rng: random.Random) -> str:
+    words = rng.choices(WORDS, k=rng.randint(6, 18))
+    return " ".join(words).capitalize() + "."
+
+
+def body_text(rng: random.Random, mean_chars: int, quote_from: str | None) -> str:
+    # Lognormal lengths: most posts are short, a few are long write-ups.
+    target = max(20, int(rng.lognormvariate(math.log(mean_chars) - 0.5, 1.0)))
+    parts = []
+    if quote_from:
+        parts.append(f"Quote from {quote_from}: {sentence(rng)}")
+    size = sum(len(p) for p in parts)
+    while size < target:
+        parts.append(sentence(rng))
+        size += len(parts[-1]) + 1
+    return " ".join(parts)
+
+
+class Authors:
+    """Zipf-like author popularity: a few regulars write most posts."""
+
+    def __init__(self, rng: random.Random, count: int, skew: float = 1.1) -> None:
+        self.rng = rng
+        self.names = [f"user{n}" for n in range(count)]
+        cumulative, total = [], 0.0
+        for rank in range(1, count + 1):
+            total += 1.0 / rank**skew
+            cumulative.append(total)
+        self.cumulative = cumulative
+
+    def pick(self) -> str:
+        return self.rng.choices(self.names, cum_weights=self.cumulative)[0]
+
+
+def generate(conn: sqlite3.Connection, args: argparse.Namespace) -> dict[str, int]:
+    rng = random.Random(args.seed)
+    authors = Authors(rng, args.authors)
+    # Lognormal replies per thread with the requested mean (1 + X, capped).
+    sigma = 1.0
+    mu = math.log(max(args.posts_per_thread - 1, 0.1)) - sigma**2 / 2
+    start = datetime(2010, 1, 1)
+    span_s = int((datetime(2026, 1, 1) - start).total_seconds())
+
+    counts = {"threads": 0, "posts": 0, "decisions": 0, "judgments": 0, "jobs": 0}
+    thread_id = args.first_id
+    thread_ids: list[str] = []
+    threads, posts, bodies, decisions, judgments, jobs = [], [], [], [], [], []
+
+    def flush() -> None:
+        conn.executemany(
+            "INSERT INTO threads (thread_id, folder_id, title, author, url, created_at, last_seen_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            threads,
+        )
+        conn.executemany(
+            "INSERT INTO posts (post_id, thread_id, author, posted_at, body_html, body_text, is_first) "
+            "VALUES (?, ?, ?, ?, NULL, NULL, ?)",
+            posts,
+        )
+        conn.executemany(
+            "INSERT INTO content.post_bodies (post_id, body_html, body_text) VALUES (?, ?, ?)", bodies
+        )
+        conn.executemany(
+            "INSERT INTO triage_decisions (thread_id, status, duplicate_of, notes, updated_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            decisions,
+        )
+        conn.executemany(
+            "INSERT INTO llm_judgments (thread_id, summary, status_guess, confidence, evidence, duplicates, model, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            judgments,
+        )
+        conn.executemany(
+            "INSERT INTO llm_jobs (thread_id, status, model, error, started_at, finished_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            jobs,
+        )
+        conn.commit()
+        counts["threads"] += len(threads)
+        counts["posts"] += len(posts)
+        counts["decisions"] += len(decisions)
+        counts["judgments"] += len(judgments)
+        counts["jobs"] += len(jobs)
+        for rows in (threads, posts, bodies, decisions, judgments, jobs):
+            rows.clear()
+
+    for n in range(args.threads):
+        # Ids are forum-wide, so one folder sees gaps between its threads.
+        thread_id += 1 + int(rng.expovariate(0.5))
+        tid = str(thread_id)
+        thread_ids.append(tid)
+        created = start + timedelta(seconds=span_s * n // args.threads + rng.randint(0, 3600))
+        title = f"{rng.choice(AREAS)} {rng.choice(PROBLEMS)}"
+        if rng.random() < 0.5:
+            title += f" {rng.choice(FILLER)}"
+        starter = authors.pick()
+        threads.append(
+            (
+                tid,
+                args.folder,
+                title.capitalize(),
+                starter,
+                f"https://www.buzzerbeater.com/community/forum/read.aspx?thread={tid}&m=1",
+                created.isoformat(),
+                created.isoformat(),
+            )
+        )
+
+        n_posts = min(args.max_posts, 1 + int(rng.lognormvariate(mu, sigma)))
+        staff_reply = rng.random() < args.staff_ratio
+        posted = created
+        participants = [starter]
+        for index in range(n_posts):
+            if index == 0:
+                author = starter
+            elif staff_reply and index == 1:
+                author = rng.choice(STAFF)
+            else:
+                author = authors.pick() if rng.random() < 0.7 else rng.choice(participants)
+            participants.append(author)
+            quote_from = participants[-2] if index > 0 and rng.random() < args.quote_ratio else None
+            text = body_text(rng, args.body_chars, quote_from)
+            post_id = f"{tid}.{index + 1}"
+            posts.append((post_id, tid, author, posted.strftime("%m/%d/%Y %I:%M:%S %p"), 1 if index == 0 else 0))
+            bodies.append(
+                (
+                    post_id,
+                    db_store.compress_body(f"<p>{text}</p>") if args.with_html else None,
+                    db_store.compress_body(text),
+                )
+            )
+            posted += timedelta(minutes=int(rng.expovariate(1 / 600)))
+
+        updated = (posted + timedelta(days=rng.randint(0, 30))).isoformat()
+        if rng.random() < args.reviewed:
+            status = pick(rng, STATUSES)
+            duplicate_of = rng.choice(thread_ids[:-1]) if status == "duplicate" and len(thread_ids) > 1 else None
+            notes = sentence(rng) if rng.random() < 0.2 else None
+            decisions.append((tid, status, duplicate_of, notes, updated))
+        if rng.random() < args.judged:
+            model = pick(rng, MODELS)
+            guess = pick(rng, STATUSES)
+            evidence = [f"{tid}.{rng.randint(1, n_posts)}: {sentence(rng)}" for _ in range(rng.randint(1, 3))]
+            duplicates = [rng.choice(thread_ids)] if guess == "duplicate" else []
+            judgments.append(
+                (
+                    tid,
+                    " ".join(sentence(rng) for _ in range(2)),
+                    guess,
+                    pick(rng, CONFIDENCES),
+                    json.dumps(evidence),
+                    json.dumps(duplicates),
+                    model,
+                    updated,
+                )
+            )
+            jobs.append((tid, "done", model, None, updated, updated, updated))
+        elif rng.random() < 0.02:
+            jobs.append((tid, "error", "auto", "gemini failed", updated, updated, updated))
+
+        if len(threads) >= args.batch_size:
+            flush()
+            print(f"\r{counts['threads']}/{args.threads} threads, {counts['posts']} posts", end="", flush=True)
+    flush()
+    print(f"\r{counts['threads']}/{args.threads} threads, {counts['posts']} posts")
+    return counts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Fill a new database with a synthetic bugs-forum corpus for scale testing."
+    )
+    parser.add_argument("--db", type=Path, required=True, help="database to create (with its _content sibling)")
+    parser.add_argument("--overwrite", action="store_true")
+    parser.add_argument("--threads", type=int, default=100_000)
+    parser.add_argument("--posts-per-thread", type=float, default=10.0, help="mean posts per thread")
+    parser.add_argument("--max-posts", type=int, default=500)
+    parser.add_argument("--body-chars", type=int, default=400, help="typical post length")
+    parser.add_argument("--authors", type=int, default=20_000)
+    parser.add_argument("--staff-ratio", type=float, default=0.3, help="share of threads with a staff reply")
+    parser.add_argument("--quote-ratio", type=float, default=0.15, help="share of replies quoting a post")
+    parser.add_argument("--reviewed", type=float, default=0.3, help="share of threads with a triage decision")
+    parser.add_argument("--judged", type=float, default=0.6, help="share of threads with an LLM judgment")
+    parser.add_argument("--with-html", action="store_true", help="also store body_html (doubles content size)")
+    parser.add_argument("--folder", type=int, default=2)
+    parser.add_argument("--first-id", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    content_path = db_store.content_db_path(args.db)
+    existing = [p for p in (args.db, content_path) if p.exists()]
+    if existing and not args.overwrite:
+        raise SystemExit(f"{existing[0]} exists; pass --overwrite to replace it")
+    for path in (args.db, content_path):
+        for suffix in ("", "-wal", "-shm"):
+            path.with_name(path.name + suffix).unlink(missing_ok=True)
+    args.db.parent.mkdir(parents=True, exist_ok=True)
+
+    conn = db_store.connect_db(db_store.DbConfig(path=args.db))
+    conn.execute("PRAGMA journal_mode = WAL")
+    ensure_tables(conn)
+    # Load without the triage_queue / content_versions triggers, then let
+    # ensure_tables recreate them and rebuild triage_queue in one pass.
+    triggers = [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")]
+    for name in triggers:
+        conn.execute(f"DROP TRIGGER {name}")
+    conn.execute("DELETE FROM triage_queue")
+    conn.commit()
+    conn.execute("PRAGMA synchronous = OFF")
+
+    t0 = time.monotonic()
+    counts = generate(conn, args)
+    load_s = time.monotonic() - t0
+    t0 = time.monotonic()
+    ensure_tables(conn)
+    conn.execute("ANALYZE")
+    conn.commit()
+    conn.close()
+    index_s = time.monotonic() - t0
+
+    print(" ".join(f"{key}={value}" for key, value in counts.items()))
+    print(f"load {load_s:.1f}s, triggers/triage_queue/ANALYZE {index_s:.1f}s")
+    for path in (args.db, content_path):
+        print(f"{path}: {path.stat().st_size / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 import argparse
-import sqlite3
 from pathlib import Path
 
+from bb_bugs.store import db as db_store
+
 
 def main() -> None:
     parser = argparse.ArgumentParser()
@@ -16,30 +17,23 @@ def main() -> None:
     )
     args = parser.parse_args()
 
-    conn = sqlite3.connect(args.db)
-    conn.row_factory = sqlite3.Row
-    cur = conn.execute(
-        """
-        SELECT p.thread_id, t.title, p.post_id, p.author, p.posted_at, p.body_text, p.body_html
-        FROM posts p
-        LEFT JOIN threads t ON t.thread_id = p.thread_id
-        WHERE p.thread_id = ?
-        ORDER BY p.post_id
-        """,
-        (args.thread_id,),
-    )
-    rows = cur.fetchall()
+    conn = db_store.connect_db(db_store.DbConfig(path=args.db))
+    thread = conn.execute(
+        "SELECT title FROM threads WHERE thread_id = ?", (args.thread_id,)
+    ).fetchone()
+    title = thread["title"] if thread else None
+    rows = db_store.list_thread_posts(conn, args.thread_id, with_html=args.verbosity >= 3)
     for row in rows:
         body_text = row["body_text"] or ""
-        body_html = row["body_html"] or ""
+        body_html = (row["body_html"] if args.verbosity >= 3 else None) or ""
         if args.verbosity == 1:
             print(
-                f"{row['thread_id']} | {row['title']} | {row['post_id']} | {row['author']} | {row['posted_at']}"
+                f"{args.thread_id} | {title} | {row['post_id']} | {row['author']} | {row['posted_at']}"
             )
             continue
 
-        print(f"thread_id: {row['thread_id']}")
-        print(f"title: {row['title']}")
+        print(f"thread_id: {args.thread_id}")
+        print(f"title: {title}")
         print(f"post_id: {row['post_id']}")
         print(f"author: {row['author']}")
         print(f"posted_at: {row['posted_at']}")
@@ -0,0 +1,58 @@
+import argparse
+import json
+import random
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(delay_s: float, jitter_s: float) -> type[BaseHTTPRequestHandler]:
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                request = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                request = {}
+            prompt = request.get("prompt") or ""
+            time.sleep(delay_s + random.random() * jitter_s)
+            thread_ids = re.findall(r"^thread_id: (\S+)", prompt, re.MULTILINE) or [""]
+            judgments = [
+                {
+                    "thread_id": thread_id,
+                    "summary": "Stub summary.",
+                    "status_guess": "open",
+                    "confidence": "low",
+                    "evidence": [],
+                    "duplicate_candidates": [],
+                }
+                for thread_id in thread_ids
+            ]
+            text = json.dumps(judgments if len(judgments) > 1 else judgments[0])
+            body = json.dumps({"text": text}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args) -> None:
+            return
+
+    return StubHandler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Local LLM stub for BB_JUDGE_PROVIDER=http.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args.delay, args.jitter))
+    print(f"LLM stub listening on http://{args.host}:{args.port}/complete")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from bb_bugs.store import db as db_store
+
+
+def file_size(path: Path) -> int:
+    total = 0
+    for suffix in ("", "-wal"):
+        candidate = path.with_name(path.name + suffix)
+        if candidate.exists():
+            total += candidate.stat().st_size
+    return total
+
+
+def time_query(fn, repeats: int) -> float:
+    samples = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000.0
+
+
+def measure(db_path: Path, content_path: Path, repeats: int) -> dict[str, float]:
+    conn = db_store.connect_db(db_store.DbConfig(path=db_path, content_path=content_path))
+    try:
+        sample_ids = [
+            r["thread_id"]
+            for r in conn.execute(
+                "SELECT DISTINCT thread_id FROM posts ORDER BY CAST(thread_id AS INTEGER) DESC LIMIT 50"
+            ).fetchall()
+        ]
+        return {
+            "missing_first_post_ms": time_query(
+                lambda: db_store.list_threads_missing_first_post(conn), repeats
+            ),
+            "post_counts_ms": time_query(
+                lambda: conn.execute(
+                    "SELECT thread_id, COUNT(*) FROM posts GROUP BY thread_id"
+                ).fetchall(),
+                repeats,
+            ),
+            "thread_posts_ms": time_query(
+                lambda: [db_store.list_thread_posts(conn, tid, 11) for tid in sample_ids],
+                repeats,
+            ),
+        }
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Move inline post bodies into the compressed content database."
+    )
+    parser.add_argument("--db", type=Path, default=Path("data/bbs.sqlite"))
+    parser.add_argument("--content-db", type=Path, default=None)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--no-vacuum", action="store_true")
+    args = parser.parse_args()
+    content_path = args.content_db or db_store.content_db_path(args.db)
+
+    conn = db_store.connect_db(db_store.DbConfig(path=args.db, content_path=content_path))
+    db_store.init_db(conn)
+    conn.close()
+
+    before_sizes = (file_size(args.db), file_size(content_path))
+    before = measure(args.db, content_path, args.repeats)
+
+    conn = db_store.connect_db(db_store.DbConfig(path=args.db, content_path=content_path))
+    t0 = time.monotonic()
+    moved = db_store.migrate_post_bodies(conn)
+    if not args.no_vacuum:
+        conn.execute("VACUUM main")
+    conn.close()
+    elapsed = time.monotonic() - t0
+
+    after_sizes = (file_size(args.db), file_size(content_path))
+    after = measure(args.db, content_path, args.repeats)
+
+    print(f"moved_posts {moved} in {elapsed:.2f}s")
+    print(f"{'':24} {'before':>12} {'after':>12}")
+    print(f"{'main_db_bytes':24} {before_sizes[0]:>12} {after_sizes[0]:>12}")
+    print(f"{'content_db_bytes':24} {before_sizes[1]:>12} {after_sizes[1]:>12}")
+    for key in before:
+        print(f"{key:24} {before[key]:>12.2f} {after[key]:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+import json
+import urllib.request
+from pathlib import Path
+
+SORT_KEYS = {"total": "total_ms", "p99": "p99_ms", "p50": "p50_ms", "mean": "mean_ms", "calls": "calls"}
+
+
+def load_snapshot(args: argparse.Namespace) -> dict:
+    if args.file:
+        return json.loads(args.file.read_text(encoding="utf-8"))
+    with urllib.request.urlopen(f"{args.base_url}/debug/sql", timeout=args.timeout) as resp:
+        return json.loads(resp.read().decode("utf-8"))
+
+
+def print_statements(statements: list[dict], *, sort: str, top: int, width: int) -> None:
+    statements = sorted(statements, key=lambda s: s[SORT_KEYS[sort]], reverse=True)[:top]
+    print(f"{'calls':>8} {'total_ms':>10} {'mean_ms':>9} {'p50_ms':>9} {'p99_ms':>9} {'max_ms':>9}  sql")
+    for s in statements:
+        sql = s["sql"] if len(s["sql"]) <= width else s["sql"][: width - 1] + "…"
+        print(
+            f"{s['calls']:>8} {s['total_ms']:>10.1f} {s['mean_ms']:>9.3f} {s['p50_ms']:>9.3f} "
+            f"{s['p99_ms']:>9.3f} {s['max_ms']:>9.3f}  {sql}"
+        )
+
+
+def print_slow(slow: list[dict], limit: int) -> None:
+    # Latest first; the plan is captured once per statement.
+    for entry in list(reversed(slow))[:limit]:
+        print(f"\n{entry['ms']:.1f} ms at {entry['at']} params={entry['params']}")
+        print(f"  {entry['sql']}")
+        for line in entry["plan"]:
+            print(f"    {line}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Summarize SQLite statement timings from /debug/sql or a BB_SQL_PROFILE_OUT dump."
+    )
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--file", type=Path, default=None, help="read a saved snapshot instead of the API")
+    parser.add_argument("--sort", choices=sorted(SORT_KEYS), default="total")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--slow", type=int, default=5, help="slow-log entries to show (0 to skip)")
+    parser.add_argument("--width", type=int, default=100, help="truncate SQL to this many characters")
+    parser.add_argument("--timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    snapshot = load_snapshot(args)
+    if not snapshot.get("enabled"):
+        print("SQL profiling is off; start the process with BB_SQL_PROFILE=1.")
+    statements = snapshot.get("statements", [])
+    total_calls = sum(s["calls"] for s in statements)
+    total_ms = sum(s["total_ms"] for s in statements)
+    print(f"statements={len(statements)} calls={total_calls} total_ms={total_ms:.1f} slow_ms={snapshot.get('slow_ms')}")
+    print_statements(statements, sort=args.sort, top=args.top, width=args.width)
+    if args.slow > 0 and snapshot.get("slow"):
+        print_slow(snapshot["slow"], args.slow)
+
+
+if __name__ == "__main__":
+    main()
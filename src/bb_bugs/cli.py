@@ -1,87 +1,204 @@
 import argparse
+import sys
 from pathlib import Path
 
-from dotenv import load_dotenv
+# Keep this module's imports to the stdlib: requests, bs4/lxml, rich and the
+# job modules are imported by the subcommand that needs them, so --help and
+# short runs don't pay for them (see scripts/check_import_time.py).
 
-from bb_bugs.fetch.session import FetchConfig, PoliteSession
-from bb_bugs.fetch.auth import get_login_creds, login_web
-from bb_bugs.jobs.fetch_folder import FolderFetchConfig, fetch_folder
-from bb_bugs.jobs.fetch_threads import fetch_missing_first_posts
-from bb_bugs.store.db import DbConfig, connect_db, init_db
 
+def _option_parsers() -> tuple[argparse.ArgumentParser, ...]:
+    """The shared, discover and fetch option groups, as argparse parents."""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--db", type=Path, default=Path("data/bbs.sqlite"))
+    common.add_argument("--min-delay", type=float, default=2.5)
+    common.add_argument("--jitter", type=float, default=2.5)
+    common.add_argument("--max-retries", type=int, default=3)
+    common.add_argument("--timeout", type=float, default=20.0)
+    common.add_argument("--max-threads", type=int, default=None)
+    common.add_argument(
+        "--metrics-out",
+        type=Path,
+        default=None,
+        help="write request/retry/byte/parse counters here (Prometheus text format) on exit",
+    )
 
-def parse_args() -> argparse.Namespace:
-    parser = argparse.ArgumentParser(description="Fetch BuzzerBeater bugs forum folder.")
-    parser.add_argument("--folder", type=int, default=2)
-    parser.add_argument("--db", type=Path, default=Path("data/bbs.sqlite"))
-    parser.add_argument(
-        "--phase",
-        choices=["discover", "fetch"],
-        default="discover",
-        help="discover=collect thread IDs, fetch=fetch first posts",
+    discover_opts = argparse.ArgumentParser(add_help=False)
+    discover_opts.add_argument("--folder", type=int, default=2)
+    discover_opts.add_argument(
+        "--resume",
+        action="store_true",
+        help="resume discovery from last stored thread URL",
     )
-    parser.add_argument(
+
+    fetch_opts = argparse.ArgumentParser(add_help=False)
+    fetch_opts.add_argument(
         "--force",
         action="store_true",
         help="re-fetch threads even if posts already exist",
     )
-    parser.add_argument(
+    fetch_opts.add_argument(
         "--concurrency",
         type=int,
         default=1,
-        help="fetch parallelism; use 2 to split odd/even thread_ids",
+        help="fetch parallelism; use 2 to split odd/even thread_ids (sync: worker threads)",
     )
-    parser.add_argument(
+    fetch_opts.add_argument(
         "--login",
         action="store_true",
         help="use BB_USERNAME/BB_PASSWORD to login before fetch phase",
     )
+    return common, discover_opts, fetch_opts
+
+
+def build_parser() -> argparse.ArgumentParser:
+    common, discover_opts, fetch_opts = _option_parsers()
+    parser = argparse.ArgumentParser(
+        description="Fetch BuzzerBeater bugs forum folder.",
+        epilog="The old --phase discover|fetch form is still accepted.",
+    )
+    sub = parser.add_subparsers(dest="command", required=True, metavar="command")
+    sub.add_parser(
+        "discover",
+        parents=[common, discover_opts],
+        help="collect thread IDs from the folder listing",
+    )
+    sub.add_parser(
+        "fetch",
+        parents=[common, fetch_opts],
+        help="fetch first posts for discovered threads",
+    )
+    sync = sub.add_parser(
+        "sync",
+        parents=[common, discover_opts, fetch_opts],
+        help="discover and fetch first posts in one pipelined pass",
+    )
+    sync.add_argument(
+        "--queue-size",
+        type=int,
+        default=50,
+        help="discovered threads waiting for a fetch worker before discovery pauses",
+    )
+    return parser
+
+
+def build_legacy_parser() -> argparse.ArgumentParser:
+    """The old single-command form: every option, with ``--phase`` picking the
+    command. Options the phase does not use are accepted and ignored, as before.
+    """
+    parser = argparse.ArgumentParser(
+        description="Fetch BuzzerBeater bugs forum folder.",
+        parents=list(_option_parsers()),
+    )
     parser.add_argument(
-        "--resume",
-        action="store_true",
-        help="resume discovery from last stored thread URL",
+        "--phase",
+        choices=["discover", "fetch"],
+        default="discover",
+        help="discover=collect thread IDs, fetch=fetch first posts",
     )
-    parser.add_argument("--min-delay", type=float, default=2.5)
-    parser.add_argument("--jitter", type=float, default=2.5)
-    parser.add_argument("--max-retries", type=int, default=3)
-    parser.add_argument("--timeout", type=float, default=20.0)
-    parser.add_argument("--max-threads", type=int, default=None)
-    return parser.parse_args()
+    return parser
 
 
-def main() -> None:
-    load_dotenv()
-    args = parse_args()
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    if argv and (argv[0] in COMMANDS or argv[0] in ("-h", "--help")):
+        return build_parser().parse_args(argv)
+    args = build_legacy_parser().parse_args(argv)
+    args.command = args.phase
+    return args
+
+
+def _open_session(args: argparse.Namespace):
+    from bb_bugs.fetch.session import FetchConfig, PoliteSession
+
     fetch_cfg = FetchConfig(
         min_delay_s=args.min_delay,
         jitter_s=args.jitter,
         max_retries=args.max_retries,
         timeout_s=args.timeout,
     )
-    session = PoliteSession(fetch_cfg)
+    return PoliteSession(fetch_cfg)
+
 
-    db_cfg = DbConfig(path=args.db)
-    conn = connect_db(db_cfg)
+def _open_db(args: argparse.Namespace):
+    from bb_bugs.store.db import DbConfig, connect_db, init_db
+
+    conn = connect_db(DbConfig(path=args.db))
     init_db(conn)
+    return conn
+
+
+def _login(session) -> None:
+    from bb_bugs.fetch.auth import get_login_creds, login_web
+
+    username, password = get_login_creds()
+    if not username or not password:
+        raise RuntimeError("Missing BB_USERNAME and BB_PASSWORD/BB_SECURITY_CODE for login")
+    ok = login_web(session.session, "https://www2.buzzerbeater.com", username, password)
+    if not ok:
+        raise RuntimeError("Login failed")
+
+
+def run_discover(args: argparse.Namespace) -> None:
+    from bb_bugs.jobs.fetch_folder import FolderFetchConfig, fetch_folder
+
+    session = _open_session(args)
+    conn = _open_db(args)
+    folder_cfg = FolderFetchConfig(folder_id=args.folder, max_threads=args.max_threads)
+    fetch_folder(session, conn, folder_cfg, resume=args.resume)
+
+
+def run_fetch(args: argparse.Namespace) -> None:
+    from bb_bugs.jobs.fetch_threads import fetch_missing_first_posts
+
+    session = _open_session(args)
+    conn = _open_db(args)
+    if args.login:
+        _login(session)
+    fetch_missing_first_posts(
+        session,
+        conn,
+        max_threads=args.max_threads,
+        force=args.force,
+        concurrency=args.concurrency,
+    )
+
+
+def run_sync(args: argparse.Namespace) -> None:
+    from bb_bugs.jobs.fetch_folder import FolderFetchConfig
+    from bb_bugs.jobs.sync import sync_folder
+
+    session = _open_session(args)
+    conn = _open_db(args)
+    if args.login:
+        _login(session)
+    folder_cfg = FolderFetchConfig(folder_id=args.folder, max_threads=args.max_threads)
+    sync_folder(
+        session,
+        conn,
+        folder_cfg,
+        resume=args.resume,
+        force=args.force,
+        concurrency=args.concurrency,
+        queue_size=args.queue_size,
+    )
+
+
+COMMANDS = {"discover": run_discover, "fetch": run_fetch, "sync": run_sync}
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    try:
+        COMMANDS[args.command](args)
+    finally:
+        if args.metrics_out is not None:
+            from bb_bugs import metrics
 
-    if args.phase == "discover":
-        folder_cfg = FolderFetchConfig(folder_id=args.folder, max_threads=args.max_threads)
-        fetch_folder(session, conn, folder_cfg, resume=args.resume)
-    else:
-        if args.login:
-            username, password = get_login_creds()
-            if not username or not password:
-                raise RuntimeError("Missing BB_USERNAME and BB_PASSWORD/BB_SECURITY_CODE for login")
-            ok = login_web(session.session, "https://www2.buzzerbeater.com", username, password)
-            if not ok:
-                raise RuntimeError("Login failed")
-        fetch_missing_first_posts(
-            session,
-            conn,
-            max_threads=args.max_threads,
-            force=args.force,
-            concurrency=args.concurrency,
-        )
+            args.metrics_out.parent.mkdir(parents=True, exist_ok=True)
+            args.metrics_out.write_text(metrics.REGISTRY.render(), encoding="utf-8")
 
 
 if __name__ == "__main__":
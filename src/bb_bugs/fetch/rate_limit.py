@@ -1,21 +1,31 @@
 
 import random
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from threading import Lock
 
 
 @dataclass
 class RateLimiter:
+    """Spaces requests at least min_delay_s (+ jitter) apart.
+
+    One limiter may be shared by several sessions and threads; each caller
+    reserves the next free slot under the lock and sleeps outside it.
+    """
+
     min_delay_s: float
     jitter_s: float
     _last_request_ts: float | None = None
+    _lock: Lock = field(default_factory=Lock, repr=False, compare=False)
 
     def wait(self) -> None:
-        if self._last_request_ts is None:
-            self._last_request_ts = time.monotonic()
-            return
-        delay = self.min_delay_s + random.uniform(0, self.jitter_s)
-        elapsed = time.monotonic() - self._last_request_ts
-        if elapsed < delay:
-            time.sleep(delay - elapsed)
-        self._last_request_ts = time.monotonic()
+        with self._lock:
+            now = time.monotonic()
+            if self._last_request_ts is None:
+                slot = now
+            else:
+                delay = self.min_delay_s + random.uniform(0, self.jitter_s)
+                slot = max(now, self._last_request_ts + delay)
+            self._last_request_ts = slot
+        if slot > now:
+            time.sleep(slot - now)
@@ -5,8 +5,22 @@ from typing import Iterable
 
 import requests
 
+from bb_bugs import metrics
 from bb_bugs.fetch.rate_limit import RateLimiter
 
+FETCH_REQUESTS = metrics.REGISTRY.counter(
+    "bb_fetch_requests_total", "HTTP requests sent by the crawler.", ("method", "status")
+)
+FETCH_RETRIES = metrics.REGISTRY.counter(
+    "bb_fetch_retries_total", "Crawler requests retried after an error or a retryable status.", ("method",)
+)
+FETCH_BYTES = metrics.REGISTRY.counter("bb_fetch_bytes_total", "Response body bytes received by the crawler.")
+FETCH_SECONDS = metrics.REGISTRY.histogram(
+    "bb_fetch_request_seconds", "Crawler request latency, excluding rate-limit waits.", ("method",)
+)
+# Observed by the forum page fetchers around the HTML parsers.
+PARSE_SECONDS = metrics.REGISTRY.histogram("bb_parse_seconds", "Time spent parsing forum pages.", ("page",))
+
 
 @dataclass
 class FetchConfig:
@@ -29,18 +43,24 @@ class PoliteSession:
         while True:
             self.limiter.wait()
             try:
-                resp = self.session.get(url, timeout=self.config.timeout_s)
+                with FETCH_SECONDS.time(method="GET"):
+                    resp = self.session.get(url, timeout=self.config.timeout_s)
             except requests.RequestException:
+                FETCH_REQUESTS.inc(method="GET", status="error")
                 if attempt >= self.config.max_retries:
                     raise
+                FETCH_RETRIES.inc(method="GET")
                 attempt += 1
                 time.sleep(2**attempt)
                 continue
+            FETCH_REQUESTS.inc(method="GET", status=resp.status_code)
+            FETCH_BYTES.inc(len(resp.content))
 
             if resp.status_code in allowed_statuses:
                 return resp
 
             if resp.status_code in (429, 502, 503, 504) and attempt < self.config.max_retries:
+                FETCH_RETRIES.inc(method="GET")
                 attempt += 1
                 time.sleep(2**attempt)
                 continue
@@ -54,18 +74,24 @@ class PoliteSession:
         while True:
             self.limiter.wait()
             try:
-                resp = self.session.post(url, data=data, timeout=self.config.timeout_s)
+                with FETCH_SECONDS.time(method="POST"):
+                    resp = self.session.post(url, data=data, timeout=self.config.timeout_s)
             except requests.RequestException:
+                FETCH_REQUESTS.inc(method="POST", status="error")
                 if attempt >= self.config.max_retries:
                     raise
+                FETCH_RETRIES.inc(method="POST")
                 attempt += 1
                 time.sleep(2**attempt)
                 continue
+            FETCH_REQUESTS.inc(method="POST", status=resp.status_code)
+            FETCH_BYTES.inc(len(resp.content))
 
             if resp.status_code in allowed_statuses:
                 return resp
 
             if resp.status_code in (429, 502, 503, 504) and attempt < self.config.max_retries:
+                FETCH_RETRIES.inc(method="POST")
                 attempt += 1
                 time.sleep(2**attempt)
                 continue
@@ -2,7 +2,7 @@
 from dataclasses import dataclass
 import re
 
-from bb_bugs.fetch.session import PoliteSession
+from bb_bugs.fetch.session import PARSE_SECONDS, PoliteSession
 from bb_bugs.parse.thread_page import parse_posts
 
 
@@ -15,7 +15,8 @@ class ThreadPage:
 def fetch_thread_posts(session: PoliteSession, url: str) -> ThreadPage:
     resp = session.get(url)
     resp.encoding = resp.apparent_encoding
-    posts = parse_posts(resp.text)
+    with PARSE_SECONDS.time(page="thread"):
+        posts = parse_posts(resp.text)
     if posts:
         return ThreadPage(posts=posts, raw_html=resp.text)
 
@@ -26,7 +27,8 @@ def fetch_thread_posts(session: PoliteSession, url: str) -> ThreadPage:
         if fallback_url != url:
             resp2 = session.get(fallback_url)
             resp2.encoding = resp2.apparent_encoding
-            posts2 = parse_posts(resp2.text)
+            with PARSE_SECONDS.time(page="thread"):
+                posts2 = parse_posts(resp2.text)
             return ThreadPage(posts=posts2, raw_html=resp2.text)
 
     return ThreadPage(posts=posts, raw_html=resp.text)
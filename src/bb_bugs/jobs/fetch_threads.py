@@ -9,6 +9,42 @@ from rich.progress import BarColumn, Progress, SpinnerColumn, TextColumn, TimeEl
 from bb_bugs.store import db as db_store
 
 
+def make_worker_session(session: PoliteSession) -> PoliteSession:
+    """A session for another thread: same config, rate limiter and cookies."""
+    worker = PoliteSession(session.config, limiter=session.limiter)
+    worker.session.cookies.update(session.session.cookies)
+    return worker
+
+
+def fetch_first_page_posts(session: PoliteSession, row: dict) -> tuple[str, list[dict]]:
+    thread_url = row["url"]
+    if not thread_url:
+        return row["thread_id"], []
+    thread_page = fetch_thread_posts(session, thread_url)
+    if not thread_page.posts:
+        return row["thread_id"], []
+    if thread_page.posts and not thread_page.posts[0].get("post_id"):
+        thread_page.posts[0]["post_id"] = f"{row['thread_id']}.1"
+    return row["thread_id"], thread_page.posts
+
+
+def store_thread_posts(conn, thread_id: str, posts: list[dict]) -> None:
+    for index, post in enumerate(posts):
+        post_id = post.get("post_id")
+        if not post_id:
+            continue
+        post_row = {
+            "post_id": post_id,
+            "thread_id": thread_id,
+            "author": post.get("author"),
+            "posted_at": post.get("posted_at"),
+            "body_html": post.get("body_html"),
+            "body_text": post.get("body_text"),
+            "is_first": 1 if index == 0 else 0,
+        }
+        db_store.upsert_post(conn, post_row)
+
+
 def fetch_missing_first_posts(
     session: PoliteSession,
     conn,
@@ -25,32 +61,16 @@ def fetch_missing_first_posts(
     if concurrency < 1:
         concurrency = 1
 
-    def _make_worker_session() -> PoliteSession:
-        worker = PoliteSession(session.config, limiter=session.limiter)
-        worker.session.cookies.update(session.session.cookies)
-        return worker
-
     def _parity_bucket(thread_id: str) -> int:
         try:
             return int(thread_id) % 2
         except ValueError:
             return hash(thread_id) % 2
 
-    def _fetch_posts(worker_session: PoliteSession, row: dict) -> tuple[str, list[dict]]:
-        thread_url = row["url"]
-        if not thread_url:
-            return row["thread_id"], []
-        thread_page = fetch_thread_posts(worker_session, thread_url)
-        if not thread_page.posts:
-            return row["thread_id"], []
-        if thread_page.posts and not thread_page.posts[0].get("post_id"):
-            thread_page.posts[0]["post_id"] = f"{row['thread_id']}.1"
-        return row["thread_id"], thread_page.posts
-
     def _worker(rows_subset: Iterable[dict], result_queue: queue.Queue) -> None:
-        worker_session = _make_worker_session()
+        worker_session = make_worker_session(session)
         for row in rows_subset:
-            result_queue.put(_fetch_posts(worker_session, row))
+            result_queue.put(fetch_first_page_posts(worker_session, row))
         result_queue.put(None)
 
     result_queue: queue.Queue = queue.Queue()
@@ -82,20 +102,7 @@ def fetch_missing_first_posts(
                 done_workers += 1
                 continue
             thread_id, posts = item
-            for index, post in enumerate(posts):
-                post_id = post.get("post_id")
-                if not post_id:
-                    continue
-                post_row = {
-                    "post_id": post_id,
-                    "thread_id": thread_id,
-                    "author": post.get("author"),
-                    "posted_at": post.get("posted_at"),
-                    "body_html": post.get("body_html"),
-                    "body_text": post.get("body_text"),
-                    "is_first": 1 if index == 0 else 0,
-                }
-                db_store.upsert_post(conn, post_row)
+            store_thread_posts(conn, thread_id, posts)
             progress.update(
                 task,
                 advance=1,
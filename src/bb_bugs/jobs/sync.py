@@ -0,0 +1,169 @@
+
+import queue
+import threading
+import time
+
+from rich.console import Group
+from rich.live import Live
+from rich.progress import BarColumn, Progress, SpinnerColumn, TextColumn, TimeElapsedColumn
+
+from bb_bugs import metrics
+from bb_bugs.fetch.session import PoliteSession
+from bb_bugs.jobs.fetch_folder import FolderFetchConfig, walk_folder
+from bb_bugs.jobs.fetch_threads import fetch_first_page_posts, make_worker_session, store_thread_posts
+from bb_bugs.store import db as db_store
+
+DISCOVER_TO_POSTS_SECONDS = metrics.REGISTRY.histogram(
+    "bb_sync_discover_to_posts_seconds",
+    "Time from a thread being discovered to its first-page posts being stored (sync mode).",
+    buckets=(1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0),
+)
+SYNC_FETCH_ERRORS = metrics.REGISTRY.counter(
+    "bb_sync_fetch_errors_total", "Threads whose posts could not be fetched during a sync."
+)
+
+
+def sync_folder(
+    session: PoliteSession,
+    conn,
+    config: FolderFetchConfig,
+    *,
+    resume: bool = False,
+    force: bool = False,
+    concurrency: int = 1,
+    queue_size: int = 50,
+) -> None:
+    """Discover the folder and fetch first posts in one pipelined pass.
+
+    The main thread walks the folder pages and streams each page's new
+    threads into a bounded queue that fetch workers drain as they go, so
+    posts for the first threads land while discovery is still paging. All
+    sessions share ``session.limiter``, so the pipeline keeps the same
+    request rate as running the two phases back to back. Posts are written
+    by the main thread only, between pages and while it waits on the queue.
+
+    After discovery, threads from earlier runs that still lack a first post
+    are queued too (unless ``force``), capped by ``config.max_threads``.
+    A thread that fails to fetch is counted and left for the next run.
+    """
+    concurrency = max(1, concurrency)
+    fetch_queue: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+    results: queue.Queue = queue.Queue()
+    queued_at: dict[str, float] = {}
+    counts = {"fetched": 0, "failed": 0}
+    first_stored_s: list[float] = []
+    workers_done = 0
+    t_start = time.monotonic()
+
+    pages_progress = Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TextColumn("{task.completed}", justify="right"),
+        TimeElapsedColumn(),
+    )
+    threads_progress = Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TextColumn("{task.completed}/{task.total}", justify="right"),
+        TimeElapsedColumn(),
+    )
+    pages_task = pages_progress.add_task("pages", total=None)
+    discovered_task = threads_progress.add_task("discovered", total=config.max_threads)
+    fetched_task = threads_progress.add_task("fetched", total=0)
+
+    def _worker() -> None:
+        worker_session = make_worker_session(session)
+        while True:
+            row = fetch_queue.get()
+            if row is None:
+                results.put(None)
+                return
+            try:
+                results.put(fetch_first_page_posts(worker_session, row))
+            except Exception as exc:  # keep the pipeline going; the thread stays missing
+                results.put((row["thread_id"], exc))
+
+    def _handle(item: tuple | None) -> None:
+        nonlocal workers_done
+        if item is None:
+            workers_done += 1
+            return
+        thread_id, posts = item
+        if isinstance(posts, Exception):
+            counts["failed"] += 1
+            SYNC_FETCH_ERRORS.inc()
+            threads_progress.console.print(f"[red]thread {thread_id}: {posts}")
+        else:
+            store_thread_posts(conn, thread_id, posts)
+            counts["fetched"] += 1
+            DISCOVER_TO_POSTS_SECONDS.observe(time.monotonic() - queued_at[thread_id])
+            if not first_stored_s:
+                first_stored_s.append(time.monotonic() - t_start)
+        threads_progress.update(
+            fetched_task,
+            advance=1,
+            description=f"fetched (last={thread_id} failed={counts['failed']})",
+        )
+
+    def _drain() -> None:
+        while True:
+            try:
+                item = results.get_nowait()
+            except queue.Empty:
+                return
+            _handle(item)
+
+    def _enqueue(row: dict | None) -> None:
+        # Block while the workers are behind (that is the backpressure on
+        # discovery), but keep storing their results in the meantime.
+        while True:
+            try:
+                fetch_queue.put(row, timeout=0.2)
+                break
+            except queue.Full:
+                _drain()
+        if row is not None:
+            queued_at[row["thread_id"]] = time.monotonic()
+            threads_progress.update(fetched_task, total=len(queued_at))
+
+    def _queue_rows(rows: list[dict]) -> None:
+        rows = [r for r in rows if r.get("thread_id") and r.get("url") and r["thread_id"] not in queued_at]
+        if not force and rows:
+            stored = db_store.thread_ids_with_first_post(conn, [r["thread_id"] for r in rows])
+            rows = [r for r in rows if r["thread_id"] not in stored]
+        for row in rows:
+            _enqueue(row)
+
+    def _on_page(page_index: int, rows: list[dict], total_seen: int) -> None:
+        pages_progress.advance(pages_task, 1)
+        pages_progress.update(
+            pages_task, description=f"pages (current={page_index}, total_threads={total_seen})"
+        )
+        threads_progress.update(discovered_task, advance=len(rows))
+        _queue_rows(rows)
+        _drain()
+
+    workers = [threading.Thread(target=_worker, daemon=True) for _ in range(concurrency)]
+    for t in workers:
+        t.start()
+
+    with Live(Group(pages_progress, threads_progress), refresh_per_second=8):
+        walk_folder(session, conn, config, resume=resume, on_page=_on_page)
+        if not force:
+            backlog = [
+                row for row in db_store.list_threads_missing_first_post(conn) if row["thread_id"] not in queued_at
+            ]
+            if config.max_threads is not None:
+                backlog = backlog[: max(0, config.max_threads - len(queued_at))]
+            _queue_rows([dict(row) for row in backlog])
+        for _ in workers:
+            _enqueue(None)
+        while workers_done < len(workers):
+            _handle(results.get())
+        first = f"{first_stored_s[0]:.1f}s" if first_stored_s else "n/a"
+        threads_progress.console.print(
+            f"sync: fetched={counts['fetched']} failed={counts['failed']} "
+            f"first posts stored after {first}, total {time.monotonic() - t_start:.1f}s"
+        )
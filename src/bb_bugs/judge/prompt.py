@@ -0,0 +1,355 @@
+
+import hashlib
+import json
+import os
+import re
+from textwrap import shorten
+
+from bb_bugs.store import db as db_store
+
+# Bump whenever the prompt templates or the post selection in load_thread
+# change, so cached judgments are invalidated.
+PROMPT_VERSION = "2"
+
+# Token counts are estimated from characters; close enough for budgeting
+# without shipping a tokenizer.
+CHARS_PER_TOKEN = 4
+DEFAULT_TOKEN_BUDGET = 3000
+# Shares of the budget for the report itself and for staff replies; the
+# latest replies get the rest, including whatever those two leave unused.
+FIRST_POST_SHARE = 0.4
+STAFF_SHARE = 0.25
+# No single reply may take more than this share.
+REPLY_SHARE = 0.15
+MIN_POST_TOKENS = 16
+STAFF_AUTHOR_RE = re.compile(os.getenv("BB_JUDGE_STAFF_RE", r"^BB-"), re.IGNORECASE)
+
+
+class ThreadNotFound(RuntimeError):
+    """The thread is not in the database (deleted, or never discovered)."""
+
+
+_QUOTE_HEADER = re.compile(
+    r"\b(?:quote(?:\s+from)?|originally\s+posted\s+by)\s+[^:]{1,40}:\s*|\b[\w.-]{1,30}\s+wrote:\s*",
+    re.IGNORECASE,
+)
+_BOILERPLATE = re.compile(
+    r"\bthis post has been edited\b[^.]*\.?|\bedited by \S+ on [^.]*\.?|\[?click to (?:show|expand)\]?",
+    re.IGNORECASE,
+)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WHITESPACE = re.compile(r"\s+")
+# Shorter sentences ("Same here.", "Thanks!") repeat by chance, not by quoting.
+_MIN_DEDUPE_CHARS = 20
+
+PROMPT_TEMPLATE = """You are a bug-triage assistant. Analyze the thread content and output JSON ONLY.
+
+Task:
+- Summarize the bug report concisely.
+- Guess status: one of [open, resolved, duplicate, not_a_bug, feature_request, unclear].
+- Provide confidence: low/medium/high.
+- Provide evidence: short quotes or paraphrases with post ids.
+- Suggest up to 3 duplicate candidates by thread_id if obvious from content (else empty).
+
+Rules:
+- Use ONLY the provided thread content.
+- Do NOT browse, search, or reference any external sources.
+- Output a single JSON object and nothing else.
+- No prose, no code fences.
+
+Output JSON schema:
+{{
+  "thread_id": "...",
+  "summary": "...",
+  "status_guess": "...",
+  "confidence": "...",
+  "evidence": ["..."],
+  "duplicate_candidates": ["..."]
+}}
+
+Thread:
+{thread_blob}
+"""
+
+BATCH_PROMPT_TEMPLATE = """You are a bug-triage assistant. Analyze each thread independently and output JSON ONLY.
+
+Task, for EACH thread below:
+- Summarize the bug report concisely.
+- Guess status: one of [open, resolved, duplicate, not_a_bug, feature_request, unclear].
+- Provide confidence: low/medium/high.
+- Provide evidence: short quotes or paraphrases with post ids.
+- Suggest up to 3 duplicate candidates by thread_id if obvious from content (else empty).
+
+Rules:
+- Use ONLY the provided thread content; never mix evidence between threads.
+- Do NOT browse, search, or reference any external sources.
+- Output a single JSON array with exactly one object per thread, in the given order.
+- Every object MUST carry the thread_id it describes.
+- No prose, no code fences.
+
+Output JSON schema:
+[
+  {{
+    "thread_id": "...",
+    "summary": "...",
+    "status_guess": "...",
+    "confidence": "...",
+    "evidence": ["..."],
+    "duplicate_candidates": ["..."]
+  }}
+]
+
+Threads ({count}):
+{threads_blob}
+"""
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def clean_body(text: str, seen: set[str]) -> str:
+    """Drop quote headers, boilerplate and sentences already in ``seen``.
+
+    Quoting repeats the earlier post verbatim, so skipping sentences seen
+    in earlier posts strips quotes whatever their markup. ``seen`` is
+    updated with the sentences kept.
+    """
+    text = _QUOTE_HEADER.sub(" ", _BOILERPLATE.sub(" ", text))
+    kept = []
+    for sentence in _SENTENCE_END.split(_WHITESPACE.sub(" ", text).strip()):
+        key = sentence.lower()
+        if len(key) >= _MIN_DEDUPE_CHARS:
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(sentence)
+    return " ".join(kept)
+
+
+def _truncate(text: str, tokens: int) -> str:
+    if estimate_tokens(text) <= tokens:
+        return text
+    return shorten(text, width=tokens * CHARS_PER_TOKEN, placeholder=" …")
+
+
+def _post_line(post: dict) -> str:
+    return f"post {post['post_id']} by {post['author']} at {post['posted_at']}: {post['body']}"
+
+
+def pack_posts(posts: list[dict], *, token_budget: int, max_posts: int) -> list[dict]:
+    """Pick and trim posts so their prompt lines fit in ``token_budget``.
+
+    The first post gets up to FIRST_POST_SHARE of the budget, staff replies
+    up to STAFF_SHARE and the latest replies what is left, each newest
+    first. Returns the chosen posts in thread order; ``omitted_before``
+    counts the posts skipped just before each one.
+    """
+    if not posts:
+        return []
+    reply_cap = max(MIN_POST_TOKENS, int(token_budget * REPLY_SHARE))
+    first_room = max(MIN_POST_TOKENS, int(token_budget * FIRST_POST_SHARE))
+    chosen = {0: dict(posts[0], body=_truncate(posts[0]["body"], first_room))}
+    remaining = token_budget - estimate_tokens(_post_line(chosen[0]))
+
+    def take(candidates: list[tuple[int, dict]], budget: int) -> int:
+        for index, post in reversed(candidates):
+            if len(chosen) >= max_posts:
+                break
+            header = estimate_tokens(_post_line(dict(post, body="")))
+            room = min(reply_cap, budget - header)
+            if room < MIN_POST_TOKENS:
+                break
+            chosen[index] = dict(post, body=_truncate(post["body"], room))
+            budget -= estimate_tokens(_post_line(chosen[index]))
+        return budget
+
+    replies = list(enumerate(posts))[1:]
+    staff = [(i, p) for i, p in replies if STAFF_AUTHOR_RE.search(p["author"] or "")]
+    staff_budget = min(remaining, int(token_budget * STAFF_SHARE))
+    remaining -= staff_budget - take(staff, staff_budget)
+    take([(i, p) for i, p in replies if i not in chosen], remaining)
+
+    packed = []
+    previous = -1
+    for index in sorted(chosen):
+        packed.append(dict(chosen[index], omitted_before=index - previous - 1))
+        previous = index
+    return packed
+
+
+def load_thread(
+    conn, thread_id: str, max_posts: int = 10, token_budget: int = DEFAULT_TOKEN_BUDGET
+) -> dict:
+    """Load a thread with its posts cleaned and packed into ``token_budget``.
+
+    Posts that are nothing but quotes or repeated text are dropped before
+    packing; see clean_body and pack_posts.
+    """
+    thread = conn.execute(
+        "SELECT thread_id, title FROM threads WHERE thread_id = ?",
+        (thread_id,),
+    ).fetchone()
+    if not thread:
+        raise ThreadNotFound(f"Thread {thread_id} not found")
+    rows = db_store.list_thread_posts(conn, thread_id)
+    seen: set[str] = set()
+    posts = []
+    for r in rows:
+        body = clean_body(r["body_text"] or "", seen)
+        if not body and posts:
+            continue
+        posts.append(
+            {
+                "post_id": r["post_id"],
+                "author": r["author"],
+                "posted_at": r["posted_at"],
+                "body": body,
+            }
+        )
+    packed = pack_posts(posts, token_budget=token_budget, max_posts=max_posts)
+    omitted_after = len(posts) - len(packed) - sum(p["omitted_before"] for p in packed)
+    return {"thread_id": thread_id, "title": thread["title"], "posts": packed, "omitted_after": omitted_after}
+
+
+def thread_blob(thread: dict) -> str:
+    lines = [f"thread_id: {thread['thread_id']}", f"title: {thread['title']}"]
+    for post in thread["posts"]:
+        if post.get("omitted_before"):
+            lines.append(f"[{post['omitted_before']} posts omitted]")
+        lines.append(_post_line(post))
+    if thread.get("omitted_after"):
+        lines.append(f"[{thread['omitted_after']} posts omitted]")
+    return "\n".join(lines)
+
+
+def judgment_hash(thread: dict, model: str, *, provider: str, template: str) -> str:
+    """Cache key for a judgment: prompt version, provider, model, template
+    kind ("single" or "batch") and exact thread content."""
+    digest = hashlib.sha256()
+    for part in (PROMPT_VERSION, provider, model, template, thread_blob(thread)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def build_prompt(thread: dict) -> str:
+    return PROMPT_TEMPLATE.format(thread_blob=thread_blob(thread))
+
+
+def build_batch_prompt(threads: list[dict]) -> str:
+    blobs = "\n\n---\n\n".join(thread_blob(thread) for thread in threads)
+    return BATCH_PROMPT_TEMPLATE.format(count=len(threads), threads_blob=blobs)
+
+
+def pack_batches(threads: list[dict], *, max_chars: int, max_threads: int) -> list[list[dict]]:
+    """Greedily group threads so each batch's blobs fit in ``max_chars``.
+
+    A thread larger than the budget on its own still gets a batch of one.
+    """
+    batches: list[list[dict]] = []
+    current: list[dict] = []
+    current_chars = 0
+    for thread in threads:
+        size = len(thread_blob(thread))
+        if current and (current_chars + size > max_chars or len(current) >= max_threads):
+            batches.append(current)
+            current, current_chars = [], 0
+        current.append(thread)
+        current_chars += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def normalize_json_output(text: str) -> str:
+    stripped = text.strip()
+    if "```" in stripped:
+        stripped = stripped.replace("```json", "").replace("```", "").strip()
+    if stripped.startswith("json"):
+        stripped = stripped[4:].strip()
+    if stripped.startswith("{") and stripped.endswith("}"):
+        return stripped
+    if "\"thread_id\"" in stripped and "\"summary\"" in stripped:
+        return "{\n" + stripped.strip().rstrip(",") + "\n}"
+    return stripped
+
+
+def repair_json_output(text: str) -> str:
+    normalized = normalize_json_output(text)
+    try:
+        parsed = json.loads(normalized)
+        return json.dumps(parsed, ensure_ascii=False)
+    except Exception:
+        pass
+
+    def find_str(key: str) -> str | None:
+        match = re.search(rf'"{key}"\\s*:\\s*"([^"]*)"', normalized, re.DOTALL)
+        return match.group(1).strip() if match else None
+
+    def find_status() -> str | None:
+        match = re.search(
+            r"\\b(open|resolved|duplicate|not_a_bug|feature_request|unclear)\\b",
+            normalized,
+            re.IGNORECASE,
+        )
+        return match.group(1).lower() if match else None
+
+    def find_confidence() -> str | None:
+        match = re.search(r"\\b(low|medium|high)\\b", normalized, re.IGNORECASE)
+        return match.group(1).lower() if match else None
+
+    def find_list(key: str) -> list[str]:
+        block = None
+        match = re.search(rf'"{key}"\\s*:\\s*\\[(.*?)\\]', normalized, re.DOTALL)
+        if match:
+            block = match.group(1)
+        if not block:
+            return []
+        return [s.strip() for s in re.findall(r'"([^"]+)"', block)]
+
+    repaired = {
+        "thread_id": find_str("thread_id") or "",
+        "summary": find_str("summary") or "",
+        "status_guess": find_str("status_guess") or find_status() or "unclear",
+        "confidence": find_str("confidence") or find_confidence() or "low",
+        "evidence": find_list("evidence"),
+        "duplicate_candidates": find_list("duplicate_candidates"),
+    }
+    return json.dumps(repaired, ensure_ascii=False)
+
+
+def parse_batch_judgments(text: str, thread_ids: list[str]) -> dict[str, dict]:
+    """Parse a batch response into {thread_id: judgment}.
+
+    Raises ValueError unless every requested thread has exactly one object,
+    so callers can fall back to judging the threads one by one.
+    """
+    stripped = text.strip()
+    if "```" in stripped:
+        stripped = stripped.replace("```json", "").replace("```", "").strip()
+    start, end = stripped.find("["), stripped.rfind("]")
+    if start < 0 or end <= start:
+        raise ValueError(f"No JSON array returned. Output: {text[:1000]}")
+    items = json.loads(stripped[start : end + 1])
+    if not isinstance(items, list):
+        raise ValueError("Batch output is not a JSON array")
+    results: dict[str, dict] = {}
+    for item in items:
+        if not isinstance(item, dict):
+            raise ValueError("Batch output contains a non-object entry")
+        tid = str(item.get("thread_id") or "")
+        if tid not in thread_ids or tid in results:
+            raise ValueError(f"Batch output has unexpected thread_id {tid!r}")
+        results[tid] = item
+    missing = [tid for tid in thread_ids if tid not in results]
+    if missing:
+        raise ValueError(f"Batch output is missing thread_ids {missing}")
+    return results
+
+
+def parse_judgment(text: str) -> dict:
+    """Parse (and repair) a single judgment object from raw LLM output."""
+    if "{" not in text and '"summary"' not in text:
+        raise ValueError(f"No JSON returned. Output: {text[:1000]}")
+    return json.loads(repair_json_output(text))
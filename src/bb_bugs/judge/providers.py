@@ -0,0 +1,284 @@
+
+import json
+import os
+import random
+import re
+import resource
+import shlex
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Protocol
+
+DEFAULT_LLM_COMMAND = ["bash", "-lc", "scripts/gemini_run.sh"]
+
+SpawnCallback = Callable[[subprocess.Popen], None]
+# Receives {"max_rss_mb", "cpu_s"} for the processes behind one complete() call.
+UsageCallback = Callable[[dict], None]
+
+
+class ProviderError(RuntimeError):
+    """The LLM call failed; the message carries the provider's error detail."""
+
+
+class LlmProvider(Protocol):
+    name: str
+
+    def complete(
+        self,
+        prompt: str,
+        *,
+        model: str,
+        on_spawn: SpawnCallback | None = None,
+        on_usage: UsageCallback | None = None,
+    ) -> str:
+        ...
+
+
+def terminate_process_group(proc: subprocess.Popen, grace_s: float = 2.0) -> None:
+    """SIGTERM the process group led by ``proc``, then SIGKILL it after ``grace_s``.
+
+    Does not reap ``proc``; the thread that started it does.
+    """
+    _signal_group(proc, signal.SIGTERM)
+    deadline = time.monotonic() + grace_s
+    while proc.returncode is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    if proc.returncode is None:
+        _signal_group(proc, signal.SIGKILL)
+
+
+def _signal_group(proc: subprocess.Popen, sig: int) -> None:
+    try:
+        os.killpg(proc.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _run_in_group(
+    proc: subprocess.Popen, prompt: str, timeout_s: float
+) -> tuple[str, str, bool, resource.struct_rusage]:
+    """Feed ``prompt`` to ``proc`` and reap it with os.wait4 for its rusage.
+
+    The whole process group is killed if it outlives ``timeout_s``. Returns
+    (stdout, stderr, timed_out, rusage); ``proc.returncode`` is set.
+    """
+    out: dict[str, str] = {}
+
+    def pump(name: str, stream) -> None:
+        out[name] = stream.read()
+
+    def feed() -> None:
+        try:
+            proc.stdin.write(prompt)
+            proc.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+
+    readers = [
+        threading.Thread(target=pump, args=("stdout", proc.stdout), daemon=True),
+        threading.Thread(target=pump, args=("stderr", proc.stderr), daemon=True),
+    ]
+    for thread in [threading.Thread(target=feed, daemon=True), *readers]:
+        thread.start()
+    deadline = time.monotonic() + timeout_s
+    timed_out = False
+    for reader in readers:
+        reader.join(max(0.0, deadline - time.monotonic()))
+        if reader.is_alive():
+            timed_out = True
+            break
+    if timed_out:
+        _signal_group(proc, signal.SIGKILL)
+    _, status, rusage = os.wait4(proc.pid, 0)
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # Grandchildren that inherited the pipes are gone with the group.
+    _signal_group(proc, signal.SIGKILL)
+    for reader in readers:
+        reader.join()
+    proc.stdout.close()
+    proc.stderr.close()
+    return out.get("stdout", ""), out.get("stderr", ""), timed_out, rusage
+
+
+@dataclass
+class SubprocessProvider:
+    """Pipe the prompt into a CLI wrapper such as scripts/gemini_run.sh.
+
+    Each attempt runs in its own process group, so a timeout or a cancel
+    (see terminate_process_group) takes the wrapper's children down too.
+    ``deadline_s`` bounds the wall-clock time of all attempts together.
+    """
+
+    command: list[str] = field(default_factory=lambda: list(DEFAULT_LLM_COMMAND))
+    timeout_s: float = 120.0
+    retries: int = 2
+    deadline_s: float | None = None
+    name: str = "subprocess"
+
+    def complete(
+        self,
+        prompt: str,
+        *,
+        model: str,
+        on_spawn: SpawnCallback | None = None,
+        on_usage: UsageCallback | None = None,
+    ) -> str:
+        env = os.environ.copy()
+        env["GEMINI_MODEL"] = model
+        deadline = time.monotonic() + self.deadline_s if self.deadline_s else None
+        usage = {"max_rss_mb": 0.0, "cpu_s": 0.0}
+        attempt = 0
+        try:
+            while True:
+                attempt_timeout = self.timeout_s * (2**attempt)
+                if deadline is not None:
+                    attempt_timeout = min(attempt_timeout, deadline - time.monotonic())
+                    if attempt_timeout <= 0:
+                        raise ProviderError(f"gemini timed out after the {self.deadline_s:.0f}s deadline")
+                proc = subprocess.Popen(
+                    self.command,
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.PIPE,
+                    text=True,
+                    env=env,
+                    start_new_session=True,
+                )
+                if on_spawn is not None:
+                    on_spawn(proc)
+                stdout, stderr, timed_out, rusage = _run_in_group(proc, prompt, attempt_timeout)
+                # ru_maxrss is in KiB on Linux and bytes on macOS.
+                rss_mb = rusage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+                usage["max_rss_mb"] = max(usage["max_rss_mb"], round(rss_mb, 1))
+                usage["cpu_s"] = round(usage["cpu_s"] + rusage.ru_utime + rusage.ru_stime, 3)
+                if timed_out:
+                    if attempt >= self.retries:
+                        raise ProviderError(f"gemini timed out after {attempt_timeout:.0f}s")
+                    attempt += 1
+                    continue
+                if proc.returncode == 0:
+                    return stdout.strip()
+                # Killed by a signal (e.g. the job was cancelled): don't retry.
+                if proc.returncode < 0 or attempt >= self.retries:
+                    raise ProviderError(stderr.strip() or stdout.strip() or "gemini failed")
+                attempt += 1
+        finally:
+            if on_usage is not None:
+                on_usage(usage)
+
+
+@dataclass
+class MockProvider:
+    """Sleep, then return a canned judgment; used for load testing."""
+
+    sleep_s: float = 2.0
+    jitter_s: float = 0.0
+    name: str = "mock"
+
+    def complete(
+        self,
+        prompt: str,
+        *,
+        model: str,
+        on_spawn: SpawnCallback | None = None,
+        on_usage: UsageCallback | None = None,
+    ) -> str:
+        delay = self.sleep_s
+        if self.jitter_s > 0:
+            delay += random.random() * self.jitter_s
+        time.sleep(max(0.0, delay))
+        thread_ids = re.findall(r"^thread_id: (\S+)", prompt, re.MULTILINE)
+        judgments = [
+            {
+                "thread_id": thread_id,
+                "summary": f"Mock summary for {thread_id}.",
+                "status_guess": "open",
+                "confidence": "low",
+                "evidence": [],
+                "duplicate_candidates": [],
+            }
+            for thread_id in thread_ids or [""]
+        ]
+        # Batch prompts carry several threads and expect a JSON array back.
+        return json.dumps(judgments if len(judgments) > 1 else judgments[0])
+
+
+@dataclass
+class HttpProvider:
+    """POST {"model", "prompt"} as JSON and read the completion back.
+
+    The response may be a JSON object with a "text" (or "output") field, or a
+    raw text body.
+    """
+
+    url: str
+    timeout_s: float = 120.0
+    name: str = "http"
+
+    def complete(
+        self,
+        prompt: str,
+        *,
+        model: str,
+        on_spawn: SpawnCallback | None = None,
+        on_usage: UsageCallback | None = None,
+    ) -> str:
+        # urllib.request pulls in http.client and ssl; only this provider needs them.
+        import urllib.error
+        import urllib.request
+
+        body = json.dumps({"model": model, "prompt": prompt}).encode("utf-8")
+        req = urllib.request.Request(
+            self.url, data=body, headers={"Content-Type": "application/json"}, method="POST"
+        )
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout_s) as resp:
+                raw = resp.read().decode("utf-8", errors="replace")
+        except urllib.error.HTTPError as exc:
+            detail = exc.read().decode("utf-8", errors="replace")
+            raise ProviderError(detail.strip() or f"LLM HTTP {exc.code}") from exc
+        except (urllib.error.URLError, TimeoutError) as exc:
+            raise ProviderError(f"LLM HTTP request failed: {exc}") from exc
+        try:
+            data = json.loads(raw)
+        except ValueError:
+            return raw.strip()
+        if isinstance(data, dict):
+            for key in ("text", "output"):
+                if isinstance(data.get(key), str):
+                    return data[key].strip()
+        return raw.strip()
+
+
+def get_provider(name: str | None = None) -> LlmProvider:
+    """Build the provider named by ``name`` or BB_JUDGE_PROVIDER.
+
+    BB_JUDGE_MODE=mock is still honoured as an alias for the mock provider.
+    """
+    name = (name or os.getenv("BB_JUDGE_PROVIDER", "")).lower()
+    if not name:
+        name = "mock" if os.getenv("BB_JUDGE_MODE", "").lower() == "mock" else "subprocess"
+    timeout_s = float(os.getenv("BB_JUDGE_LLM_TIMEOUT_S", "120"))
+    if name == "mock":
+        return MockProvider(
+            sleep_s=float(os.getenv("BB_JUDGE_SLEEP_S", "2.0")),
+            jitter_s=float(os.getenv("BB_JUDGE_SLEEP_JITTER_S", "0")),
+        )
+    if name == "http":
+        return HttpProvider(
+            url=os.getenv("BB_JUDGE_HTTP_URL", "http://127.0.0.1:8765/complete"),
+            timeout_s=timeout_s,
+        )
+    if name == "subprocess":
+        command = os.getenv("BB_JUDGE_LLM_CMD")
+        deadline_s = float(os.getenv("BB_JUDGE_LLM_DEADLINE_S", "600")) or None
+        return SubprocessProvider(
+            command=shlex.split(command) if command else list(DEFAULT_LLM_COMMAND),
+            timeout_s=timeout_s,
+            deadline_s=deadline_s,
+        )
+    raise ValueError(f"Unknown judge provider: {name}")
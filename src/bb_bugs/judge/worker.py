@@ -0,0 +1,1170 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import random
+import re
+import signal
+import socket
+import sqlite3
+import subprocess
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import Callable
+
+from bb_bugs import metrics
+from bb_bugs.judge import prompt as judge_prompt
+from bb_bugs.judge.providers import ProviderError, get_provider, terminate_process_group
+from bb_bugs.store import db as db_store
+from bb_bugs.store import schema
+
+LOG = logging.getLogger(__name__)
+
+DB_PATH = Path("data/bbs.sqlite")
+DB_BUSY_TIMEOUT_MS = int(os.getenv("BB_DB_BUSY_TIMEOUT_MS", "5000"))
+DB_POOL_SIZE = int(os.getenv("BB_DB_POOL_SIZE", "16"))
+RUNNING_JOBS: dict[str, subprocess.Popen[str]] = {}
+RUNNING_JOBS_LOCK = Lock()
+# Jobs one worker process runs at once; per-model caps below are global.
+MAX_JUDGE_INFLIGHT = int(os.getenv("BB_JUDGE_MAX_INFLIGHT", "8"))
+QUEUE_POLL_S = float(os.getenv("BB_JUDGE_QUEUE_POLL_S", "1.0"))
+# Jobs left running/starting without a lease (claimed before leases existed)
+# are reclaimed after this long.
+STUCK_JOB_S = float(os.getenv("BB_JUDGE_STUCK_S", "600"))
+# Every claim takes a lease (lease_owner / lease_expires_at) that the owning
+# process renews every HEARTBEAT_S; any worker reclaims jobs whose lease ran
+# out, so several worker processes can share one database.
+LEASE_S = float(os.getenv("BB_JUDGE_LEASE_S", "30"))
+HEARTBEAT_S = float(os.getenv("BB_JUDGE_HEARTBEAT_S", "2"))
+JUDGE_MAX_POSTS = 11
+# Estimated tokens of thread content per prompt (see judge_prompt.pack_posts).
+JUDGE_PROMPT_TOKENS = int(os.getenv("BB_JUDGE_PROMPT_TOKENS", str(judge_prompt.DEFAULT_TOKEN_BUDGET)))
+# BB_JUDGE_BATCH_SIZE > 1 packs several threads into one LLM call; the
+# in-flight limit still counts LLM calls, so up to MAX_JUDGE_INFLIGHT *
+# JUDGE_BATCH_SIZE jobs may be claimed at once.
+JUDGE_BATCH_SIZE = max(1, int(os.getenv("BB_JUDGE_BATCH_SIZE", "1")))
+JUDGE_BATCH_MAX_CHARS = int(os.getenv("BB_JUDGE_BATCH_MAX_CHARS", "24000"))
+JUDGE_BATCH_LINGER_S = float(os.getenv("BB_JUDGE_BATCH_LINGER_S", "0.5"))
+JUDGE_PROVIDER = get_provider()
+ORPHAN_CHECK_S = float(os.getenv("BB_JUDGE_ORPHAN_CHECK_S", "30"))
+# Set on enqueue and job completion so the dispatcher claims immediately;
+# QUEUE_POLL_S is only a fallback for changes made outside this process.
+DISPATCH_WAKE = Event()
+JOB_EVENTS_KEEP = int(os.getenv("BB_JOB_EVENTS_KEEP", "10000"))
+# Per-model in-flight caps as JSON, e.g. {"pro": 2, "flash": 6}; models not
+# listed are bounded only by MAX_JUDGE_INFLIGHT.
+MODEL_INFLIGHT_LIMITS: dict[str, int] = {
+    str(model): int(limit)
+    for model, limit in json.loads(os.getenv("BB_JUDGE_MODEL_LIMITS") or "{}").items()
+}
+# While a model's quota is exhausted its queued jobs are re-routed to its
+# fallback, e.g. {"pro": "flash"}; models without one (or whose fallback is
+# exhausted too) are parked until the reset time.
+FALLBACK_MODELS: dict[str, str] = json.loads(os.getenv("BB_JUDGE_FALLBACK_MODELS") or "{}")
+# How long to park a model whose quota error carried no reset time.
+QUOTA_PARK_S = float(os.getenv("BB_JUDGE_QUOTA_PARK_S", "900"))
+# Failed jobs are retried up to JUDGE_MAX_ATTEMPTS tries in all, then marked
+# "dead". Backoff per error class is (base_s, cap_s), doubling per attempt;
+# classes not listed fail straight to "error".
+JUDGE_MAX_ATTEMPTS = max(1, int(os.getenv("BB_JUDGE_MAX_ATTEMPTS", "4")))
+RETRY_POLICY: dict[str, tuple[float, float]] = {
+    "timeout": (30.0, 600.0),
+    "parse": (5.0, 120.0),
+    "crash": (10.0, 300.0),
+    "provider": (15.0, 300.0),
+}
+# Identifies this process in llm_jobs.lease_owner.
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+# Called with the writer's connection after every committed job transition;
+# the API registers its SSE fan-out here.
+JOB_LISTENERS: list[Callable[[sqlite3.Connection], None]] = []
+
+JOB_PHASE_SECONDS = metrics.REGISTRY.histogram(
+    "bb_judge_job_phase_seconds",
+    "Judge job latency by phase: queue (queued to claimed), spawn (picked up to "
+    "LLM process started), llm and parse.",
+    ("phase",),
+    metrics.JOB_BUCKETS,
+)
+
+
+def get_conn() -> sqlite3.Connection:
+    conn = db_store.connect_db(db_store.DbConfig(path=DB_PATH), check_same_thread=False)
+    conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+    return conn
+
+
+class ConnectionPool:
+    """Reuse SQLite connections across judge jobs.
+
+    Connections are created on demand and at most ``size`` idle ones are
+    kept; callers never block waiting for a free connection.
+    """
+
+    def __init__(self, size: int) -> None:
+        self._idle: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+        self._size = size
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return get_conn()
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        if self._idle.qsize() >= self._size:
+            conn.close()
+            return
+        self._idle.put(conn)
+
+    def close_all(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+DB_POOL = ConnectionPool(DB_POOL_SIZE)
+
+
+def _notify(conn: sqlite3.Connection) -> None:
+    for listener in JOB_LISTENERS:
+        listener(conn)
+
+
+def set_job_status(
+    conn: sqlite3.Connection,
+    thread_id: str,
+    status: str,
+    *,
+    dry_run: bool | None = None,
+    model: str | None = None,
+    force: bool | None = None,
+    priority: int | None = None,
+    attempts: int | None = None,
+    next_attempt_at: str | None = None,
+    error: str | None = None,
+    started_at: str | None = None,
+    finished_at: str | None = None,
+    owner: str | None = None,
+) -> bool:
+    """Upsert a job's status; with ``owner``, only while that worker holds its lease.
+
+    Returns whether the row was written.
+    """
+    cur = conn.execute(
+        """
+        INSERT INTO llm_jobs (
+          thread_id, status, dry_run, model, force, priority, attempts, next_attempt_at,
+          error, started_at, finished_at, updated_at
+        )
+        VALUES (?, ?, ?, ?, ?, COALESCE(?, 0), COALESCE(?, 0), ?, ?, ?, ?, ?)
+        ON CONFLICT(thread_id) DO UPDATE SET
+          status=excluded.status,
+          dry_run=COALESCE(excluded.dry_run, llm_jobs.dry_run),
+          model=COALESCE(excluded.model, llm_jobs.model),
+          force=COALESCE(excluded.force, llm_jobs.force),
+          priority=COALESCE(?, llm_jobs.priority),
+          attempts=COALESCE(?, llm_jobs.attempts),
+          next_attempt_at=excluded.next_attempt_at,
+          error=excluded.error,
+          started_at=COALESCE(excluded.started_at, llm_jobs.started_at),
+          finished_at=excluded.finished_at,
+          updated_at=excluded.updated_at,
+          lease_owner=CASE WHEN excluded.status IN ('starting', 'running') THEN llm_jobs.lease_owner END,
+          lease_expires_at=CASE WHEN excluded.status IN ('starting', 'running') THEN llm_jobs.lease_expires_at END
+        WHERE ? IS NULL OR llm_jobs.lease_owner = ?
+        """,
+        (
+            thread_id,
+            status,
+            1 if dry_run else (0 if dry_run is False else None),
+            model,
+            1 if force else (0 if force is False else None),
+            priority,
+            attempts,
+            next_attempt_at,
+            error,
+            started_at,
+            finished_at,
+            datetime.utcnow().isoformat(),
+            priority,
+            attempts,
+            owner,
+            owner,
+        ),
+    )
+    conn.commit()
+    if cur.rowcount == 0:
+        return False
+    _notify(conn)
+    return True
+
+
+def count_inflight(conn: sqlite3.Connection) -> int:
+    row = conn.execute(
+        "SELECT COUNT(*) AS cnt FROM llm_jobs WHERE status IN ('running', 'starting')"
+    ).fetchone()
+    return int(row["cnt"]) if row else 0
+
+
+def summarize_llm_error(detail: str) -> str:
+    text = (detail or "").lower()
+    if "terminalquotaerror" in text or "exhausted your capacity" in text or "quota" in text:
+        return "LLM quota exhausted; try later"
+    if "timed out" in text or "timeout" in text:
+        return "LLM timed out; try later"
+    if "unexpected eof" in text and "bash" in text:
+        return "LLM prompt shell error"
+    return detail[:500]
+
+
+def classify_llm_error(detail: str) -> str:
+    """Error class for RETRY_POLICY, following summarize_llm_error's buckets."""
+    summary = summarize_llm_error(detail)
+    if summary == "LLM quota exhausted; try later":
+        return "quota"
+    if summary == "LLM timed out; try later":
+        return "timeout"
+    if summary == "LLM prompt shell error":
+        return "shell"
+    if detail.startswith("LLM job crashed") or detail.startswith("LLM job orphaned"):
+        return "crash"
+    if detail.startswith("No JSON returned"):
+        return "parse"
+    return "provider"
+
+
+def is_quota_error(detail: str) -> bool:
+    text = (detail or "").lower()
+    return "quota" in text or "exhausted your capacity" in text or "terminalquotaerror" in text
+
+
+def _parse_quota_reset(detail: str) -> str | None:
+    match = re.search(r"reset after\s+((\d+h)?(\d+m)?(\d+s)?)", detail, re.IGNORECASE)
+    if not match:
+        return None
+    token = match.group(1)
+    hours = re.search(r"(\d+)h", token)
+    minutes = re.search(r"(\d+)m", token)
+    seconds = re.search(r"(\d+)s", token)
+    total = 0
+    if hours:
+        total += int(hours.group(1)) * 3600
+    if minutes:
+        total += int(minutes.group(1)) * 60
+    if seconds:
+        total += int(seconds.group(1))
+    if total <= 0:
+        return None
+    reset_at = datetime.now(timezone.utc) + timedelta(seconds=total)
+    return reset_at.replace(microsecond=0).isoformat().replace("+00:00", "Z")
+
+
+def _parse_quota_reset_from_report(detail: str) -> str | None:
+    match = re.search(r"Full report available at:\\s*(/\\S+\\.json)", detail)
+    path = Path(match.group(1)) if match else None
+    if path is None or not path.exists():
+        try:
+            candidates = list(Path("/tmp").glob("gemini-client-error-*.json"))
+            if not candidates:
+                return None
+            path = max(candidates, key=lambda p: p.stat().st_mtime)
+            if (datetime.now(timezone.utc).timestamp() - path.stat().st_mtime) > 180:
+                return None
+        except Exception:
+            return None
+    try:
+        payload = json.loads(path.read_text())
+    except Exception:
+        return None
+    message = None
+    if isinstance(payload, dict):
+        if isinstance(payload.get("message"), str):
+            message = payload.get("message")
+        elif isinstance(payload.get("message"), dict) and isinstance(payload["message"].get("message"), str):
+            message = payload["message"]["message"]
+        elif isinstance(payload.get("error"), dict) and isinstance(payload["error"].get("message"), str):
+            message = payload["error"]["message"]
+        elif isinstance(payload.get("error"), str):
+            message = payload.get("error")
+    if not message:
+        return None
+    return _parse_quota_reset(message)
+
+
+def _set_state(conn: sqlite3.Connection, key: str, value: str | None) -> None:
+    conn.execute(
+        """
+        INSERT INTO llm_state (key, value, updated_at)
+        VALUES (?, ?, ?)
+        ON CONFLICT(key) DO UPDATE SET value=excluded.value, updated_at=excluded.updated_at
+        """,
+        (key, value, datetime.utcnow().isoformat()),
+    )
+    conn.commit()
+
+
+def _set_quota_state(conn: sqlite3.Connection, model: str, message: str, reset_at: str | None) -> None:
+    now = datetime.now(timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+    _set_state(conn, f"quota_exhausted_at:{model}", now)
+    _set_state(conn, f"quota_exhausted_message:{model}", message)
+    if reset_at:
+        _set_state(conn, f"quota_reset_at:{model}", reset_at)
+
+
+def _clear_quota_state(conn: sqlite3.Connection, model: str) -> None:
+    conn.execute(
+        "DELETE FROM llm_state WHERE key IN (?, ?, ?)",
+        (f"quota_exhausted_at:{model}", f"quota_exhausted_message:{model}", f"quota_reset_at:{model}"),
+    )
+    conn.commit()
+
+
+def quota_blocks(conn: sqlite3.Connection) -> dict[str, datetime]:
+    """Exhausted models mapped to when their jobs may run again.
+
+    Entries whose reset time has passed are cleared.
+    """
+    rows = conn.execute(
+        "SELECT key, value FROM llm_state WHERE key LIKE 'quota_exhausted_at:%' OR key LIKE 'quota_reset_at:%'"
+    ).fetchall()
+    exhausted: dict[str, str] = {}
+    resets: dict[str, str] = {}
+    for row in rows:
+        kind, model = row["key"].split(":", 1)
+        (exhausted if kind == "quota_exhausted_at" else resets)[model] = row["value"]
+    now = datetime.now(timezone.utc)
+    blocks: dict[str, datetime] = {}
+    for model, exhausted_at in exhausted.items():
+        try:
+            if model in resets:
+                until = datetime.fromisoformat(resets[model])
+            else:
+                until = datetime.fromisoformat(exhausted_at) + timedelta(seconds=QUOTA_PARK_S)
+        except (TypeError, ValueError):
+            until = now + timedelta(seconds=QUOTA_PARK_S)
+        if until <= now:
+            _clear_quota_state(conn, model)
+            continue
+        blocks[model] = until
+    return blocks
+
+
+def quota_routes(blocks: dict[str, datetime]) -> dict[str, str | None]:
+    """Exhausted models mapped to a usable fallback, or None to park them."""
+    routes: dict[str, str | None] = {}
+    for model in blocks:
+        target = FALLBACK_MODELS.get(model)
+        seen = {model}
+        while target in blocks and target not in seen:
+            seen.add(target)
+            target = FALLBACK_MODELS.get(target)
+        routes[model] = None if target in seen or target in blocks else target
+    return routes
+
+
+def wake() -> None:
+    DISPATCH_WAKE.set()
+
+
+def claim_jobs(
+    conn: sqlite3.Connection,
+    max_jobs: int,
+    slot_jobs: int = 1,
+    *,
+    quota_blocks: dict[str, datetime] | None = None,
+) -> list[dict]:
+    """Claim queued jobs for every free slot in a single UPDATE ... RETURNING.
+
+    Higher priority goes first. Each model is held to its
+    MODEL_INFLIGHT_LIMITS cap (times ``slot_jobs``, the jobs one LLM call
+    may carry), and within a priority the models take turns: the n-th job
+    of every model is claimed before any model's (n+1)-th. Jobs for models
+    in ``quota_blocks`` are claimed under their fallback model (which is
+    written back to the row) or left queued, and retries wait for their
+    next_attempt_at. ``max_jobs`` bounds what this worker holds; the model
+    caps count every worker's jobs. Claimed rows are leased to WORKER_ID.
+    """
+    routes = quota_routes(quota_blocks or {})
+    now = datetime.utcnow().isoformat()
+    lease_until = (datetime.utcnow() + timedelta(seconds=LEASE_S)).isoformat()
+    rows = conn.execute(
+        """
+        WITH caps AS (
+          SELECT key AS model, value * ? AS cap FROM json_each(?)
+        ),
+        routes AS (
+          SELECT key AS model, value AS target FROM json_each(?)
+        ),
+        busy AS (
+          SELECT model, COUNT(*) AS n
+          FROM llm_jobs
+          WHERE status IN ('running', 'starting')
+          GROUP BY model
+        ),
+        routed AS (
+          SELECT j.thread_id, j.priority, j.updated_at, COALESCE(rt.target, j.model) AS model
+          FROM llm_jobs j
+          LEFT JOIN routes rt ON rt.model = j.model
+          WHERE j.status = 'queued'
+            AND (j.next_attempt_at IS NULL OR j.next_attempt_at <= ?)
+            AND (rt.model IS NULL OR rt.target IS NOT NULL)
+        ),
+        ranked AS (
+          SELECT thread_id, model, priority, updated_at,
+                 ROW_NUMBER() OVER (
+                   PARTITION BY model ORDER BY priority DESC, updated_at ASC
+                 ) AS model_rank,
+                 ROW_NUMBER() OVER (
+                   PARTITION BY model, priority ORDER BY updated_at ASC
+                 ) AS turn
+          FROM routed
+        )
+        UPDATE llm_jobs
+        SET status = 'starting',
+            queued_at = updated_at,
+            lease_owner = ?,
+            lease_expires_at = ?,
+            model = COALESCE((SELECT target FROM routes WHERE routes.model = llm_jobs.model), model),
+            updated_at = ?
+        WHERE status = 'queued'
+          AND thread_id IN (
+            SELECT r.thread_id
+            FROM ranked r
+            LEFT JOIN caps c ON c.model = r.model
+            LEFT JOIN busy b ON b.model = r.model
+            WHERE c.cap IS NULL OR r.model_rank <= c.cap - COALESCE(b.n, 0)
+            ORDER BY r.priority DESC, r.turn ASC, r.updated_at ASC
+            LIMIT max(0, ? - (
+              SELECT COUNT(*) FROM llm_jobs
+              WHERE status IN ('running', 'starting') AND lease_owner = ?
+            ))
+          )
+        RETURNING thread_id, dry_run, model, force, queued_at
+        """,
+        (
+            slot_jobs,
+            json.dumps(MODEL_INFLIGHT_LIMITS),
+            json.dumps(routes),
+            now,
+            WORKER_ID,
+            lease_until,
+            now,
+            max_jobs,
+            WORKER_ID,
+        ),
+    ).fetchall()
+    conn.commit()
+    if rows:
+        _notify(conn)
+    claimed_at = datetime.fromisoformat(now)
+    for row in rows:
+        if row["queued_at"]:
+            wait = claimed_at - datetime.fromisoformat(row["queued_at"])
+            JOB_PHASE_SECONDS.observe(max(0.0, wait.total_seconds()), phase="queue")
+    return [
+        {
+            "thread_id": row["thread_id"],
+            "dry_run": bool(row["dry_run"]),
+            "model": row["model"],
+            "force": bool(row["force"]),
+        }
+        for row in rows
+    ]
+
+
+def _group_batches(claims: list[dict]) -> list[tuple[list[str], dict]]:
+    groups: dict[tuple[bool, str | None, bool], list[str]] = {}
+    for claim in claims:
+        key = (claim["dry_run"], claim["model"], claim["force"])
+        groups.setdefault(key, []).append(claim["thread_id"])
+    batches = []
+    for (dry_run, model, force), thread_ids in groups.items():
+        for i in range(0, len(thread_ids), JUDGE_BATCH_SIZE):
+            batches.append(
+                (
+                    thread_ids[i : i + JUDGE_BATCH_SIZE],
+                    {"dry_run": dry_run, "model": model, "force": force},
+                )
+            )
+    return batches
+
+
+def dispatch_loop() -> None:
+    conn = None
+    last_cleanup = 0.0
+    wait_s = QUEUE_POLL_S
+    while True:
+        DISPATCH_WAKE.wait(timeout=wait_s)
+        DISPATCH_WAKE.clear()
+        wait_s = QUEUE_POLL_S
+        try:
+            if conn is None:
+                conn = get_conn()
+            if time.monotonic() - last_cleanup >= ORPHAN_CHECK_S:
+                _reclaim_expired_leases(conn)
+                _prune_job_events(conn)
+                last_cleanup = time.monotonic()
+            blocks = quota_blocks(conn)
+            if blocks:
+                # Wake up right at the earliest reset to resume parked jobs.
+                until_reset = min(blocks.values()) - datetime.now(timezone.utc)
+                wait_s = min(wait_s, max(0.0, until_reset.total_seconds()))
+            next_retry = conn.execute(
+                "SELECT MIN(next_attempt_at) FROM llm_jobs WHERE status = 'queued' AND next_attempt_at > ?",
+                (datetime.utcnow().isoformat(),),
+            ).fetchone()[0]
+            if next_retry:
+                until_retry = datetime.fromisoformat(next_retry) - datetime.utcnow()
+                wait_s = min(wait_s, max(0.0, until_retry.total_seconds()))
+            if JUDGE_BATCH_SIZE == 1:
+                for claim in claim_jobs(conn, MAX_JUDGE_INFLIGHT, quota_blocks=blocks):
+                    worker = Thread(
+                        target=run_judge_job,
+                        args=(claim["thread_id"],),
+                        kwargs={"dry_run": claim["dry_run"], "model": claim["model"], "force": claim["force"]},
+                        daemon=True,
+                    )
+                    worker.start()
+                continue
+            # Let a burst of enqueues accumulate so batches fill up.
+            time.sleep(JUDGE_BATCH_LINGER_S)
+            claims = claim_jobs(
+                conn,
+                MAX_JUDGE_INFLIGHT * JUDGE_BATCH_SIZE,
+                JUDGE_BATCH_SIZE,
+                quota_blocks=blocks,
+            )
+            for thread_ids, options in _group_batches(claims):
+                worker = Thread(
+                    target=run_judge_batch,
+                    args=(thread_ids,),
+                    kwargs=options,
+                    daemon=True,
+                )
+                worker.start()
+        except Exception:
+            if conn is not None:
+                conn.close()
+                conn = None
+            time.sleep(QUEUE_POLL_S)
+
+
+def _reclaim_expired_leases(conn: sqlite3.Connection) -> None:
+    """Take over jobs whose worker stopped renewing its lease.
+
+    The takeover is one UPDATE ... RETURNING, so when several workers look
+    at once each job is reclaimed by exactly one of them. Jobs that never
+    started go back to the queue; running ones count as a crashed attempt.
+    """
+    now = datetime.utcnow()
+    rows = conn.execute(
+        """
+        UPDATE llm_jobs
+        SET lease_owner = ?, lease_expires_at = ?
+        WHERE status IN ('running', 'starting')
+          AND (
+            lease_expires_at < ?
+            OR (lease_expires_at IS NULL AND COALESCE(started_at, updated_at) < ?)
+          )
+        RETURNING thread_id, status, model, lease_owner
+        """,
+        (
+            WORKER_ID,
+            (now + timedelta(seconds=LEASE_S)).isoformat(),
+            now.isoformat(),
+            (now - timedelta(seconds=STUCK_JOB_S)).isoformat(),
+        ),
+    ).fetchall()
+    conn.commit()
+    for row in rows:
+        if row["status"] == "starting":
+            set_job_status(conn, row["thread_id"], "queued", owner=WORKER_ID)
+        else:
+            fail_job(conn, row["thread_id"], row["model"] or "auto", "LLM job orphaned; worker lease expired")
+
+
+def _heartbeat(conn: sqlite3.Connection) -> None:
+    """Renew this worker's leases and stop local jobs it no longer holds.
+
+    That covers jobs cancelled through the API (which clears the lease) and
+    jobs another worker reclaimed after our lease ran out.
+    """
+    conn.execute(
+        """
+        UPDATE llm_jobs SET lease_expires_at = ?
+        WHERE lease_owner = ? AND status IN ('running', 'starting')
+        """,
+        ((datetime.utcnow() + timedelta(seconds=LEASE_S)).isoformat(), WORKER_ID),
+    )
+    conn.commit()
+    with RUNNING_JOBS_LOCK:
+        running = list(RUNNING_JOBS)
+    if not running:
+        return
+    lost = conn.execute(
+        """
+        SELECT value AS thread_id FROM json_each(?)
+        WHERE value NOT IN (
+          SELECT thread_id FROM llm_jobs
+          WHERE lease_owner = ? AND status IN ('running', 'starting')
+        )
+        """,
+        (json.dumps(running), WORKER_ID),
+    ).fetchall()
+    for row in lost:
+        # terminate_process_group waits out a grace period; don't stall heartbeats.
+        Thread(target=terminate_running_job, args=(row["thread_id"],), daemon=True).start()
+
+
+def _heartbeat_loop() -> None:
+    conn = None
+    while True:
+        time.sleep(HEARTBEAT_S)
+        try:
+            if conn is None:
+                conn = get_conn()
+            _heartbeat(conn)
+        except Exception:
+            if conn is not None:
+                conn.close()
+                conn = None
+
+
+def _prune_job_events(conn: sqlite3.Connection) -> None:
+    conn.execute(
+        "DELETE FROM llm_job_events WHERE seq <= (SELECT MAX(seq) FROM llm_job_events) - ?",
+        (JOB_EVENTS_KEEP,),
+    )
+    conn.commit()
+
+
+def _register_running_proc(thread_ids: list[str], proc: subprocess.Popen, t_start: float) -> None:
+    with RUNNING_JOBS_LOCK:
+        # Retries replace the registered process; only the first spawn counts.
+        if thread_ids[0] not in RUNNING_JOBS:
+            JOB_PHASE_SECONDS.observe(time.monotonic() - t_start, phase="spawn")
+        for thread_id in thread_ids:
+            RUNNING_JOBS[thread_id] = proc
+
+
+def fail_job(
+    conn: sqlite3.Connection,
+    thread_id: str,
+    model: str,
+    detail: str,
+    *,
+    error_class: str | None = None,
+) -> bool:
+    """Record a failed attempt: requeue, back off and retry, or give up.
+
+    Quota failures go straight back to the queue without counting as an
+    attempt; the quota state recorded here parks the model (or re-routes
+    its jobs) on the next claim. Classes in RETRY_POLICY are requeued with
+    a jittered exponential ``next_attempt_at`` until JUDGE_MAX_ATTEMPTS,
+    then marked "dead"; anything else ends as "error". Every write is
+    fenced on this worker's lease; returns False if the lease was lost.
+    """
+    error = summarize_llm_error(detail)
+    error_class = error_class or classify_llm_error(detail)
+    if error_class == "quota":
+        reset_at = _parse_quota_reset(detail) or _parse_quota_reset_from_report(detail)
+        _set_quota_state(conn, model, error, reset_at)
+        return _lease_kept(set_job_status(conn, thread_id, "queued", error=error, owner=WORKER_ID), thread_id)
+    policy = RETRY_POLICY.get(error_class)
+    if policy is None:
+        return _lease_kept(
+            set_job_status(
+                conn,
+                thread_id,
+                "error",
+                error=error,
+                finished_at=datetime.utcnow().isoformat(),
+                owner=WORKER_ID,
+            ),
+            thread_id,
+        )
+    row = conn.execute("SELECT attempts FROM llm_jobs WHERE thread_id = ?", (thread_id,)).fetchone()
+    attempts = (row["attempts"] if row else 0) + 1
+    if attempts >= JUDGE_MAX_ATTEMPTS:
+        return _lease_kept(
+            set_job_status(
+                conn,
+                thread_id,
+                "dead",
+                attempts=attempts,
+                error=f"{error} (gave up after {attempts} attempts)",
+                finished_at=datetime.utcnow().isoformat(),
+                owner=WORKER_ID,
+            ),
+            thread_id,
+        )
+    base_s, cap_s = policy
+    delay_s = min(cap_s, base_s * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+    return _lease_kept(
+        set_job_status(
+            conn,
+            thread_id,
+            "queued",
+            attempts=attempts,
+            next_attempt_at=(datetime.utcnow() + timedelta(seconds=delay_s)).isoformat(),
+            error=f"{error} (retry {attempts}/{JUDGE_MAX_ATTEMPTS - 1})",
+            owner=WORKER_ID,
+        ),
+        thread_id,
+    )
+
+
+def _lease_kept(written: bool, thread_id: str) -> bool:
+    if not written:
+        LOG.warning("job %s: lease lost (cancelled or reclaimed by another worker); result dropped", thread_id)
+    return written
+
+
+def _skip_missing_thread(conn: sqlite3.Connection, thread_id: str, exc: Exception) -> None:
+    # Not a crash: a retry cannot bring the thread back, so don't back off
+    # and retry it until it goes dead.
+    _lease_kept(
+        set_job_status(
+            conn,
+            thread_id,
+            "skipped",
+            error=str(exc),
+            finished_at=datetime.utcnow().isoformat(),
+            owner=WORKER_ID,
+        ),
+        thread_id,
+    )
+
+
+def _start_job(conn: sqlite3.Connection, thread_id: str) -> bool:
+    """Move a job this worker claimed from 'starting' to 'running'.
+
+    False if it was cancelled or reclaimed in the meantime; the caller must
+    then leave it alone.
+    """
+    now = datetime.utcnow().isoformat()
+    cur = conn.execute(
+        """
+        UPDATE llm_jobs
+        SET status = 'running', error = NULL, next_attempt_at = NULL,
+            started_at = ?, finished_at = NULL, updated_at = ?
+        WHERE thread_id = ? AND status = 'starting' AND lease_owner = ?
+        """,
+        (now, now, thread_id, WORKER_ID),
+    )
+    conn.commit()
+    if cur.rowcount != 1:
+        return False
+    _notify(conn)
+    return True
+
+
+def _finish_job(
+    conn: sqlite3.Connection,
+    thread_id: str,
+    *,
+    timings: dict | None = None,
+    payload: dict | None = None,
+    model: str | None = None,
+    content_hash: str | None = None,
+) -> bool:
+    """Mark a running job done, with its metrics and judgment, in one transaction.
+
+    Nothing is written unless this worker still holds the job's lease.
+    """
+    now = datetime.utcnow().isoformat()
+    cur = conn.execute(
+        """
+        UPDATE llm_jobs
+        SET status = 'done', error = NULL, next_attempt_at = NULL, finished_at = ?, updated_at = ?,
+            lease_owner = NULL, lease_expires_at = NULL
+        WHERE thread_id = ? AND status = 'running' AND lease_owner = ?
+        """,
+        (now, now, thread_id, WORKER_ID),
+    )
+    if cur.rowcount != 1:
+        conn.rollback()
+        return _lease_kept(False, thread_id)
+    if timings is not None:
+        _store_job_metrics(conn, thread_id, timings)
+    if payload is not None:
+        _store_judgment(conn, thread_id, payload, model or "auto", content_hash)
+    conn.commit()
+    _notify(conn)
+    return True
+
+
+def _store_job_metrics(conn: sqlite3.Connection, thread_id: str, timings: dict) -> None:
+    conn.execute(
+        """
+        INSERT INTO llm_job_metrics (thread_id, timings_json, created_at, updated_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(thread_id) DO UPDATE SET
+          timings_json=excluded.timings_json,
+          updated_at=excluded.updated_at
+        """,
+        (
+            thread_id,
+            json.dumps(timings),
+            datetime.utcnow().isoformat(),
+            datetime.utcnow().isoformat(),
+        ),
+    )
+
+
+def _store_judgment(
+    conn: sqlite3.Connection, thread_id: str, payload: dict, model: str, content_hash: str | None
+) -> None:
+    conn.execute(
+        """
+        INSERT INTO llm_judgments (thread_id, summary, status_guess, confidence, evidence, duplicates, model, created_at, content_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(thread_id) DO UPDATE SET
+          summary=excluded.summary,
+          status_guess=excluded.status_guess,
+          confidence=excluded.confidence,
+          evidence=excluded.evidence,
+          duplicates=excluded.duplicates,
+          model=excluded.model,
+          created_at=excluded.created_at,
+          content_hash=excluded.content_hash
+        """,
+        (
+            thread_id,
+            payload.get("summary"),
+            payload.get("status_guess"),
+            payload.get("confidence"),
+            json.dumps(payload.get("evidence", [])),
+            json.dumps(payload.get("duplicate_candidates", [])),
+            model,
+            datetime.utcnow().isoformat(),
+            content_hash,
+        ),
+    )
+
+
+def _stored_judgment_hash(conn: sqlite3.Connection, thread_id: str) -> str | None:
+    row = conn.execute(
+        "SELECT content_hash FROM llm_judgments WHERE thread_id = ?", (thread_id,)
+    ).fetchone()
+    return row["content_hash"] if row else None
+
+
+def _judgment_hash(thread: dict, model: str, template: str) -> str:
+    return judge_prompt.judgment_hash(thread, model, provider=JUDGE_PROVIDER.name, template=template)
+
+
+def _reusable_judgment(conn: sqlite3.Connection, thread: dict, model: str) -> bool:
+    """Whether the stored judgment was made from this exact prompt input.
+
+    Judgments from single-thread prompts are always reused; batch ones only
+    while batching is on.
+    """
+    stored = _stored_judgment_hash(conn, thread["thread_id"])
+    if not stored:
+        return False
+    templates = ("single", "batch") if JUDGE_BATCH_SIZE > 1 else ("single",)
+    return any(stored == _judgment_hash(thread, model, template) for template in templates)
+
+
+def judgment_cache_hit(conn: sqlite3.Connection, thread_id: str, model: str) -> bool:
+    if not _stored_judgment_hash(conn, thread_id):
+        return False
+    try:
+        thread = judge_prompt.load_thread(
+            conn, thread_id, max_posts=JUDGE_MAX_POSTS, token_budget=JUDGE_PROMPT_TOKENS
+        )
+    except RuntimeError:
+        return False
+    return _reusable_judgment(conn, thread, model)
+
+
+def _job_cancelled(conn: sqlite3.Connection, thread_id: str) -> bool:
+    row = conn.execute(
+        "SELECT status FROM llm_jobs WHERE thread_id = ?", (thread_id,)
+    ).fetchone()
+    return bool(row and row["status"] == "cancelled")
+
+
+def run_judge_job(
+    thread_id: str, *, dry_run: bool = False, model: str | None = None, force: bool = False
+) -> None:
+    conn = DB_POOL.acquire()
+    model = model or "auto"
+    try:
+        t_run_start = time.monotonic()
+        if not _start_job(conn, thread_id):
+            return
+        thread = judge_prompt.load_thread(
+            conn, thread_id, max_posts=JUDGE_MAX_POSTS, token_budget=JUDGE_PROMPT_TOKENS
+        )
+        content_hash = _judgment_hash(thread, model, "single")
+        if not force and not dry_run and _reusable_judgment(conn, thread, model):
+            _finish_job(conn, thread_id)
+            return
+        t_load = time.monotonic()
+        prompt = judge_prompt.build_prompt(thread)
+        t_prompt = time.monotonic()
+        usage: dict = {}
+        try:
+            output = JUDGE_PROVIDER.complete(
+                prompt,
+                model=model,
+                on_spawn=lambda proc: _register_running_proc([thread_id], proc, t_run_start),
+                on_usage=usage.update,
+            )
+        finally:
+            with RUNNING_JOBS_LOCK:
+                RUNNING_JOBS.pop(thread_id, None)
+        t_llm = time.monotonic()
+        if _job_cancelled(conn, thread_id):
+            return
+        payload = judge_prompt.parse_judgment(output)
+        t_parse = time.monotonic()
+        JOB_PHASE_SECONDS.observe(t_llm - t_prompt, phase="llm")
+        JOB_PHASE_SECONDS.observe(t_parse - t_llm, phase="parse")
+        payload["thread_id"] = thread_id
+        finished = _finish_job(
+            conn,
+            thread_id,
+            timings={
+                "load_s": round(t_load - t_run_start, 6),
+                "prompt_s": round(t_prompt - t_load, 6),
+                "llm_s": round(t_llm - t_prompt, 6),
+                "parse_s": round(t_parse - t_llm, 6),
+                "total_s": round(t_parse - t_run_start, 6),
+                "process_s": round(t_parse - t_run_start, 6),
+                "prompt_chars": len(prompt),
+                "prompt_tokens": judge_prompt.estimate_tokens(prompt),
+                **usage,
+            },
+            payload=None if dry_run else payload,
+            model=model,
+            content_hash=content_hash,
+        )
+        if finished:
+            _clear_quota_state(conn, model)
+    except ProviderError as exc:
+        if not _job_cancelled(conn, thread_id):
+            fail_job(conn, thread_id, model, str(exc)[:2000])
+    except ValueError as exc:
+        fail_job(conn, thread_id, model, str(exc), error_class="parse")
+    except judge_prompt.ThreadNotFound as exc:
+        _skip_missing_thread(conn, thread_id, exc)
+    except Exception as exc:
+        fail_job(conn, thread_id, model, f"LLM job crashed: {exc}")
+    finally:
+        DB_POOL.release(conn)
+        wake()
+
+
+def run_judge_batch(
+    thread_ids: list[str], *, dry_run: bool = False, model: str | None = None, force: bool = False
+) -> None:
+    """Judge several threads with one LLM call.
+
+    Threads whose batch fails to parse (or errors for a non-quota reason)
+    are retried one by one with run_judge_job.
+    """
+    if len(thread_ids) == 1:
+        run_judge_job(thread_ids[0], dry_run=dry_run, model=model, force=force)
+        return
+    model = model or "auto"
+    retry_single: list[str] = []
+    conn = DB_POOL.acquire()
+    try:
+        t_run_start = time.monotonic()
+        threads = []
+        hashes: dict[str, str] = {}
+        for thread_id in thread_ids:
+            if not _start_job(conn, thread_id):
+                continue
+            try:
+                thread = judge_prompt.load_thread(
+                    conn, thread_id, max_posts=JUDGE_MAX_POSTS, token_budget=JUDGE_PROMPT_TOKENS
+                )
+            except judge_prompt.ThreadNotFound as exc:
+                _skip_missing_thread(conn, thread_id, exc)
+                continue
+            except Exception as exc:
+                fail_job(conn, thread_id, model, f"LLM job crashed: {exc}")
+                continue
+            hashes[thread_id] = _judgment_hash(thread, model, "batch")
+            if not force and not dry_run and _reusable_judgment(conn, thread, model):
+                _finish_job(conn, thread_id)
+                continue
+            threads.append(thread)
+        t_load = time.monotonic()
+        batches = judge_prompt.pack_batches(
+            threads, max_chars=JUDGE_BATCH_MAX_CHARS, max_threads=JUDGE_BATCH_SIZE
+        )
+        for batch in batches:
+            ids = [thread["thread_id"] for thread in batch]
+            if len(ids) == 1:
+                retry_single.extend(ids)
+                continue
+            t_prompt_start = time.monotonic()
+            prompt = judge_prompt.build_batch_prompt(batch)
+            t_prompt = time.monotonic()
+            usage: dict = {}
+            try:
+                output = JUDGE_PROVIDER.complete(
+                    prompt,
+                    model=model,
+                    on_spawn=lambda proc, ids=ids: _register_running_proc(ids, proc, t_run_start),
+                    on_usage=usage.update,
+                )
+            except ProviderError as exc:
+                detail = str(exc)[:2000]
+                live = [tid for tid in ids if not _job_cancelled(conn, tid)]
+                if is_quota_error(detail):
+                    for tid in live:
+                        fail_job(conn, tid, model, detail)
+                else:
+                    retry_single.extend(live)
+                continue
+            finally:
+                with RUNNING_JOBS_LOCK:
+                    for tid in ids:
+                        RUNNING_JOBS.pop(tid, None)
+            t_llm = time.monotonic()
+            try:
+                results = judge_prompt.parse_batch_judgments(output, ids)
+            except ValueError:
+                retry_single.extend(tid for tid in ids if not _job_cancelled(conn, tid))
+                continue
+            t_parse = time.monotonic()
+            JOB_PHASE_SECONDS.observe(t_llm - t_prompt, phase="llm")
+            JOB_PHASE_SECONDS.observe(t_parse - t_llm, phase="parse")
+            for tid in ids:
+                payload = results[tid]
+                payload["thread_id"] = tid
+                _finish_job(
+                    conn,
+                    tid,
+                    timings={
+                        "load_s": round(t_load - t_run_start, 6),
+                        "prompt_s": round(t_prompt - t_prompt_start, 6),
+                        "llm_s": round(t_llm - t_prompt, 6),
+                        "parse_s": round(t_parse - t_llm, 6),
+                        "total_s": round(t_parse - t_run_start, 6),
+                        "process_s": round(t_parse - t_run_start, 6),
+                        "batch_size": len(ids),
+                        "prompt_chars": len(prompt),
+                        "prompt_tokens": judge_prompt.estimate_tokens(prompt),
+                        **usage,
+                    },
+                    payload=None if dry_run else payload,
+                    model=model,
+                    content_hash=hashes[tid],
+                )
+            _clear_quota_state(conn, model)
+    except Exception as exc:
+        for thread_id in thread_ids:
+            row = conn.execute(
+                "SELECT status FROM llm_jobs WHERE thread_id = ?", (thread_id,)
+            ).fetchone()
+            if thread_id not in retry_single and row and row["status"] == "running":
+                fail_job(conn, thread_id, model, f"LLM job crashed: {exc}")
+    finally:
+        # run_judge_job starts from a claimed job, so hand the fallbacks
+        # back as 'starting' (still leased to this worker).
+        retry_single = [
+            tid for tid in retry_single if set_job_status(conn, tid, "starting", owner=WORKER_ID)
+        ]
+        DB_POOL.release(conn)
+    for thread_id in retry_single:
+        run_judge_job(thread_id, dry_run=dry_run, model=model, force=force)
+    wake()
+
+
+def terminate_running_job(thread_id: str) -> None:
+    with RUNNING_JOBS_LOCK:
+        proc = RUNNING_JOBS.get(thread_id)
+    if proc:
+        terminate_process_group(proc)
+
+
+def start() -> None:
+    """Run the dispatcher and the lease heartbeat on daemon threads."""
+    Thread(target=dispatch_loop, name="judge-dispatch", daemon=True).start()
+    Thread(target=_heartbeat_loop, name="judge-heartbeat", daemon=True).start()
+
+
+def _serve_metrics(port: int) -> None:
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            body = metrics.REGISTRY.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", metrics.CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+    Thread(target=server.serve_forever, name="judge-metrics", daemon=True).start()
+
+
+def main() -> None:
+    global DB_PATH
+    parser = argparse.ArgumentParser(description="Run the judge jobs queued through the API.")
+    parser.add_argument("--db", type=Path, default=DB_PATH)
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=None,
+        help="serve this worker's metrics (Prometheus text format) on 127.0.0.1:PORT",
+    )
+    args = parser.parse_args()
+    DB_PATH = args.db
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    conn = get_conn()
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+        schema.ensure_tables(conn)
+    finally:
+        conn.close()
+
+    if args.metrics_port:
+        _serve_metrics(args.metrics_port)
+    stop = Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    start()
+    LOG.info("judge worker %s on %s (max_inflight=%d)", WORKER_ID, DB_PATH, MAX_JUDGE_INFLIGHT)
+    while not stop.wait(1.0):
+        pass
+
+    # LLM CLIs run in their own process groups and would outlive this process.
+    with RUNNING_JOBS_LOCK:
+        procs = list({id(proc): proc for proc in RUNNING_JOBS.values()}.values())
+    for proc in procs:
+        terminate_process_group(proc)
+    # Expire our leases so other workers pick the jobs up on their next check.
+    conn = get_conn()
+    try:
+        conn.execute(
+            "UPDATE llm_jobs SET lease_expires_at = ? WHERE lease_owner = ? AND status IN ('running', 'starting')",
+            (datetime.utcnow().isoformat(), WORKER_ID),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,90 @@
 
+import json
 import sqlite3
+import zlib
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable
 
+from bb_bugs.store import profile
+
+# Post bodies live in a separate attached database so the metadata tables
+# (threads, posts, triage/judge tables) stay small and cache-resident.
+CONTENT_SCHEMA = "content"
+BODY_COMPRESS_LEVEL = 6
+# Post ids are "<thread_id>.<n>"; order by n as a number so 10 sorts after 9.
+POST_ORDER_SQL = "CAST(substr({col}, instr({col}, '.') + 1) AS INTEGER), {col}"
+
 
 @dataclass
 class DbConfig:
     path: Path
+    content_path: Path | None = None
+
+
+def content_db_path(path: Path) -> Path:
+    return path.with_name(f"{path.stem}_content{path.suffix}")
 
 
-def connect_db(config: DbConfig) -> sqlite3.Connection:
-    conn = sqlite3.connect(config.path)
+def connect_db(config: DbConfig, *, check_same_thread: bool = True) -> sqlite3.Connection:
+    factory = profile.ProfilingConnection if profile.SQL_PROFILE else sqlite3.Connection
+    conn = sqlite3.connect(config.path, check_same_thread=check_same_thread, factory=factory)
     conn.row_factory = sqlite3.Row
+    attach_content_db(conn, config.content_path or content_db_path(config.path), create=False)
     return conn
 
 
+def attach_content_db(conn: sqlite3.Connection, path: Path, *, create: bool = True) -> None:
+    """Attach the content DB at ``path`` as ``content``.
+
+    With ``create=False`` a missing file is left alone and an empty
+    in-memory stand-in is attached instead, so a connection that only reads
+    sees no compressed bodies and falls back to the inline columns.
+    init_db and migrate_post_bodies swap the real file in.
+    """
+    conn.create_function("bb_decompress", 1, decompress_body, deterministic=True)
+    if create or path.exists():
+        conn.execute(f"ATTACH DATABASE ? AS {CONTENT_SCHEMA}", (str(path),))
+        return
+    conn.execute(f"ATTACH DATABASE ':memory:' AS {CONTENT_SCHEMA}")
+    conn.execute(
+        f"CREATE TABLE {CONTENT_SCHEMA}.post_bodies (post_id TEXT PRIMARY KEY, body_html BLOB, body_text BLOB)"
+    )
+    # Remember where the real file belongs for _ensure_content_file.
+    conn.execute(f"CREATE TABLE {CONTENT_SCHEMA}.pending_path (path TEXT NOT NULL)")
+    conn.execute(f"INSERT INTO {CONTENT_SCHEMA}.pending_path (path) VALUES (?)", (str(path),))
+    conn.commit()
+
+
+def _ensure_content_file(conn: sqlite3.Connection) -> None:
+    """Replace an in-memory content stand-in with the real (new) file."""
+    row = conn.execute(
+        "SELECT file FROM pragma_database_list WHERE name = ?", (CONTENT_SCHEMA,)
+    ).fetchone()
+    if row is None or row[0]:
+        return
+    path = conn.execute(f"SELECT path FROM {CONTENT_SCHEMA}.pending_path").fetchone()[0]
+    conn.commit()
+    conn.execute(f"DETACH DATABASE {CONTENT_SCHEMA}")
+    attach_content_db(conn, Path(path))
+
+
+def compress_body(text: str | None) -> bytes | None:
+    if text is None:
+        return None
+    return zlib.compress(text.encode("utf-8"), BODY_COMPRESS_LEVEL)
+
+
+def decompress_body(blob: bytes | str | None) -> str | None:
+    if blob is None:
+        return None
+    if isinstance(blob, str):
+        return blob
+    return zlib.decompress(blob).decode("utf-8")
+
+
 def init_db(conn: sqlite3.Connection) -> None:
+    _ensure_content_file(conn)
     conn.executescript(
         """
         CREATE TABLE IF NOT EXISTS threads (
@@ -40,10 +108,20 @@ def init_db(conn: sqlite3.Connection) -> None:
             FOREIGN KEY (thread_id) REFERENCES threads(thread_id)
         );
 
+        CREATE INDEX IF NOT EXISTS idx_posts_thread_id ON posts(thread_id);
+
+        CREATE INDEX IF NOT EXISTS idx_threads_num_id ON threads(CAST(thread_id AS INTEGER));
+
         CREATE TABLE IF NOT EXISTS fetch_state (
             key TEXT PRIMARY KEY,
             value TEXT
         );
+
+        CREATE TABLE IF NOT EXISTS content.post_bodies (
+            post_id TEXT PRIMARY KEY,
+            body_html BLOB,
+            body_text BLOB
+        );
         """
     )
     _ensure_columns(conn, "threads", {"url": "TEXT"})
@@ -87,22 +165,140 @@ def upsert_threads(conn: sqlite3.Connection, rows: Iterable[dict]) -> None:
 
 
 def upsert_post(conn: sqlite3.Connection, row: dict) -> None:
+    # Inline body columns are legacy; clear them so they never shadow the
+    # compressed copy in content.post_bodies.
     conn.execute(
         """
         INSERT INTO posts (post_id, thread_id, author, posted_at, body_html, body_text, is_first)
-        VALUES (:post_id, :thread_id, :author, :posted_at, :body_html, :body_text, :is_first)
+        VALUES (:post_id, :thread_id, :author, :posted_at, NULL, NULL, :is_first)
         ON CONFLICT(post_id) DO UPDATE SET
             author=excluded.author,
             posted_at=excluded.posted_at,
-            body_html=excluded.body_html,
-            body_text=excluded.body_text,
+            body_html=NULL,
+            body_text=NULL,
             is_first=excluded.is_first
         """,
         row,
     )
+    conn.execute(
+        """
+        INSERT INTO content.post_bodies (post_id, body_html, body_text)
+        VALUES (?, ?, ?)
+        ON CONFLICT(post_id) DO UPDATE SET
+            body_html=excluded.body_html,
+            body_text=excluded.body_text
+        """,
+        (row["post_id"], compress_body(row.get("body_html")), compress_body(row.get("body_text"))),
+    )
     conn.commit()
 
 
+def list_thread_posts(
+    conn: sqlite3.Connection,
+    thread_id: str,
+    limit: int | None = None,
+    *,
+    with_html: bool = False,
+) -> list[sqlite3.Row]:
+    """Return posts for a thread with bodies decompressed from the content DB.
+
+    Rows that predate the hot/cold split fall back to the inline columns.
+    """
+    html_col = (
+        ", COALESCE(bb_decompress(c.body_html), p.body_html) AS body_html" if with_html else ""
+    )
+    sql = f"""
+        SELECT p.post_id, p.author, p.posted_at,
+               COALESCE(bb_decompress(c.body_text), p.body_text) AS body_text{html_col}
+        FROM posts p
+        LEFT JOIN content.post_bodies c ON c.post_id = p.post_id
+        WHERE p.thread_id = ?
+        ORDER BY {POST_ORDER_SQL.format(col="p.post_id")}
+    """
+    if limit is not None:
+        sql += " LIMIT ?"
+        cur = conn.execute(sql, (thread_id, limit))
+    else:
+        cur = conn.execute(sql, (thread_id,))
+    return list(cur.fetchall())
+
+
+def list_posts_for_threads(
+    conn: sqlite3.Connection,
+    thread_ids: list[str],
+    limit: int | None = None,
+) -> dict[str, list[sqlite3.Row]]:
+    """Like list_thread_posts for many threads at once, keyed by thread_id.
+
+    One statement for the whole batch; with a limit, ROW_NUMBER() keeps the
+    first ``limit`` posts per thread so only those bodies are decompressed.
+    """
+    rank_limit = "" if limit is None else "WHERE p.rn <= ?"
+    sql = f"""
+        SELECT p.thread_id, p.post_id, p.author, p.posted_at,
+               COALESCE(bb_decompress(c.body_text), p.body_text) AS body_text
+        FROM (
+            SELECT post_id, thread_id, author, posted_at, body_text,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY thread_id ORDER BY {POST_ORDER_SQL.format(col="post_id")}
+                   ) AS rn
+            FROM posts
+            WHERE thread_id IN (SELECT value FROM json_each(?))
+        ) p
+        LEFT JOIN content.post_bodies c ON c.post_id = p.post_id
+        {rank_limit}
+        ORDER BY p.thread_id, p.rn
+    """
+    params: tuple = (json.dumps(thread_ids),) if limit is None else (json.dumps(thread_ids), limit)
+    posts: dict[str, list[sqlite3.Row]] = {tid: [] for tid in thread_ids}
+    for row in conn.execute(sql, params):
+        posts[row["thread_id"]].append(row)
+    return posts
+
+
+def migrate_post_bodies(conn: sqlite3.Connection, *, batch_size: int = 500) -> int:
+    """Move inline post bodies into content.post_bodies, compressed.
+
+    Returns the number of posts moved. Safe to re-run; already migrated rows
+    have NULL inline bodies and are skipped.
+    """
+    _ensure_content_file(conn)
+    moved = 0
+    while True:
+        rows = conn.execute(
+            """
+            SELECT post_id, body_html, body_text
+            FROM posts
+            WHERE post_id IS NOT NULL
+              AND (body_html IS NOT NULL OR body_text IS NOT NULL)
+            LIMIT ?
+            """,
+            (batch_size,),
+        ).fetchall()
+        if not rows:
+            break
+        conn.executemany(
+            """
+            INSERT INTO content.post_bodies (post_id, body_html, body_text)
+            VALUES (?, ?, ?)
+            ON CONFLICT(post_id) DO UPDATE SET
+                body_html=excluded.body_html,
+                body_text=excluded.body_text
+            """,
+            [
+                (r["post_id"], compress_body(r["body_html"]), compress_body(r["body_text"]))
+                for r in rows
+            ],
+        )
+        conn.executemany(
+            "UPDATE posts SET body_html = NULL, body_text = NULL WHERE post_id = ?",
+            [(r["post_id"],) for r in rows],
+        )
+        conn.commit()
+        moved += len(rows)
+    return moved
+
+
 def get_fetch_state(conn: sqlite3.Connection, key: str) -> str | None:
     cur = conn.execute("SELECT value FROM fetch_state WHERE key = ?", (key,))
     row = cur.fetchone()
@@ -135,6 +331,18 @@ def list_threads_missing_first_post(conn: sqlite3.Connection, limit: int | None
     return list(cur.fetchall())
 
 
+def thread_ids_with_first_post(conn: sqlite3.Connection, thread_ids: list[str]) -> set[str]:
+    """The subset of ``thread_ids`` whose first post is already stored."""
+    rows = conn.execute(
+        """
+        SELECT DISTINCT thread_id FROM posts
+        WHERE is_first = 1 AND thread_id IN (SELECT value FROM json_each(?))
+        """,
+        (json.dumps(thread_ids),),
+    )
+    return {row[0] for row in rows}
+
+
 def list_threads_with_urls(conn: sqlite3.Connection, limit: int | None = None) -> list[sqlite3.Row]:
     sql = """
         SELECT t.thread_id, t.url
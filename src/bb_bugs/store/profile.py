@@ -0,0 +1,237 @@
+
+import atexit
+import json
+import os
+import re
+import sqlite3
+import time
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from threading import Lock
+
+# Opt-in: connect_db only hands out profiling connections when this is set.
+SQL_PROFILE = os.getenv("BB_SQL_PROFILE", "").lower() not in ("", "0", "false")
+SQL_SLOW_MS = float(os.getenv("BB_SQL_SLOW_MS", "50"))
+# Where to write the final snapshot on exit (for CLI runs; see scripts/sql_report.py).
+SQL_PROFILE_OUT = os.getenv("BB_SQL_PROFILE_OUT")
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_EXPLAINABLE = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and IN (?, ?, ...) lists so one statement is one key."""
+    return _PLACEHOLDER_LIST.sub("?, ...", _WHITESPACE.sub(" ", sql).strip())
+
+
+def params_shape(params) -> list[str] | dict[str, str]:
+    if isinstance(params, dict):
+        return {key: type(value).__name__ for key, value in params.items()}
+    return [type(value).__name__ for value in params]
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[int(round((p / 100.0) * (len(values) - 1)))]
+
+
+class SqlProfiler:
+    """Per-statement timings plus a log of slow statements with their plans.
+
+    Percentiles come from the last ``samples`` calls of each statement.
+    The query plan of a slow statement is captured once per statement.
+    """
+
+    def __init__(self, slow_ms: float, *, samples: int = 2048, slow_keep: int = 200) -> None:
+        self.slow_ms = slow_ms
+        self._samples = samples
+        self._lock = Lock()
+        self._stats: dict[str, dict] = {}
+        self._slow: deque[dict] = deque(maxlen=slow_keep)
+        self._plans: dict[str, list[str]] = {}
+
+    def record(self, conn: sqlite3.Connection, sql: str, params, elapsed_s: float) -> None:
+        key = normalize_sql(sql)
+        elapsed_ms = elapsed_s * 1000.0
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = {
+                    "calls": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "samples": deque(maxlen=self._samples),
+                }
+            stats["calls"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            stats["samples"].append(elapsed_ms)
+            plan = self._plans.get(key)
+        if elapsed_ms < self.slow_ms:
+            return
+        if plan is None:
+            plan = _explain(conn, sql, params)
+            with self._lock:
+                self._plans[key] = plan
+        with self._lock:
+            self._slow.append(
+                {
+                    "sql": key,
+                    "params": params_shape(params),
+                    "ms": round(elapsed_ms, 3),
+                    "at": datetime.utcnow().isoformat(),
+                    "plan": plan,
+                }
+            )
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            items = [(key, dict(stats, samples=list(stats["samples"]))) for key, stats in self._stats.items()]
+            slow = list(self._slow)
+        statements = [
+            {
+                "sql": key,
+                "calls": stats["calls"],
+                "total_ms": round(stats["total_ms"], 3),
+                "mean_ms": round(stats["total_ms"] / stats["calls"], 3),
+                "p50_ms": round(_pct(stats["samples"], 50), 3),
+                "p99_ms": round(_pct(stats["samples"], 99), 3),
+                "max_ms": round(stats["max_ms"], 3),
+            }
+            for key, stats in items
+        ]
+        statements.sort(key=lambda s: s["total_ms"], reverse=True)
+        return {"enabled": SQL_PROFILE, "slow_ms": self.slow_ms, "statements": statements, "slow": slow}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._slow.clear()
+            self._plans.clear()
+
+
+def _explain(conn: sqlite3.Connection, sql: str, params) -> list[str]:
+    if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+        return []
+    try:
+        # The base-class execute keeps the EXPLAIN itself out of the stats.
+        rows = sqlite3.Connection.execute(conn, f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    except sqlite3.Error as exc:
+        return [f"(no plan: {exc})"]
+    # Rows are (id, parent, notused, detail); indent children under parents.
+    depth: dict[int, int] = {0: -1}
+    lines = []
+    for row in rows:
+        node_id, parent, detail = row[0], row[1], row[3]
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append("  " * depth[node_id] + detail)
+    return lines
+
+
+PROFILER = SqlProfiler(SQL_SLOW_MS)
+
+
+class ProfilingCursor(sqlite3.Cursor):
+    """Time each statement from execute() until its rows are consumed.
+
+    A statement is recorded once its results are exhausted, or when the
+    cursor runs the next statement, is closed or is garbage collected.
+    """
+
+    _pending: list | None = None
+
+    def _finish(self) -> None:
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            PROFILER.record(self.connection, *pending)
+
+    def execute(self, sql: str, parameters=(), /):
+        self._finish()
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._pending = [sql, parameters, time.perf_counter() - start]
+
+    def executemany(self, sql: str, seq_of_parameters, /):
+        self._finish()
+        seq_of_parameters = list(seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            first = seq_of_parameters[0] if seq_of_parameters else ()
+            self._pending = [sql, first, time.perf_counter() - start]
+
+    def _add(self, elapsed_s: float, done: bool) -> None:
+        if self._pending is not None:
+            self._pending[2] += elapsed_s
+            if done:
+                self._finish()
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._add(time.perf_counter() - start, row is None)
+        return row
+
+    def fetchmany(self, size: int | None = None):
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._add(time.perf_counter() - start, not rows)
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._add(time.perf_counter() - start, True)
+        return rows
+
+    def __next__(self):
+        start = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._add(time.perf_counter() - start, True)
+            raise
+        self._add(time.perf_counter() - start, False)
+        return row
+
+    def close(self) -> None:
+        self._finish()
+        super().close()
+
+    def __del__(self) -> None:
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+
+class ProfilingConnection(sqlite3.Connection):
+    """sqlite3 connection whose statements are timed into PROFILER."""
+
+    def cursor(self, factory=ProfilingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql: str, parameters=(), /):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql: str, seq_of_parameters, /):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+def _dump_on_exit() -> None:
+    path = Path(SQL_PROFILE_OUT)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(PROFILER.snapshot(), indent=2), encoding="utf-8")
+
+
+if SQL_PROFILE and SQL_PROFILE_OUT:
+    atexit.register(_dump_on_exit)
@@ -0,0 +1,232 @@
+"""Schema for the triage and judge tables shared by the API and judge workers.
+
+Both entry points call ensure_tables on startup, so either can be the first
+to open a database and migrate it.
+"""
+
+import sqlite3
+
+from bb_bugs.store import db as db_store
+
+
+def ensure_tables(conn: sqlite3.Connection) -> None:
+    db_store.init_db(conn)
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS triage_decisions (
+            thread_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            duplicate_of TEXT,
+            notes TEXT,
+            updated_at TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS llm_judgments (
+            thread_id TEXT PRIMARY KEY,
+            summary TEXT,
+            status_guess TEXT,
+            confidence TEXT,
+            evidence TEXT,
+            duplicates TEXT,
+            model TEXT,
+            created_at TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS llm_jobs (
+            thread_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            dry_run INTEGER DEFAULT 0,
+            model TEXT,
+            error TEXT,
+            started_at TEXT,
+            finished_at TEXT,
+            updated_at TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS llm_job_metrics (
+            thread_id TEXT PRIMARY KEY,
+            timings_json TEXT,
+            created_at TEXT,
+            updated_at TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS llm_state (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            updated_at TEXT
+        );
+
+        CREATE TABLE IF NOT EXISTS triage_queue (
+            thread_id TEXT PRIMARY KEY,
+            sort_id INTEGER NOT NULL,
+            title TEXT,
+            url TEXT,
+            decision_status TEXT,
+            duplicate_of TEXT,
+            notes TEXT,
+            reviewed INTEGER NOT NULL DEFAULT 0,
+            has_llm INTEGER NOT NULL DEFAULT 0,
+            status_guess TEXT,
+            confidence TEXT
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_triage_queue_sort ON triage_queue(sort_id);
+        CREATE INDEX IF NOT EXISTS idx_triage_queue_reviewed ON triage_queue(reviewed, sort_id);
+        CREATE INDEX IF NOT EXISTS idx_triage_queue_has_llm ON triage_queue(has_llm, sort_id);
+        CREATE INDEX IF NOT EXISTS idx_triage_queue_guess
+            ON triage_queue(status_guess, confidence, sort_id);
+        CREATE INDEX IF NOT EXISTS idx_triage_queue_confidence ON triage_queue(confidence, sort_id);
+        CREATE INDEX IF NOT EXISTS idx_triage_queue_facets
+            ON triage_queue(reviewed, has_llm, status_guess, confidence);
+
+        CREATE TABLE IF NOT EXISTS content_versions (
+            scope TEXT PRIMARY KEY,
+            version INTEGER NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS llm_job_events (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            thread_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            model TEXT,
+            error TEXT,
+            created_at TEXT NOT NULL
+        );
+        """
+    )
+    cols = conn.execute("PRAGMA table_info(llm_jobs)").fetchall()
+    col_names = {c[1] for c in cols} if cols else set()
+    if "dry_run" not in col_names:
+        conn.execute("ALTER TABLE llm_jobs ADD COLUMN dry_run INTEGER DEFAULT 0")
+    if "model" not in col_names:
+        conn.execute("ALTER TABLE llm_jobs ADD COLUMN model TEXT")
+    if "force" not in col_names:
+        conn.execute("ALTER TABLE llm_jobs ADD COLUMN force INTEGER DEFAULT 0")
+    if "priority" not in col_names:
+        conn.execute("ALTER TABLE llm_jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT 0")
+    if "attempts" not in col_names:
+        conn.execute("ALTER TABLE llm_jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+    if "next_attempt_at" not in col_names:
+        conn.execute("ALTER TABLE llm_jobs ADD COLUMN next_attempt_at TEXT")
+    if "queued_at" not in col_names:
+        conn.execute("ALTER TABLE llm_jobs ADD COLUMN queued_at TEXT")
+    if "lease_owner" not in col_names:
+        conn.execute("ALTER TABLE llm_jobs ADD COLUMN lease_owner TEXT")
+    if "lease_expires_at" not in col_names:
+        conn.execute("ALTER TABLE llm_jobs ADD COLUMN lease_expires_at TEXT")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_llm_jobs_claim "
+        "ON llm_jobs(status, model, priority DESC, updated_at)"
+    )
+    cols = conn.execute("PRAGMA table_info(llm_judgments)").fetchall()
+    col_names = {c[1] for c in cols} if cols else set()
+    if "content_hash" not in col_names:
+        conn.execute("ALTER TABLE llm_judgments ADD COLUMN content_hash TEXT")
+    # Every job transition is journalled for /judge/events, however the row
+    # was written (upsert, claim UPDATE, or another process).
+    conn.executescript(
+        """
+        CREATE TRIGGER IF NOT EXISTS llm_jobs_event_insert AFTER INSERT ON llm_jobs
+        BEGIN
+            INSERT INTO llm_job_events (thread_id, status, model, error, created_at)
+            VALUES (NEW.thread_id, NEW.status, NEW.model, NEW.error, NEW.updated_at);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS llm_jobs_event_update AFTER UPDATE ON llm_jobs
+        WHEN NEW.status IS NOT OLD.status OR NEW.error IS NOT OLD.error
+        BEGIN
+            INSERT INTO llm_job_events (thread_id, status, model, error, created_at)
+            VALUES (NEW.thread_id, NEW.status, NEW.model, NEW.error, NEW.updated_at);
+        END;
+        """
+    )
+    _ensure_triage_queue(conn)
+    _ensure_content_versions(conn)
+    conn.commit()
+
+
+# One triage_queue row per thread, denormalized from the thread, its
+# decision and its judgment. Append "WHERE t.thread_id = ..." to build one.
+TRIAGE_QUEUE_ROW_SQL = """
+    INSERT INTO triage_queue (
+        thread_id, sort_id, title, url, decision_status, duplicate_of, notes,
+        reviewed, has_llm, status_guess, confidence
+    )
+    SELECT t.thread_id, CAST(t.thread_id AS INTEGER), t.title, t.url,
+           d.status, d.duplicate_of, d.notes,
+           d.thread_id IS NOT NULL, lj.thread_id IS NOT NULL, lj.status_guess, lj.confidence
+    FROM threads t
+    LEFT JOIN triage_decisions d ON d.thread_id = t.thread_id
+    LEFT JOIN llm_judgments lj ON lj.thread_id = t.thread_id
+"""
+
+
+def _ensure_content_versions(conn: sqlite3.Connection) -> None:
+    """Bump the "global" and "thread:<id>" versions on every content write.
+
+    A thread's version is the global counter value of its latest change,
+    so both serve as ETags (see _cached_json).
+    """
+    conn.execute(
+        "INSERT INTO content_versions (scope, version) "
+        "SELECT 'global', 0 WHERE NOT EXISTS (SELECT 1 FROM content_versions WHERE scope = 'global')"
+    )
+
+    def bump(ref: str) -> str:
+        # Delete-then-insert for the same reason as in _ensure_triage_queue.
+        return (
+            "UPDATE content_versions SET version = version + 1 WHERE scope = 'global'; "
+            f"DELETE FROM content_versions WHERE scope = 'thread:' || {ref}.thread_id; "
+            "INSERT INTO content_versions (scope, version) "
+            f"SELECT 'thread:' || {ref}.thread_id, version FROM content_versions WHERE scope = 'global';"
+        )
+
+    for table in ("threads", "posts", "triage_decisions", "llm_judgments"):
+        conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS content_version_{table}_insert "
+            f"AFTER INSERT ON {table} BEGIN {bump('NEW')} END"
+        )
+        conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS content_version_{table}_update "
+            f"AFTER UPDATE ON {table} BEGIN {bump('NEW')} END"
+        )
+        conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS content_version_{table}_delete "
+            f"AFTER DELETE ON {table} BEGIN {bump('OLD')} END"
+        )
+
+
+def _ensure_triage_queue(conn: sqlite3.Connection) -> None:
+    """Create the triggers that keep triage_queue current; backfill if out of sync."""
+    # Delete-then-insert rather than INSERT OR REPLACE: the outer statement's
+    # conflict policy (e.g. an upsert) would override OR REPLACE in a trigger.
+    refresh_new = (
+        "DELETE FROM triage_queue WHERE thread_id = NEW.thread_id; "
+        + TRIAGE_QUEUE_ROW_SQL
+        + " WHERE t.thread_id = NEW.thread_id;"
+    )
+    refresh_old = (
+        "DELETE FROM triage_queue WHERE thread_id = OLD.thread_id; "
+        + TRIAGE_QUEUE_ROW_SQL
+        + " WHERE t.thread_id = OLD.thread_id;"
+    )
+    triggers = {
+        "triage_queue_thread_insert": f"AFTER INSERT ON threads BEGIN {refresh_new} END",
+        "triage_queue_thread_update": f"AFTER UPDATE OF title, url ON threads BEGIN {refresh_new} END",
+        "triage_queue_thread_delete": (
+            "AFTER DELETE ON threads BEGIN "
+            "DELETE FROM triage_queue WHERE thread_id = OLD.thread_id; END"
+        ),
+    }
+    for table in ("triage_decisions", "llm_judgments"):
+        triggers[f"triage_queue_{table}_insert"] = f"AFTER INSERT ON {table} BEGIN {refresh_new} END"
+        triggers[f"triage_queue_{table}_update"] = f"AFTER UPDATE ON {table} BEGIN {refresh_new} END"
+        triggers[f"triage_queue_{table}_delete"] = f"AFTER DELETE ON {table} BEGIN {refresh_old} END"
+    for name, body in triggers.items():
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+    in_sync = conn.execute(
+        "SELECT (SELECT COUNT(*) FROM threads) = (SELECT COUNT(*) FROM triage_queue)"
+    ).fetchone()[0]
+    if not in_sync:
+        conn.execute("DELETE FROM triage_queue")
+        conn.execute(TRIAGE_QUEUE_ROW_SQL)
@@ -0,0 +1,23 @@
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+
+SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "check_import_time.py"
+
+
+class ImportTimeTest(unittest.TestCase):
+    def test_import_budgets(self) -> None:
+        # BB_IMPORT_TIME_SCALE loosens the budgets on slow machines.
+        scale = os.getenv("BB_IMPORT_TIME_SCALE", "1.0")
+        proc = subprocess.run(
+            [sys.executable, str(SCRIPT), "--runs", "5", "--scale", scale],
+            capture_output=True,
+            text=True,
+        )
+        self.assertEqual(proc.returncode, 0, proc.stdout + proc.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()